@@ -0,0 +1,59 @@
+"""Startup time for the game's assets: per-PNG loading vs the packed atlas
+
+Run with ``python benchmarks/asset_startup.py``. The cold run builds the atlas
+into a fresh temporary cache; the warm run reads it back.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pygame  # noqa: E402
+from assets import AssetAtlas, ASSETS_DIR  # noqa: E402
+
+
+def load_each_png():
+    for folder, _, files in os.walk(ASSETS_DIR):
+        for filename in files:
+            if filename.lower().endswith(".png"):
+                try:
+                    pygame.image.load(os.path.join(folder, filename)).convert_alpha()
+                except pygame.error:
+                    pass
+
+
+def start_atlas(cache_dir):
+    atlas = AssetAtlas(cache_dir=cache_dir)
+    start = time.perf_counter()
+    atlas.load()
+    loaded = time.perf_counter()
+    atlas.sprite("gwonSpritesheets/gwonsprite (1)")
+    return loaded - start, time.perf_counter() - loaded
+
+
+def main():
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    warnings.simplefilter("ignore")
+
+    start = time.perf_counter()
+    load_each_png()
+    print(f"per-PNG load + convert: {(time.perf_counter() - start) * 1e3:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for label in ("cold", "warm"):
+            load_time, first_sprite = start_atlas(cache_dir)
+            print(
+                f"atlas {label} start:       {load_time * 1e3:8.1f} ms"
+                f" (+{first_sprite * 1e3:.1f} ms first sprite)"
+            )
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Time BlackHole platform forces per frame, per-platform loop vs NumPy batch
+
+Run with ``python benchmarks/black_hole_forces.py`` (needs NumPy for the
+batched column). Both paths are also checked to move platforms identically.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIM_DT  # noqa: E402
+from entities import BlackHole, Platform  # noqa: E402
+from entities import black_hole as black_hole_module  # noqa: E402
+
+SIZES = (10, 1_000, 10_000)
+FRAMES = 100
+
+
+def make_debris(count, seed):
+    rng = random.Random(seed)
+    return [
+        Platform(
+            rng.randrange(-SCREEN_WIDTH, SCREEN_WIDTH * 2),
+            rng.randrange(-SCREEN_HEIGHT, SCREEN_HEIGHT * 2),
+            rng.randint(100, 300),
+            20,
+        )
+        for _ in range(count)
+    ]
+
+
+def run(count, batched):
+    black_hole = BlackHole(SCREEN_WIDTH, SCREEN_HEIGHT, random.Random(0))
+    black_hole.active = True
+    platforms = make_debris(count, seed=count)
+    apply = (
+        black_hole._apply_force_to_platforms_batched
+        if batched
+        else black_hole._apply_force_to_platforms
+    )
+    inside = 0
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        inside = len(apply(SIM_DT, platforms))
+    elapsed = (time.perf_counter() - start) / FRAMES
+    return elapsed, [tuple(p.rect) for p in platforms], inside
+
+
+def main():
+    black_hole_module.BATCH_THRESHOLD = float("inf")  # force the scalar path
+    print(f"{'platforms':>10} {'loop ms':>9} {'batched ms':>11} {'same':>5}")
+    for count in SIZES:
+        loop_time, loop_rects, loop_inside = run(count, batched=False)
+        if black_hole_module.np is None:
+            print(f"{count:>10} {loop_time * 1e3:>9.3f} {'(no numpy)':>11}")
+            continue
+        batch_time, batch_rects, batch_inside = run(count, batched=True)
+        same = loop_rects == batch_rects and loop_inside == batch_inside
+        print(
+            f"{count:>10} {loop_time * 1e3:>9.3f} {batch_time * 1e3:>11.3f}"
+            f" {str(same):>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
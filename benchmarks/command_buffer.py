@@ -0,0 +1,123 @@
+"""Draw crowds of lightning strikes immediately and through draw commands
+
+Run with ``python benchmarks/command_buffer.py [frames]``. First a seeded game
+is played with a key-mashing bot and drawn by both the full-repaint renderer
+and the command renderer, which must agree on every frame checked. Then a
+level ten screens wide is kept filled with more and more lightning strikes,
+most of them off screen, and the frame time of both renderers is reported
+with how many commands were submitted, culled and blitted in batches.
+"""
+
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pygame  # noqa: E402
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIM_DT, FPS, GREEN  # noqa: E402
+from headless import random_actions  # noqa: E402
+from inputs import keys_from_mask  # noqa: E402
+from level_format import Level, encode_level  # noqa: E402
+from renderer import Renderer, CommandRenderer  # noqa: E402
+from session import GameSession  # noqa: E402
+from utils import init_pygame, get_font  # noqa: E402
+
+FRAMES = 300
+CHECK_EVERY = 10  # frames between pixel comparisons of the bot game
+SCREENS = 10
+STRIKES = (100, 1_000, 5_000)
+
+
+def wide_level(seed=0):
+    rng = random.Random(seed)
+    platforms = []
+    for screen in range(SCREENS):
+        left = screen * SCREEN_WIDTH
+        platforms.append((left, 650, SCREEN_WIDTH, 70, GREEN))  # ground
+        for _ in range(10):
+            x = left + rng.randrange(SCREEN_WIDTH - 200)
+            platforms.append((x, rng.randrange(150, 600), 200, 20, GREEN))
+    return Level(encode_level(platforms, [(400, 630, 250, 20)], [(320, 560)]))
+
+
+def check_bot_game(screen, frames, seed=7):
+    """Whether both renderers drew the same frames of a seeded bot game"""
+    renderers = [
+        renderer_class(screen, get_font(48), get_font(36))
+        for renderer_class in (Renderer, CommandRenderer)
+    ]
+    session = GameSession(seed=seed)
+    session.black_hole.active = True
+    actions = random_actions(random.Random(seed))
+    for frame in range(frames):
+        session.step(SIM_DT, keys_from_mask(next(actions)))
+        if frame % CHECK_EVERY:
+            continue
+        drawn = []
+        for renderer in renderers:
+            renderer.draw(session)
+            drawn.append(pygame.image.tobytes(screen, "RGB"))
+        if drawn[0] != drawn[1]:
+            return False
+    return True
+
+
+def run(renderer_class, strikes, frames, screen):
+    renderer = renderer_class(screen, get_font(48), get_font(36))
+    session = GameSession(seed=3, level=wide_level())
+    game_state = session.game_state
+    placement = random.Random(3)
+    world = session.camera.world_rect
+    keys = keys_from_mask(0)
+    draw_time = 0.0
+    counts = [0, 0, 0]
+    for _ in range(frames):
+        session.player.pos.x = (session.player.pos.x + 4) % world.width
+        session.step(SIM_DT, keys)
+        while len(game_state.lightning_strikes) < strikes:
+            game_state.add_lightning(
+                game_state.lightning_pool.acquire(
+                    placement.randrange(world.width), placement.randrange(600)
+                )
+            )
+        start = time.perf_counter()
+        renderer.draw(session)
+        draw_time += time.perf_counter() - start
+        commands = getattr(renderer, "commands", None)
+        if commands is not None:
+            counts[0] += commands.submitted
+            counts[1] += commands.culled
+            counts[2] += commands.batches
+    return draw_time / frames * 1e3, [count / frames for count in counts]
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else FRAMES
+    screen, _ = init_pygame(SCREEN_WIDTH, SCREEN_HEIGHT)
+    identical = check_bot_game(screen, frames)
+
+    print(
+        f"{'strikes':>8} {'immediate ms':>13} {'commands ms':>12}"
+        f" {'submitted':>10} {'culled':>8} {'batches':>8}"
+    )
+    for strikes in STRIKES:
+        immediate_ms, _ = run(Renderer, strikes, frames, screen)
+        commands_ms, (submitted, culled, batches) = run(
+            CommandRenderer, strikes, frames, screen
+        )
+        print(
+            f"{strikes:>8,} {immediate_ms:>13.2f} {commands_ms:>12.2f}"
+            f" {submitted:>10,.0f} {culled:>8,.0f} {batches:>8.1f}"
+        )
+    print(f"frame budget at {FPS} FPS: {1e3 / FPS:.2f} ms")
+    print(f"identical frames in the bot game: {identical}")
+    pygame.quit()
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare frame times of the full-screen renderer and the dirty-rect renderer
+
+Run with ``python benchmarks/dirty_rects.py [frames]``. Both renderers draw the
+same seeded game, and the final frames are checked to be pixel-identical.
+Uses SDL's dummy video driver unless SDL_VIDEODRIVER is already set.
+"""
+
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pygame  # noqa: E402
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIM_DT  # noqa: E402
+from headless import random_actions  # noqa: E402
+from inputs import keys_from_mask  # noqa: E402
+from renderer import Renderer, DirtyRectRenderer  # noqa: E402
+from session import GameSession  # noqa: E402
+from utils import init_pygame, get_font, text_cache  # noqa: E402
+
+
+def run(renderer_class, frames, seed=7):
+    screen, _ = init_pygame(SCREEN_WIDTH, SCREEN_HEIGHT)
+    renderer = renderer_class(screen, get_font(48), get_font(36))
+    session = GameSession(seed=seed)
+    actions = random_actions(random.Random(seed))
+
+    draw_time = 0.0
+    for _ in range(frames):
+        session.step(SIM_DT, keys_from_mask(next(actions)))
+        start = time.perf_counter()
+        renderer.draw(session)
+        renderer.present()
+        draw_time += time.perf_counter() - start
+
+    return draw_time / frames, pygame.image.tobytes(screen, "RGB")
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    full_time, full_pixels = run(Renderer, frames)
+    dirty_time, dirty_pixels = run(DirtyRectRenderer, frames)
+
+    print(f"full repaint: {full_time * 1e3:.3f} ms/frame")
+    print(f"dirty rects:  {dirty_time * 1e3:.3f} ms/frame")
+    print(f"identical final frame: {full_pixels == dirty_pixels}")
+    print(
+        f"text cache: {text_cache.hits} hits, {text_cache.misses} misses"
+        f" ({text_cache.hit_rate():.1%} hit rate)"
+    )
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Record a 10-minute scripted session as an input log and replay it
+
+Run with ``python benchmarks/input_replay.py [minutes]``. A key-mashing bot
+plays while every step's keys go to an input log; the log is then replayed
+headless and must end in the recorded state. The first step's keys are then
+changed and the replay must notice. Finally sessions on a wide level that
+differ only in a chunk that has left play, in a platform the black hole moved
+or in one it crushed there, must not hash the same.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from constants import FPS, SIM_DT, SCREEN_WIDTH, GREEN  # noqa: E402
+from headless import random_actions  # noqa: E402
+from input_log import InputLog, InputRecorder, replay  # noqa: E402
+from inputs import keys_from_mask, KEY_JUMP  # noqa: E402
+from level_format import Level, encode_level  # noqa: E402
+from session import GameSession  # noqa: E402
+
+SEED = 11
+
+
+def record(path, steps):
+    session = GameSession(seed=SEED)
+    recorder = InputRecorder(path, SEED)
+    actions = random_actions(random.Random(SEED), hold_steps=120)
+    start = time.perf_counter()
+    for _ in range(steps):
+        mask = next(actions)
+        session.step(SIM_DT, keys_from_mask(mask))
+        recorder.record(mask)
+    elapsed = time.perf_counter() - start
+    recorder.close(session)
+    return elapsed
+
+
+def off_screen_state_hashed():
+    """Whether sessions differing only out of play get different hashes"""
+    platforms = [
+        (left, y, SCREEN_WIDTH // 2, 20, GREEN)
+        for left in range(0, 10 * SCREEN_WIDTH, SCREEN_WIDTH // 2)
+        for y in (100, 650)
+    ]
+    level = Level(encode_level(platforms, [(400, 650, 250, 70)], [(320, 360)]))
+    keys = keys_from_mask(0)
+    sessions = {}
+    for change in ("none", "again", "moved", "crushed"):
+        session = sessions[change] = GameSession(seed=SEED, level=level)
+        session.step(SIM_DT, keys)
+        # A platform high above the player, changed as the black hole would
+        platform = session.platforms[0]
+        if change == "moved":
+            platform.rect.x += 1
+            session.platform_index.update(platform)
+        elif change == "crushed":
+            session.platforms.remove(platform)
+            session.platform_index.remove(platform)
+        # Then carry the player far enough that its chunk leaves play
+        session.player.pos.update(6 * SCREEN_WIDTH, 300)
+        for _ in range(10):
+            session.step(SIM_DT, keys)
+
+    reference = sessions["none"]
+    live = [tuple(p.rect) for p in reference.platforms]
+    hashes = {change: s.state_hash() for change, s in sessions.items()}
+    return (
+        all([tuple(p.rect) for p in s.platforms] == live for s in sessions.values())
+        and hashes["again"] == hashes["none"]
+        and hashes["moved"] != hashes["none"]
+        and hashes["crushed"] != hashes["none"]
+    )
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    steps = int(minutes * 60 * FPS)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "session.log")
+        record_time = record(path, steps)
+        size = os.path.getsize(path)
+
+        log = InputLog(path)
+        start = time.perf_counter()
+        matches = replay(log).state_hash() == log.state_hash
+        replay_time = time.perf_counter() - start
+
+        # Flip jump on the very first step, while the game cannot be over
+        mask, count = log.runs[0]
+        log.runs[0:1] = [(mask ^ KEY_JUMP, 1), (mask, count - 1)]
+        caught = replay(log).state_hash() != log.state_hash
+
+    print(f"{steps:,} steps ({minutes:g} min at {FPS} FPS), {len(log.runs):,} runs")
+    print(f"input log: {size:,} bytes ({size / steps:.3f} bytes/step)")
+    print(f"played and recorded in {record_time:.2f}s")
+    print(f"replayed in {replay_time:.2f}s ({steps / replay_time:,.0f} steps/s)")
+    print(f"replay matches the recording: {matches}")
+    print(f"changed input caught as a divergence: {caught}")
+    hashed = off_screen_state_hashed()
+    print(f"state out of play changes the hash: {hashed}")
+    if not (matches and caught and hashed):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
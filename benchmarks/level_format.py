@@ -0,0 +1,103 @@
+"""Time loading and respawning a large level from a mapped level file
+
+Run with ``python benchmarks/level_format.py [platforms]``. Writes a level
+with that many platforms (50,000 by default) to a temporary file, then times
+building the platforms from Python definitions, opening the file and building
+them from its records, and resetting them from the records on respawn. The
+reset platforms are checked to match the file exactly, and a level with more
+fire pits than the game has must be refused; either failing exits non-zero.
+
+Loading from the file is not faster than the constructors: the live
+platforms are Platform objects, so both ways build one per record, and
+reading the records costs a little more than unpacking tuples. The reset is
+what the format is for, as it moves the built platforms back in place.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from constants import GREEN  # noqa: E402
+from entities import Platform  # noqa: E402
+from level_format import Level, encode_level  # noqa: E402
+
+REPEATS = 5
+
+
+def make_definitions(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        (rng.randrange(0, 100_000), rng.randrange(0, 720), rng.randint(40, 300), 20)
+        for _ in range(count)
+    ]
+
+
+def best_of(function):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    definitions = make_definitions(count)
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "large.lvl")
+        with open(path, "wb") as f:
+            f.write(
+                encode_level(
+                    [(*rect, GREEN) for rect in definitions],
+                    [(400, 650, 250, 70)],
+                    [(320, 360)],
+                )
+            )
+        size = os.path.getsize(path)
+
+        def construct():
+            return [Platform(*rect) for rect in definitions]
+
+        def open_and_build():
+            level = Level.open(path)
+            platforms = level.build_platforms()
+            level.close()
+            return platforms
+
+        level = Level.open(path)
+        platforms = level.build_platforms()
+        for platform in platforms:
+            platform.rect.inflate_ip(-10, -10)  # as if the black hole got them
+
+        construct_time = best_of(construct)
+        open_time = best_of(open_and_build)
+        reset_time = best_of(lambda: level.reset_platforms(platforms))
+        same = [tuple(p.rect) for p in platforms] == definitions
+        level.close()
+
+    print(f"{count:,} platforms, {size / 1024:,.0f} KiB level file")
+    print(f"construct from definitions: {construct_time * 1e3:8.2f} ms")
+    print(f"open file and build:        {open_time * 1e3:8.2f} ms")
+    print(f"respawn reset from file:    {reset_time * 1e3:8.2f} ms")
+    print(f"reset matches the file: {same}")
+
+    two_pits = encode_level([], [(0, 0, 10, 10), (20, 0, 10, 10)], [])
+    try:
+        Level(two_pits)
+        refused = False
+    except ValueError:
+        refused = True
+    print(f"level with two fire pits refused: {refused}")
+    if not (same and refused):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
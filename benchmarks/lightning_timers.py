@@ -0,0 +1,116 @@
+"""Time lightning upkeep with a thousand strikes queued at once
+
+Run with ``python benchmarks/lightning_timers.py [strikes]``. Strikes are
+called steadily so about that many are live every step, nearly all of them
+still warning. Each step lands and ends the strikes whose time has come and
+tests them against the player, once through GameState's timer heap and once
+by polling every strike the way it used to be done. Both must end with the
+same strikes in the same states.
+"""
+
+import math
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pygame  # noqa: E402
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIM_DT  # noqa: E402
+from entities.lightning import WARNING_TIME  # noqa: E402
+from game_state import GameState  # noqa: E402
+from sim_clock import SimClock  # noqa: E402
+
+STRIKES = 1_000
+STEPS = 3_000
+SEED = 2
+
+
+def poll(game_state, player_pos, current_time):
+    """What a step cost before the timers: every strike, every step"""
+    hit = False
+    for lightning in game_state.lightning_strikes:
+        if lightning.active and current_time <= lightning.end_time:
+            distance = math.sqrt(
+                (player_pos.x - lightning.target_x) ** 2
+                + (player_pos.y - lightning.target_y) ** 2
+            )
+            hit = hit or distance < lightning.hit_radius
+
+    strikes = game_state.lightning_strikes
+    live = 0
+    for lightning in strikes:
+        if current_time < lightning.strike_time:
+            lightning.warning_size(current_time)  # was stored every step
+        elif not lightning.active:
+            lightning.strike(current_time)
+        if lightning.active and current_time > lightning.end_time:
+            game_state.lightning_pool.release(lightning)
+        else:
+            strikes[live] = lightning
+            live += 1
+    del strikes[live:]
+    return hit
+
+
+def timed(game_state, player_pos, current_time):
+    hit = game_state.check_lightning_collisions(player_pos)
+    game_state.update_lightnings(current_time)
+    return hit
+
+
+def run(upkeep, strikes, steps):
+    clock = SimClock()
+    game_state = GameState(clock, random.Random(SEED))
+    pool = game_state.lightning_pool
+    placement = random.Random(SEED)
+    player_pos = pygame.Vector2(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2)
+    per_step = strikes * SIM_DT / (WARNING_TIME + 0.2)
+    owed = float(strikes)  # start with a full sky
+    elapsed = 0
+    hits = 0
+
+    for _ in range(steps):
+        clock.advance(SIM_DT)
+        while owed >= 1:
+            x = placement.randrange(SCREEN_WIDTH)
+            y = placement.randrange(SCREEN_HEIGHT)
+            lightning = pool.acquire(x, y)
+            if upkeep is timed:
+                game_state.add_lightning(lightning)
+            else:
+                game_state.lightning_strikes.append(lightning)
+            owed -= 1
+        owed += per_step
+
+        start = time.perf_counter_ns()
+        hits += upkeep(game_state, player_pos, clock.time())
+        elapsed += time.perf_counter_ns() - start
+
+    state = [
+        (s.target_x, s.target_y, s.strike_time, s.active, s.end_time)
+        + (tuple(s.bolt) if s.active else ())
+        for s in game_state.lightning_strikes
+    ]
+    return elapsed / steps / 1e3, hits, len(state), state
+
+
+def main():
+    strikes = int(sys.argv[1]) if len(sys.argv) > 1 else STRIKES
+    polled_us, polled_hits, live, polled = run(poll, strikes, STEPS)
+    timed_us, timed_hits, _, timer_state = run(timed, strikes, STEPS)
+
+    print(f"{strikes:,} strikes called per {WARNING_TIME + 0.2:g}s, {live:,} live")
+    print(f"polling every strike: {polled_us:8.1f} us/step")
+    print(f"timer heap:           {timed_us:8.1f} us/step")
+    print(f"speedup: {polled_us / timed_us:.1f}x")
+    same = polled == timer_state and polled_hits == timed_hits
+    print(f"same strikes and hits either way: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
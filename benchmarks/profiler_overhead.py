@@ -0,0 +1,67 @@
+"""Check that the frame profiler costs next to nothing while disabled
+
+Run with ``python benchmarks/profiler_overhead.py``. Times a frame's worth of
+disabled start_frame/mark calls and exits with status 1 if they take more
+than --max-fraction of the 1/FPS frame budget. Enabled overhead and the
+headless step rate with and without recording are printed for reference.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from constants import FPS, SIM_DT  # noqa: E402
+from inputs import keys_from_mask, KEY_RIGHT  # noqa: E402
+from profiler import FrameProfiler  # noqa: E402
+from session import GameSession  # noqa: E402
+
+# events, input, black_hole, player, collisions, fire_pit, lightning,
+# streaming, draw, present, tick
+MARKS_PER_FRAME = 11
+REPEATS = 100_000
+
+
+def frame_of_marks(profiler):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        profiler.start_frame()
+        for _ in range(MARKS_PER_FRAME):
+            profiler.mark("phase")
+    return (time.perf_counter() - start) / REPEATS
+
+
+def steps_per_second(profiler, steps=20_000):
+    session = GameSession(seed=0, profiler=profiler)
+    keys = keys_from_mask(KEY_RIGHT)
+    start = time.perf_counter()
+    for _ in range(steps):
+        profiler.start_frame()
+        session.step(SIM_DT, keys)
+    return steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-fraction", type=float, default=0.001)
+    args = parser.parse_args()
+
+    budget = 1 / FPS
+    disabled = frame_of_marks(FrameProfiler(enabled=False))
+    enabled = frame_of_marks(FrameProfiler(enabled=True))
+    for label, cost in (("disabled", disabled), ("enabled", enabled)):
+        print(f"{label}: {cost * 1e6:.2f} us/frame ({cost / budget:.4%} of budget)")
+    print(
+        f"headless steps/s: {steps_per_second(FrameProfiler(enabled=False)):,.0f}"
+        f" disabled, {steps_per_second(FrameProfiler(enabled=True)):,.0f} enabled"
+    )
+
+    if disabled / budget > args.max_fraction:
+        print(f"disabled profiler is over {args.max_fraction:.2%} of the frame budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
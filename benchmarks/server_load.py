@@ -0,0 +1,186 @@
+"""Load-test the game server over loopback with many concurrent sessions
+
+Run with ``python benchmarks/server_load.py [sessions ...]``. Starts
+src/server.py in its own process, then for each session count connects that
+many clients that mash keys like the headless bot and read every update. The
+server reports how long its ticks took; the tick budget is one SIM_DT, so
+the largest count whose p99 tick fits in it is the sessions the server's one
+core can hold. Pass --unix to test over a Unix socket instead of TCP.
+Before the load runs, a client sends malformed lines, one of them longer than
+the server's stream limit, and must still get a reply afterwards; the run
+exits non-zero if the server dropped it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from constants import SIM_DT  # noqa: E402
+from headless import random_actions  # noqa: E402
+
+SERVER = os.path.join(os.path.dirname(__file__), "..", "src", "server.py")
+SESSION_COUNTS = (10, 50, 100, 200)
+OVER_LONG_LINE = b"x" * 2**17  # twice asyncio's default stream limit
+SECONDS = 5
+INPUT_INTERVAL = 0.1  # seconds between key changes sent by each client
+
+
+class LoadClient:
+    def __init__(self, number, reader, writer):
+        self.number = number
+        self.reader = reader
+        self.writer = writer
+        self.updates = 0
+        self.bytes = 0
+        self.stats = None  # set when a stats reply arrives
+
+    async def read(self):
+        async for line in self.reader:
+            if line.startswith(b'{"type":"stats"'):
+                self.stats = json.loads(line)
+            else:
+                self.updates += 1
+                self.bytes += len(line)
+
+    async def send_inputs(self, seconds):
+        actions = random_actions(random.Random(self.number), hold_steps=6)
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            self.writer.write(b'{"keys":%d}\n' % next(actions))
+            await asyncio.sleep(INPUT_INTERVAL)
+
+    async def request_stats(self, reset=False):
+        self.stats = None
+        flag = b"true" if reset else b"false"
+        self.writer.write(b'{"type":"stats","reset":%s}\n' % flag)
+        while self.stats is None:
+            await asyncio.sleep(0.01)
+        return self.stats
+
+
+async def connect(address):
+    if isinstance(address, str):
+        return await asyncio.open_unix_connection(address)
+    return await asyncio.open_connection(*address)
+
+
+async def run_load(address, sessions, seconds):
+    clients = []
+    for number in range(sessions):
+        reader, writer = await connect(address)
+        await reader.readline()  # hello
+        clients.append(LoadClient(number, reader, writer))
+    readers = [asyncio.create_task(client.read()) for client in clients]
+
+    await asyncio.sleep(0.5)  # let every session send its full state
+    await clients[0].request_stats(reset=True)
+    counts = sum(client.updates for client in clients)
+    sizes = sum(client.bytes for client in clients)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client.send_inputs(seconds) for client in clients))
+    stats = await clients[0].request_stats()
+    elapsed = time.perf_counter() - start
+    updates = sum(client.updates for client in clients) - counts
+    received = sum(client.bytes for client in clients) - sizes
+
+    for client in clients:
+        client.writer.close()
+    for task in readers:
+        task.cancel()
+    await asyncio.gather(*readers, return_exceptions=True)
+
+    stats["updates_per_s"] = updates / elapsed
+    stats["bytes_per_update"] = received / max(updates, 1)
+    return stats
+
+
+async def survives_bad_input(address):
+    """Whether a client is still served after sending malformed lines"""
+    reader, writer = await connect(address)
+    await reader.readline()  # hello
+    client = LoadClient(0, reader, writer)
+    reading = asyncio.create_task(client.read())
+    for line in (
+        b"not json",
+        b"5",
+        b'"x"',
+        b"[1]",
+        b'{"keys":"a"}',
+        b'{"keys":1.5}',
+        OVER_LONG_LINE,
+        b'{"keys":' + OVER_LONG_LINE + b"}",
+    ):
+        writer.write(line + b"\n")
+    try:
+        await asyncio.wait_for(client.request_stats(), timeout=5)
+        survived = True
+    except asyncio.TimeoutError:
+        survived = False
+    writer.close()
+    reading.cancel()
+    await asyncio.gather(reading, return_exceptions=True)
+    return survived
+
+
+def start_server(unix_path):
+    command = [sys.executable, SERVER]
+    command += ["--unix", unix_path] if unix_path else ["--port", "0"]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = server.stdout.readline()  # "listening on ('127.0.0.1', 12345)"
+    if unix_path:
+        return server, unix_path
+    host, port = line.split("(", 1)[1].rstrip(")\n").split(", ")
+    return server, (host.strip("'"), int(port))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sessions", type=int, nargs="*", default=SESSION_COUNTS)
+    parser.add_argument("--seconds", type=float, default=SECONDS)
+    parser.add_argument("--unix", action="store_true", help="use a Unix socket")
+    args = parser.parse_args()
+
+    budget_ms = SIM_DT * 1e3
+    with tempfile.TemporaryDirectory() as folder:
+        unix_path = os.path.join(folder, "server.sock") if args.unix else None
+        server, address = start_server(unix_path)
+        try:
+            survived = asyncio.run(survives_bad_input(address))
+            print(f"client kept after malformed input: {survived}")
+            print(
+                f"{'sessions':>8} {'p50 ms':>8} {'p99 ms':>8} {'late':>6}"
+                f" {'updates/s':>10} {'B/update':>9}"
+            )
+            fitting = 0
+            for sessions in args.sessions:
+                stats = asyncio.run(run_load(address, sessions, args.seconds))
+                print(
+                    f"{sessions:>8} {stats['tick_p50_ms']:>8.2f}"
+                    f" {stats['tick_p99_ms']:>8.2f} {stats['late_ticks']:>6}"
+                    f" {stats['updates_per_s']:>10,.0f}"
+                    f" {stats['bytes_per_update']:>9.0f}"
+                )
+                if stats["tick_p99_ms"] < budget_ms:
+                    fitting = max(fitting, sessions)
+                per_tick = stats["tick_p50_ms"] / sessions
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"tick budget {budget_ms:.1f} ms, p99 within it up to {fitting} sessions")
+    print(f"about {budget_ms / per_tick:,.0f} sessions per core at the p50 step cost")
+    if not survived:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
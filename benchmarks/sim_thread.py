@@ -0,0 +1,171 @@
+"""Stall the render loop and check the threaded simulation keeps its pace
+
+Run with ``python benchmarks/sim_thread.py [seconds]``. A scripted bot plays
+while the render loop draws as fast as it can and every half second stalls,
+alternately sleeping and burning CPU. Once with the simulation stepped from
+the render loop (main.py's default) and once on its own thread
+(``--threaded``). Every step must get the same dt and both runs must end in
+the same state as a plain headless run of the same inputs. The threaded run
+must also keep its pace through the stalls: no step more than MAX_STEP_GAP
+after the one before it, no time skipped, and the last step no further than
+that from where a perfectly paced run would put it. Any failure exits
+non-zero.
+"""
+
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIM_DT, MAX_FRAME_TIME  # noqa: E402
+from headless import random_actions  # noqa: E402
+from inputs import keys_from_mask  # noqa: E402
+from renderer import Renderer  # noqa: E402
+from session import GameSession  # noqa: E402
+from sim_thread import SimulationThread, InterpolatedView  # noqa: E402
+from utils import init_pygame, get_font  # noqa: E402
+
+SEED = 4
+SECONDS = 10
+STALL_EVERY = 0.5
+STALL = 0.15  # longer than nine steps, shorter than MAX_FRAME_TIME
+MAX_STEP_GAP = STALL / 2  # a stall must not hold up the simulation
+
+
+def scripted_masks(steps):
+    actions = random_actions(random.Random(SEED), hold_steps=30)
+    return [next(actions) for _ in range(steps)]
+
+
+def watch_steps(session):
+    """Record the dt and wall time of every step the session takes"""
+    dts = []
+    times = []
+    step = session.step
+
+    def watched(dt, keys):
+        dts.append(dt)
+        times.append(time.perf_counter())
+        step(dt, keys)
+
+    session.step = watched
+    return dts, times
+
+
+def stall(number):
+    if number % 2:
+        time.sleep(STALL)  # waiting on the GPU or a vsync
+    else:
+        end = time.perf_counter() + STALL  # a slow software draw
+        while time.perf_counter() < end:
+            pass
+
+
+class RenderLoop:
+    def __init__(self, screen, renderer):
+        self.screen = screen
+        self.renderer = renderer
+        self.frames = 0
+        self.stalls = 0
+        self.next_stall = time.perf_counter() + STALL_EVERY
+
+    def draw(self, session):
+        self.renderer.draw(session)
+        self.frames += 1
+        if time.perf_counter() >= self.next_stall:
+            stall(self.stalls)
+            self.stalls += 1
+            self.next_stall = time.perf_counter() + STALL_EVERY
+
+
+def run_lockstep(masks, loop):
+    session = GameSession(seed=SEED)
+    dts, times = watch_steps(session)
+    accumulator = 0.0
+    last = time.perf_counter()
+    while len(dts) < len(masks):
+        while accumulator >= SIM_DT and len(dts) < len(masks):
+            session.step(SIM_DT, keys_from_mask(masks[len(dts)]))
+            accumulator -= SIM_DT
+        loop.draw(session)
+        now = time.perf_counter()
+        accumulator += min(now - last, MAX_FRAME_TIME)
+        last = now
+    return session, dts, times, None
+
+
+def run_threaded(masks, loop):
+    session = GameSession(seed=SEED)
+    dts, times = watch_steps(session)
+    simulation = SimulationThread(
+        session, input_source=masks.__getitem__, max_steps=len(masks)
+    )
+    view = InterpolatedView(session)
+    simulation.start()
+    while simulation.is_alive():
+        loop.draw(view.update(simulation.frames, time.perf_counter()))
+    simulation.stop()
+    return session, dts, times, simulation.skipped_time
+
+
+def paced(times, skipped_time):
+    """Whether the steps kept SIM_DT apart through the stalls"""
+    largest_gap = max(b - a for a, b in zip(times, times[1:]))
+    drift = times[-1] - times[0] - (len(times) - 1) * SIM_DT
+    return (
+        skipped_time == 0
+        and largest_gap <= MAX_STEP_GAP
+        and abs(drift) <= MAX_STEP_GAP
+    )
+
+
+def report(name, session, dts, times, skipped_time, loop, elapsed, reference):
+    gaps = sorted(b - a for a, b in zip(times, times[1:]))
+    print(
+        f"{name:>10} {len(dts) / elapsed:>7.1f} {loop.frames / elapsed:>8.0f}"
+        f" {loop.stalls:>7} {gaps[len(gaps) // 2] * 1e3:>7.1f}"
+        f" {gaps[int(len(gaps) * 0.99)] * 1e3:>7.1f} {gaps[-1] * 1e3:>7.1f}"
+    )
+    constant = all(dt == SIM_DT for dt in dts)
+    same = session.state_hash() == reference
+    print(f"{'':>10} every step got dt = SIM_DT: {constant}")
+    print(f"{'':>10} same final state as a headless run: {same}")
+    if skipped_time is None:
+        return constant and same  # lockstep is expected to fall behind
+    steady = paced(times, skipped_time)
+    print(f"{'':>10} steps kept their pace through the stalls: {steady}")
+    return constant and same and steady
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else SECONDS
+    masks = scripted_masks(int(seconds / SIM_DT))
+
+    reference = GameSession(seed=SEED)
+    for mask in masks:
+        reference.step(SIM_DT, keys_from_mask(mask))
+    reference = reference.state_hash()
+
+    screen, _ = init_pygame(SCREEN_WIDTH, SCREEN_HEIGHT)
+    print(
+        f"{'':>10} {'steps/s':>7} {'frames/s':>8} {'stalls':>7}"
+        f" {'gap p50':>7} {'p99 ms':>7} {'max ms':>7}"
+    )
+    ok = True
+    for name, run in (("lockstep", run_lockstep), ("threaded", run_threaded)):
+        loop = RenderLoop(screen, Renderer(screen, get_font(48), get_font(36)))
+        start = time.perf_counter()
+        session, dts, times, skipped_time = run(masks, loop)
+        elapsed = time.perf_counter() - start
+        ok &= report(
+            name, session, dts, times, skipped_time, loop, elapsed, reference
+        )
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Time session snapshots and check rewinding then re-simulating is exact
+
+Run with ``python benchmarks/snapshots.py [steps]``. A key-mashing bot plays
+with the black hole pulling while every step is captured into a snapshot
+ring, on the built-in level, on a dense one and on a wide one whose chunks
+stream in and out of play. Every so often the session is
+rewound a random number of steps, which must give back the state hash it had
+then, and the same inputs are played again, which must arrive at the same
+state as the first time through.
+"""
+
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from constants import SCREEN_WIDTH, SIM_DT, GREEN  # noqa: E402
+from headless import random_actions  # noqa: E402
+from inputs import keys_from_mask  # noqa: E402
+from level_format import Level, encode_level  # noqa: E402
+from session import GameSession  # noqa: E402
+from snapshot import SnapshotRing  # noqa: E402
+
+STEPS = 5_000
+RING_CAPACITY = 120
+REWIND_EVERY = 50
+DENSE_PLATFORMS = 500
+WIDE_SCREENS = 20
+
+
+def dense_level(count, seed=0):
+    rng = random.Random(seed)
+    platforms = [(0, 650, SCREEN_WIDTH, 70, GREEN)]
+    for _ in range(count - 1):
+        platforms.append(
+            (
+                rng.randrange(SCREEN_WIDTH),
+                rng.randrange(100, 600),
+                rng.randint(40, 200),
+                20,
+                GREEN,
+            )
+        )
+    return Level(encode_level(platforms, [(400, 650, 250, 70)], [(320, 360)]))
+
+
+def wide_level(screens, per_screen=20, seed=0):
+    rng = random.Random(seed)
+    platforms = []
+    for screen in range(screens):
+        left = screen * SCREEN_WIDTH
+        platforms.append((left, 650, SCREEN_WIDTH - 100, 70, GREEN))
+        for _ in range(per_screen - 1):
+            platforms.append(
+                (
+                    left + rng.randrange(SCREEN_WIDTH),
+                    rng.randrange(100, 600),
+                    rng.randint(40, 200),
+                    20,
+                    GREEN,
+                )
+            )
+    return Level(encode_level(platforms, [(400, 650, 250, 70)], [(320, 360)]))
+
+
+def run(level, steps):
+    session = GameSession(seed=5, level=level)
+    ring = SnapshotRing(session, RING_CAPACITY)
+    rng = random.Random(5)
+    actions = random_actions(rng, hold_steps=20)
+    masks = []  # every step's keys, trimmed back on a rewind
+    hashes = []  # state hash after each step
+    capture_ns = []
+    restore_ns = []
+    exact = replayed = True
+
+    while len(masks) < steps:
+        mask = next(actions)
+        session.black_hole.active = True  # keep the pull on after respawns
+        session.step(SIM_DT, keys_from_mask(mask))
+        masks.append(mask)
+        hashes.append(session.state_hash())
+        start = time.perf_counter_ns()
+        ring.capture()
+        capture_ns.append(time.perf_counter_ns() - start)
+
+        if len(masks) % REWIND_EVERY == 0:
+            back = rng.randrange(len(ring))
+            start = time.perf_counter_ns()
+            ring.rewind(back)
+            restore_ns.append(time.perf_counter_ns() - start)
+            done = len(masks) - back
+            exact &= session.state_hash() == hashes[done - 1]
+
+            # Play the rewound steps again, they must land where they did
+            for i in range(done, len(masks)):
+                session.black_hole.active = True
+                session.step(SIM_DT, keys_from_mask(masks[i]))
+                ring.capture()
+                replayed &= session.state_hash() == hashes[i]
+
+    sizes = [slot.size for slot in ring.slots]
+    return {
+        "platforms": level.platform_count,
+        "capture_us": sum(capture_ns) / len(capture_ns) / 1e3,
+        "capture_p99_us": sorted(capture_ns)[int(len(capture_ns) * 0.99)] / 1e3,
+        "restore_us": sum(restore_ns) / len(restore_ns) / 1e3,
+        "bytes": sum(sizes) / len(sizes),
+        "ring_bytes": sum(len(slot.buffer) for slot in ring.slots),
+        "exact": exact,
+        "replayed": replayed,
+    }
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else STEPS
+    levels = {
+        "built-in": GameSession().level,
+        f"{DENSE_PLATFORMS} platforms": dense_level(DENSE_PLATFORMS),
+        f"{WIDE_SCREENS} screens": wide_level(WIDE_SCREENS),
+    }
+    print(
+        f"{'level':>14} {'capture us':>10} {'p99 us':>7} {'restore us':>10}"
+        f" {'B/snapshot':>10} {'ring KB':>8}"
+    )
+    ok = True
+    for name, level in levels.items():
+        result = run(level, steps)
+        print(
+            f"{name:>14} {result['capture_us']:>10.1f}"
+            f" {result['capture_p99_us']:>7.1f} {result['restore_us']:>10.1f}"
+            f" {result['bytes']:>10,.0f} {result['ring_bytes'] / 1024:>8,.0f}"
+        )
+        print(f"{'':>14} rewinds restore the captured state: {result['exact']}")
+        print(f"{'':>14} re-simulating gives the same states: {result['replayed']}")
+        ok &= result["exact"] and result["replayed"]
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare Player.update against a plain platform list and a SpatialHash
+
+Run with ``python benchmarks/spatial_hash.py``. Levels are scattered over a
+world that grows with the platform count so density matches the default level.
+Below LINEAR_SCAN_THRESHOLD platforms the player scans the list even when given
+an index, so the smallest level runs at the same speed either way.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIM_DT  # noqa: E402
+from entities import Player, Platform  # noqa: E402
+from inputs import keys_from_mask, KEY_RIGHT  # noqa: E402
+from spatial_hash import SpatialHash  # noqa: E402
+
+SIZES = (10, 1_000, 50_000)
+STEPS = 2_000
+
+
+def make_level(count, rng):
+    scale = max(1, int((count / 7) ** 0.5))
+    width, height = SCREEN_WIDTH * scale, SCREEN_HEIGHT * scale
+    platforms = [Platform(0, height - 70, width, 70)]
+    for _ in range(count - 1):
+        platforms.append(
+            Platform(
+                rng.randrange(width),
+                rng.randrange(height),
+                rng.randint(100, 300),
+                20,
+            )
+        )
+    return platforms, width, height
+
+
+def time_player(platforms, width, height, platform_index):
+    player = Player(width, height)
+    keys = keys_from_mask(KEY_RIGHT)
+    start = time.perf_counter()
+    for _ in range(STEPS):
+        player.update(SIM_DT, keys, platforms, width, height, platform_index)
+    return (time.perf_counter() - start) / STEPS
+
+
+def time_index_updates(platforms):
+    # Nudge every platform like the black hole does and re-index it
+    platform_index = SpatialHash(platforms)
+    start = time.perf_counter()
+    for platform in platforms:
+        platform.rect.x += 3
+        platform_index.update(platform)
+    return (time.perf_counter() - start) / len(platforms)
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'platforms':>10} {'linear us':>10} {'hashed us':>10} {'speedup':>8}")
+    for count in SIZES:
+        platforms, width, height = make_level(count, rng)
+        linear = time_player(platforms, width, height, None)
+        hashed = time_player(platforms, width, height, SpatialHash(platforms))
+        print(
+            f"{count:>10} {linear * 1e6:>10.1f} {hashed * 1e6:>10.1f}"
+            f" {linear / hashed:>7.1f}x"
+        )
+    per_update = time_index_updates(platforms)
+    print(f"incremental re-index: {per_update * 1e9:.0f} ns per moved platform")
+
+
+if __name__ == "__main__":
+    main()
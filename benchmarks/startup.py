@@ -0,0 +1,98 @@
+"""Startup benchmark: import-time breakdown and time to first frame
+
+Run with ``python benchmarks/startup.py``. Each measurement runs in a fresh
+interpreter and the best of --runs is kept. Exits with status 1 when importing
+main or drawing the first frame goes over its budget, so it can gate CI.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+ENV = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+
+
+def import_times():
+    """Return [(module, self_us, cumulative_us, depth)] for `import main`
+
+    Entries are in -X importtime order: every module is listed after the
+    modules it imported, and interpreter startup comes before main.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=SRC_DIR,
+        env=ENV,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        times.append((name.strip(), int(self_us), int(cumulative_us), depth))
+
+    # Drop the interpreter's own startup imports
+    start = max(i for i, entry in enumerate(times) if entry[0] == "main")
+    while start > 0 and times[start - 1][3] > 0:
+        start -= 1
+    return times[start:]
+
+
+def main_import_us(times):
+    return next(entry[2] for entry in times if entry[0] == "main")
+
+
+def time_to_first_frame():
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "main.py", "--frames", "1"],
+        cwd=SRC_DIR,
+        env=ENV,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=500)
+    parser.add_argument("--max-first-frame-ms", type=float, default=1500)
+    args = parser.parse_args()
+
+    runs = [import_times() for _ in range(args.runs)]
+    best = min(runs, key=main_import_us)
+    import_ms = main_import_us(best) / 1000
+
+    print("direct imports of main (cumulative ms):")
+    direct = sorted((e for e in best if e[3] == 1), key=lambda e: -e[2])
+    for name, _, cumulative_us, _ in direct[: args.top]:
+        print(f"  {cumulative_us / 1000:8.1f}  {name}")
+
+    print("slowest modules (self ms):")
+    for name, self_us, _, _ in sorted(best, key=lambda e: -e[1])[: args.top]:
+        print(f"  {self_us / 1000:8.1f}  {name}")
+
+    first_frame_ms = min(time_to_first_frame() for _ in range(args.runs)) * 1000
+    print(f"import main:         {import_ms:8.1f} ms (budget {args.max_import_ms:g})")
+    print(
+        f"time to first frame: {first_frame_ms:8.1f} ms"
+        f" (budget {args.max_first_frame_ms:g})"
+    )
+
+    if import_ms > args.max_import_ms or first_frame_ms > args.max_first_frame_ms:
+        print("startup regression: over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compare drawing big levels with and without the cached static layer
+
+Run with ``python benchmarks/static_layer.py [frames]``. Levels ten screens
+wide with more and more platforms per screen are drawn by the full-repaint
+renderer, the dirty-rect renderer and the layered renderer while the player
+stands still, is carried along (so the camera scrolls) and is pulled by the
+black hole (so platforms move). Reports the frame time and how many fills,
+blits and draws went on the background, platforms and fire pit base per
+frame, and checks each final frame is pixel-identical to the full repaint's.
+"""
+
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pygame  # noqa: E402
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIM_DT, GREEN, BLUE  # noqa: E402
+from inputs import keys_from_mask  # noqa: E402
+from level_format import Level, encode_level  # noqa: E402
+from renderer import Renderer, DirtyRectRenderer, LayeredRenderer  # noqa: E402
+from session import GameSession  # noqa: E402
+from utils import init_pygame, get_font  # noqa: E402
+
+FRAMES = 300
+CARRY_SPEED = 4  # px the player is carried each frame, a bit under a run
+SCREENS = 10
+PLATFORMS_PER_SCREEN = (50, 500, 2_000)
+RENDERERS = {
+    "full": Renderer,
+    "dirty": DirtyRectRenderer,
+    "layered": LayeredRenderer,
+}
+
+
+def make_level(per_screen, seed=0):
+    rng = random.Random(seed)
+    platforms = []
+    for screen in range(SCREENS):
+        left = screen * SCREEN_WIDTH
+        platforms.append((left, 650, SCREEN_WIDTH, 70, GREEN))  # ground
+        for _ in range(per_screen - 1):
+            platforms.append(
+                (
+                    left + rng.randrange(SCREEN_WIDTH),
+                    rng.randrange(100, 600),
+                    rng.randint(20, 120),
+                    10,
+                    rng.choice((GREEN, BLUE)),
+                )
+            )
+    return Level(encode_level(platforms, [(400, 630, 250, 20)], [(320, 560)]))
+
+
+def run(renderer_class, level, scenario, frames, screen):
+    renderer = renderer_class(screen, get_font(48), get_font(36))
+    session = GameSession(seed=3, level=level)
+    keys = keys_from_mask(0)
+    draw_time = 0.0
+    calls = 0
+    for _ in range(frames):
+        if scenario == "black hole":
+            session.black_hole.active = True
+        elif scenario == "scrolling":
+            session.player.pos.update(session.player.pos.x + CARRY_SPEED, 300)
+            session.player.vel.update(0, 0)
+        session.step(SIM_DT, keys)
+        start = time.perf_counter()
+        renderer.draw(session)
+        renderer.present()
+        draw_time += time.perf_counter() - start
+        calls += renderer.static_draw_calls
+    pixels = pygame.image.tobytes(screen, "RGB")
+    return draw_time / frames * 1e3, calls / frames, pixels
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else FRAMES
+    screen, _ = init_pygame(SCREEN_WIDTH, SCREEN_HEIGHT)
+    header = "".join(f" {name + ' ms':>10} {'calls':>7}" for name in RENDERERS)
+    print(f"{'platforms':>9} {'scenario':>10}{header}")
+    identical = True
+    for per_screen in PLATFORMS_PER_SCREEN:
+        level = make_level(per_screen)
+        for scenario in ("idle", "scrolling", "black hole"):
+            row = f"{per_screen:>9} {scenario:>10}"
+            reference = None
+            for renderer_class in RENDERERS.values():
+                ms, calls, pixels = run(renderer_class, level, scenario, frames, screen)
+                reference = reference or pixels
+                identical &= pixels == reference
+                row += f" {ms:>10.2f} {calls:>7.0f}"
+            print(row)
+    print(f"identical final frames: {identical}")
+    pygame.quit()
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""Scripted scenario benchmarks for the simulation and the draw path
+
+Run with ``python benchmarks/suite.py``. Every scenario steps a seeded session
+headless for a fixed number of frames with scripted inputs and draws each frame
+to an offscreen surface. Reported per scenario:
+
+- step_ns: mean time of GameSession.step
+- draw_ns: mean time of Renderer.draw
+- alloc_bytes: mean peak memory allocated during one step plus draw, measured
+  in a separate tracemalloc pass so it does not skew the timings
+- net_blocks: memory blocks still held after the run, per frame (leak check)
+
+Pass --output to save the results as JSON and --baseline to compare against a
+saved run; the exit status is 1 when any scenario is slower or allocates more
+than the baseline by more than --tolerance.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform as platform_module
+import random
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pygame  # noqa: E402
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIM_DT  # noqa: E402
+from entities import FirePit, Platform  # noqa: E402
+from entities import black_hole as black_hole_module  # noqa: E402
+from headless import random_actions  # noqa: E402
+from inputs import keys_from_mask  # noqa: E402
+from renderer import Renderer  # noqa: E402
+from session import GameSession  # noqa: E402
+from spatial_hash import SpatialHash  # noqa: E402
+from utils import get_font  # noqa: E402
+
+FRAMES = 600
+WARMUP_FRAMES = 60
+SEED = 0
+
+# Allocation regressions below this many bytes per frame are noise
+ALLOC_SLACK_BYTES = 256
+
+
+class Scenario:
+    """A named level setup plus optional work done before every step
+
+    setup(session, rng) runs after every level reset so respawns restore the
+    scenario, and tick(session) runs before each step to keep the load steady
+    (its cost is part of step_ns). scripted says whether the bot mashes keys.
+    """
+
+    def __init__(self, name, description, setup=None, tick=None, scripted=True):
+        self.name = name
+        self.description = description
+        self.setup = setup
+        self.tick = tick
+        self.scripted = scripted
+
+
+class ScenarioSession(GameSession):
+    def __init__(self, scenario, seed):
+        self.scenario = scenario
+        super().__init__(seed=seed)
+
+    def reset_level(self):
+        super().reset_level()
+        if self.scenario.setup is not None:
+            self.scenario.setup(self, random.Random(self.seed))
+
+
+def set_platforms(session, platforms):
+    session.platforms = platforms
+    session.platform_index = SpatialHash(platforms)
+
+
+def setup_many_platforms(session, rng):
+    # Ledges scattered over the screen on top of the default level
+    platforms = session.platforms
+    while len(platforms) < 1_000:
+        platforms.append(
+            Platform(
+                rng.randrange(0, SCREEN_WIDTH - 40),
+                rng.randrange(0, SCREEN_HEIGHT - 10),
+                rng.randint(40, 120),
+                10,
+            )
+        )
+    set_platforms(session, platforms)
+
+
+LIGHTNING_STRIKES = 500
+
+
+def tick_lightning(session):
+    # Keep the sky full, always striking away from the player so it survives
+    game_state = session.game_state
+    strikes = game_state.lightning_strikes
+    rng = session.rng
+    player_x = session.player.pos.x
+    while len(strikes) < LIGHTNING_STRIKES:
+        x = (player_x + rng.randint(150, SCREEN_WIDTH - 150)) % SCREEN_WIDTH
+        y = rng.randint(0, SCREEN_HEIGHT)
+        game_state.add_lightning(game_state.lightning_pool.acquire(x, y))
+
+
+CRUSHED_PLATFORMS = 100
+
+
+def setup_black_hole(session, rng):
+    black_hole = session.black_hole
+    black_hole.active = True
+    black_hole.radius = black_hole.max_radius
+    black_hole.attraction_force = black_hole.max_attraction
+    set_platforms(session, list(session.platforms))
+
+
+def tick_black_hole(session):
+    # Pin the player out of reach so the hole never stops updating, and drop
+    # in a fresh ring of debris once the last batch has been crushed
+    player = session.player
+    player.pos.update(player.size, SCREEN_HEIGHT - 100)
+    player.vel.update(0, 0)
+
+    if session.black_hole.crushing_entities or len(session.platforms) > 7:
+        return
+    center = session.black_hole.pos
+    debris = []
+    for i in range(CRUSHED_PLATFORMS):
+        angle = 2 * math.pi * i / CRUSHED_PLATFORMS
+        x = center.x + 60 * math.cos(angle)
+        y = center.y + 60 * math.sin(angle)
+        debris.append(Platform(int(x) - 10, int(y) - 5, 20, 10))
+    session.platforms.extend(debris)
+    for platform in debris:
+        session.platform_index.insert(platform)
+
+
+def setup_wide_fire_pit(session, rng):
+    default = session.fire_pit.rect
+    session.fire_pit = FirePit(
+        default.x, default.y, default.width * 10, default.height, session.clock
+    )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("default", "the shipped level with a key-mashing bot"),
+        Scenario("platforms_1k", "1,000 platforms", setup=setup_many_platforms),
+        Scenario(
+            "lightning_500",
+            f"{LIGHTNING_STRIKES} concurrent lightning strikes",
+            tick=tick_lightning,
+            scripted=False,
+        ),
+        Scenario(
+            "black_hole_crush",
+            f"a fully grown black hole crushing {CRUSHED_PLATFORMS} platforms",
+            setup=setup_black_hole,
+            tick=tick_black_hole,
+            scripted=False,
+        ),
+        Scenario(
+            "fire_pit_wide",
+            "a fire pit ten times the default width",
+            setup=setup_wide_fire_pit,
+        ),
+    )
+}
+
+
+class ScenarioRun:
+    """One fresh session, renderer and input script for a scenario"""
+
+    def __init__(self, scenario, frames, seed, renderer):
+        self.scenario = scenario
+        self.session = ScenarioSession(scenario, seed)
+        self.renderer = renderer
+        # Inputs are built up front so the bot's RNG stays out of the timings
+        frames += WARMUP_FRAMES
+        if scenario.scripted:
+            actions = random_actions(random.Random(seed))
+            self.keys = [keys_from_mask(next(actions)) for _ in range(frames)]
+        else:
+            self.keys = [keys_from_mask(0)] * frames
+        self.frame = 0
+
+    def step(self):
+        if self.scenario.tick is not None:
+            self.scenario.tick(self.session)
+        self.session.step(SIM_DT, self.keys[self.frame])
+        self.frame += 1
+
+    def draw(self):
+        self.renderer.draw(self.session)
+
+
+def time_scenario(scenario, frames, seed, renderer):
+    run = ScenarioRun(scenario, frames, seed, renderer)
+    for _ in range(WARMUP_FRAMES):
+        run.step()
+        run.draw()
+
+    step_ns = draw_ns = 0
+    clock = time.perf_counter_ns
+    for _ in range(frames):
+        start = clock()
+        run.step()
+        middle = clock()
+        run.draw()
+        end = clock()
+        step_ns += middle - start
+        draw_ns += end - middle
+    return run, step_ns / frames, draw_ns / frames
+
+
+def measure_allocations(scenario, frames, seed, renderer):
+    run = ScenarioRun(scenario, frames, seed, renderer)
+    for _ in range(WARMUP_FRAMES):
+        run.step()
+        run.draw()
+
+    tracemalloc.start()
+    peak_bytes = 0
+    blocks_before = sys.getallocatedblocks()
+    for _ in range(frames):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run.step()
+        run.draw()
+        _, peak = tracemalloc.get_traced_memory()
+        peak_bytes += peak - before
+    blocks_after = sys.getallocatedblocks()
+    tracemalloc.stop()
+    return peak_bytes / frames, (blocks_after - blocks_before) / frames
+
+
+def run_suite(names, frames, seed):
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    renderer = Renderer(screen, get_font(48), get_font(36))
+    results = {}
+    for name in names:
+        scenario = SCENARIOS[name]
+        run, step_ns, draw_ns = time_scenario(scenario, frames, seed, renderer)
+        alloc_bytes, net_blocks = measure_allocations(scenario, frames, seed, renderer)
+        session = run.session
+        results[name] = {
+            "description": scenario.description,
+            "step_ns": round(step_ns),
+            "draw_ns": round(draw_ns),
+            "alloc_bytes": round(alloc_bytes, 1),
+            "net_blocks": round(net_blocks, 3),
+            "platforms": len(session.platforms),
+            "lightning_high_water": session.game_state.lightning_pool.high_water,
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return one message per metric that regressed against the baseline"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in ("step_ns", "draw_ns", "alloc_bytes"):
+            limit = previous[metric] * (1 + tolerance)
+            if metric == "alloc_bytes":
+                limit = max(limit, previous[metric] + ALLOC_SLACK_BYTES)
+            if result[metric] > limit:
+                regressions.append(
+                    f"{name}.{metric}: {result[metric]:,.0f}"
+                    f" > {previous[metric]:,.0f} (+{tolerance:.0%})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="run only this scenario (repeatable)",
+    )
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    pygame.display.init()
+    pygame.font.init()
+    results = run_suite(args.scenario or list(SCENARIOS), args.frames, args.seed)
+
+    print(
+        f"{'scenario':<18} {'step us':>9} {'draw us':>9} {'alloc B':>9}"
+        f" {'net blk':>8}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<18} {result['step_ns'] / 1e3:>9.1f}"
+            f" {result['draw_ns'] / 1e3:>9.1f} {result['alloc_bytes']:>9.0f}"
+            f" {result['net_blocks']:>8.2f}"
+        )
+
+    if args.output:
+        report = {
+            "frames": args.frames,
+            "seed": args.seed,
+            "python": platform_module.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": black_hole_module.np is not None,
+            "scenarios": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["scenarios"]
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Fire the player at a 20px platform at low simulation rates and fast speeds
+
+Run with ``python benchmarks/tunneling.py``. The player is dropped onto a
+platform, or flung up into one as the black hole's pull would, at 60, 30, 20
+and 10 steps a second and a range of speeds; every run must stop at the
+platform instead of passing through it. It also reports how fast headless
+play runs at each rate, which is what running at a lower rate buys.
+"""
+
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pygame  # noqa: E402
+from entities import Platform, Player  # noqa: E402
+from headless import random_actions  # noqa: E402
+from inputs import keys_from_mask  # noqa: E402
+from session import GameSession  # noqa: E402
+
+RATES = (60, 30, 20, 10)
+DROP_SPEEDS = (0, 2_000, 4_000, 8_000)  # px/s downwards at the start
+FLING_SPEEDS = (1_000, 4_000, 8_000)  # px/s upwards at the start
+WORLD_WIDTH = 1280
+WORLD_HEIGHT = 4_000
+PLATFORM = (400, 2_000, 400, 20)
+SECONDS = 2
+BOT_SECONDS = 120
+
+
+def fire(rate, speed, upwards):
+    """Return whether the player was stopped by the platform"""
+    platform = Platform(*PLATFORM)
+    rect = platform.rect
+    player = Player(WORLD_WIDTH, WORLD_HEIGHT)
+    if upwards:
+        player.pos.update(rect.centerx, rect.bottom + 200)
+        player.vel.y = -speed
+    else:
+        player.pos.update(rect.centerx, rect.top - 600)
+        player.vel.y = speed
+    keys = keys_from_mask(0)
+    dt = 1 / rate
+    for _ in range(int(SECONDS * rate)):
+        player.update(dt, keys, [platform], WORLD_WIDTH, WORLD_HEIGHT)
+        if upwards and player.pos.y < rect.top:
+            return False
+        if not upwards and player.pos.y > rect.bottom:
+            return False
+    if upwards:
+        return True
+    # Resting players sink a fraction of a pixel every other step
+    return abs(player.pos.y - (rect.top - player.size)) < 1
+
+
+def bot_speed(rate):
+    """Simulated seconds per wall-clock second of a key-mashing bot"""
+    session = GameSession(seed=1)
+    actions = random_actions(random.Random(1), hold_steps=max(rate // 10, 1))
+    dt = 1 / rate
+    steps = BOT_SECONDS * rate
+    start = time.perf_counter()
+    for _ in range(steps):
+        session.step(dt, keys_from_mask(next(actions)))
+    return BOT_SECONDS / (time.perf_counter() - start)
+
+
+def main():
+    pygame.init()
+    print(f"{'rate Hz':>8} {'drops':>7} {'flings':>7} {'sim s / s':>10}")
+    failures = 0
+    for rate in RATES:
+        drops = sum(fire(rate, speed, False) for speed in DROP_SPEEDS)
+        flings = sum(fire(rate, speed, True) for speed in FLING_SPEEDS)
+        failures += len(DROP_SPEEDS) - drops + len(FLING_SPEEDS) - flings
+        print(
+            f"{rate:>8} {drops:>3}/{len(DROP_SPEEDS):<3} "
+            f"{flings:>3}/{len(FLING_SPEEDS):<3} {bot_speed(rate):>10,.0f}"
+        )
+    print(f"runs that passed through the platform: {failures}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
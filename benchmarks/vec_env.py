@@ -0,0 +1,123 @@
+"""Step VecGameEnv and check it against sessions played one at a time
+
+Run with ``python benchmarks/vec_env.py [num_envs] [steps]``. The same
+actions are fed to a VecGameEnv with autoreset and to plain GameSessions
+that are each played alone from start to finish, restarting on death the
+way autoreset does, once as the game plays and once with every black hole
+kept pulling. With NumPy the env pulls all the envs' platforms in one batch
+while the sessions alone take the per-platform path, so the two share no
+code for it. Every step's observations, done flags and death causes, and
+the final state hashes, must match; any difference exits non-zero. The
+env-steps per second of VecGameEnv and of a hand-written loop over
+GameSession.step are reported side by side.
+"""
+
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from constants import SIM_DT  # noqa: E402
+from headless import random_actions  # noqa: E402
+from inputs import keys_from_mask  # noqa: E402
+from session import GameSession  # noqa: E402
+from vec_env import VecGameEnv  # noqa: E402
+from entities import black_hole as black_hole_module  # noqa: E402
+
+
+def action_log(num_envs, steps, seed):
+    policies = [random_actions(random.Random(seed + i)) for i in range(num_envs)]
+    return [[next(policy) for policy in policies] for _ in range(steps)]
+
+
+def run_vectorized(num_envs, actions, seed, pulling):
+    """Per-env trajectories of (observation, done, death cause)"""
+    env = VecGameEnv(num_envs, seed=seed)
+    trajectories = [[] for _ in range(num_envs)]
+    start = time.perf_counter()
+    for step_actions in actions:
+        if pulling:
+            for session in env.sessions:
+                session.black_hole.active = True  # again after autoresets
+        observations, dones, death_causes = env.step(step_actions)
+        for i, trajectory in enumerate(trajectories):
+            trajectory.append((observations[i], dones[i], death_causes[i]))
+    elapsed = time.perf_counter() - start
+    return elapsed, trajectories, [session.state_hash() for session in env.sessions]
+
+
+def play_alone(seed, actions, pulling):
+    """One session played on its own, restarted on death like autoreset"""
+    session = GameSession(seed=seed)
+    trajectory = []
+    for action in actions:
+        if pulling:
+            session.black_hole.active = True
+        death_cause = session.step(SIM_DT, keys_from_mask(action))
+        trajectory.append(
+            (session.observation(), death_cause is not None, death_cause)
+        )
+        if death_cause is not None:
+            session.restart()
+    return trajectory, session.state_hash()
+
+
+def hand_loop(num_envs, actions, seed, pulling):
+    """What stepping the sessions by hand costs, for comparison"""
+    sessions = [GameSession(seed=seed + i) for i in range(num_envs)]
+    start = time.perf_counter()
+    for step_actions in actions:
+        for session, action in zip(sessions, step_actions):
+            if pulling:
+                session.black_hole.active = True
+            if session.step(SIM_DT, keys_from_mask(action)) is not None:
+                session.restart()
+            session.observation()
+    return time.perf_counter() - start
+
+
+def main():
+    num_envs = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    seed = 1234
+
+    actions = action_log(num_envs, steps, seed)
+    env_steps = num_envs * steps
+    batched = "yes" if black_hole_module.np is not None else "no (no numpy)"
+    print(f"{num_envs} envs x {steps} steps, platform pull batched: {batched}")
+    print(
+        f"{'':>12} {'deaths':>7} {'VecGameEnv/s':>13} {'hand loop/s':>12}"
+        f" {'matches alone':>14}"
+    )
+    failed = False
+    for pulling in (False, True):
+        elapsed, vectorized, vectorized_hashes = run_vectorized(
+            num_envs, actions, seed, pulling
+        )
+        looped = hand_loop(num_envs, actions, seed, pulling)
+        mismatched = []
+        deaths = 0
+        for i in range(num_envs):
+            alone, state_hash = play_alone(
+                seed + i, [step[i] for step in actions], pulling
+            )
+            deaths += sum(done for _, done, _ in alone)
+            if alone != vectorized[i] or state_hash != vectorized_hashes[i]:
+                mismatched.append(i)
+        name = "black hole" if pulling else "as played"
+        print(
+            f"{name:>12} {deaths:>7} {env_steps / elapsed:>13,.0f}"
+            f" {env_steps / looped:>12,.0f} {not mismatched!s:>14}"
+        )
+        if mismatched:
+            print(f"mismatched envs: {mismatched}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Sweep the camera across a 100-screen level, streamed chunks vs the whole world
+
+Run with ``python benchmarks/world_streaming.py [platforms_per_screen]``. The
+player is carried from one end of the level to the other, far faster than it
+can run, while the session steps and draws every frame, once with the black
+hole idle and once with it pulling. The streamed runs only keep the chunks
+near the view and the black hole live and stay under a small platform budget;
+the others make the whole level one chunk. Final frames of the idle runs are
+checked to be pixel-identical. It also checks that a platform the black hole
+is crushing can have its chunk unloaded mid-crush without breaking the step.
+"""
+
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import pygame  # noqa: E402
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIM_DT, GREEN  # noqa: E402
+from inputs import keys_from_mask  # noqa: E402
+from level_format import Level, encode_level  # noqa: E402
+from renderer import Renderer  # noqa: E402
+from session import GameSession  # noqa: E402
+from utils import init_pygame, get_font  # noqa: E402
+from world import ChunkedWorld  # noqa: E402
+
+SCREENS = 100
+STEPS = 2_000
+LOADED_PLATFORMS_BUDGET = 2_000
+
+
+def make_level(per_screen, seed=0):
+    rng = random.Random(seed)
+    platforms = []
+    for screen in range(SCREENS):
+        left = screen * SCREEN_WIDTH
+        platforms.append((left, 650, SCREEN_WIDTH - 100, 70, GREEN))  # ground
+        for _ in range(per_screen - 1):
+            platforms.append(
+                (
+                    left + rng.randrange(SCREEN_WIDTH),
+                    rng.randrange(100, 600),
+                    rng.randint(40, 200),
+                    20,
+                    GREEN,
+                )
+            )
+    return encode_level(platforms, [(400, 650, 250, 70)], [(320, 360)])
+
+
+def run(level, streamed, black_hole, screen, renderer):
+    session = GameSession(seed=0, level=level)
+    if not streamed:
+        session.world = ChunkedWorld(level, chunk_width=session.world_width)
+        session.reset_level()
+    else:
+        session.world.max_loaded_platforms = LOADED_PLATFORMS_BUDGET
+
+    keys = keys_from_mask(0)
+    player = session.player
+    travel = (session.world_width - SCREEN_WIDTH) / STEPS
+    peak_loaded = active_total = 0
+    step_time = draw_time = 0.0
+    for i in range(STEPS):
+        # Carry the player along above the ground
+        player.pos.update(SCREEN_WIDTH / 2 + i * travel, 300)
+        player.vel.update(0, 0)
+        session.black_hole.active = black_hole
+
+        start = time.perf_counter()
+        session.step(SIM_DT, keys)
+        middle = time.perf_counter()
+        renderer.draw(session)
+        draw_time += time.perf_counter() - middle
+        step_time += middle - start
+
+        peak_loaded = max(peak_loaded, session.world.loaded_platforms)
+        active_total += len(session.platforms)
+
+    return {
+        "step_ms": step_time / STEPS * 1e3,
+        "draw_ms": draw_time / STEPS * 1e3,
+        "active": active_total / STEPS,
+        "peak_loaded": peak_loaded,
+        "loads": session.world.loads,
+        "evictions": session.world.evictions,
+        "pixels": pygame.image.tobytes(screen, "RGB"),
+    }
+
+
+def crush_then_unload():
+    """Whether a platform dropped mid-crush leaves the black hole alone"""
+    ground = [(s * SCREEN_WIDTH, 650, SCREEN_WIDTH, 70, GREEN) for s in range(20)]
+    far_platform = (6 * SCREEN_WIDTH + 100, 400, 200, 20, GREEN)
+    level = Level(
+        encode_level(ground + [far_platform], [(400, 650, 250, 70)], [(320, 360)])
+    )
+    session = GameSession(seed=0, level=level)
+    keys = keys_from_mask(0)
+    player = session.player
+    black_hole = session.black_hole
+
+    # Stream the platform in, start crushing it, then leave its chunk behind
+    player.pos.update(far_platform[0] + 100, 300)
+    black_hole.active = True
+    session.step(SIM_DT, keys)
+    platform = next(p for p in session.platforms if tuple(p.rect) == far_platform[:4])
+    black_hole._start_crushing(platform, "platform", platform.rect.width)
+    player.pos.update(15 * SCREEN_WIDTH, 300)
+    try:
+        for _ in range(10):
+            player.vel.update(0, 0)
+            session.step(SIM_DT, keys)
+    except KeyError:
+        return False
+    return platform not in black_hole.crushing_entities
+
+
+def main():
+    per_screen = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    level = Level(make_level(per_screen))
+    screen, _ = init_pygame(SCREEN_WIDTH, SCREEN_HEIGHT)
+    renderer = Renderer(screen, get_font(48), get_font(36))
+
+    print(
+        f"{SCREENS} screens, {level.platform_count:,} platforms,"
+        f" {STEPS} steps, budget {LOADED_PLATFORMS_BUDGET:,} loaded platforms"
+    )
+    print(
+        f"{'':>20} {'step ms':>8} {'draw ms':>8} {'active':>8}"
+        f" {'peak loaded':>12} {'loads':>6} {'evictions':>10}"
+    )
+    results = {}
+    for black_hole in (False, True):
+        for streamed in (True, False):
+            name = ("streamed" if streamed else "whole") + (
+                " + black hole" if black_hole else ""
+            )
+            result = run(level, streamed, black_hole, screen, renderer)
+            results[name] = result
+            print(
+                f"{name:>20} {result['step_ms']:>8.3f} {result['draw_ms']:>8.3f}"
+                f" {result['active']:>8.0f} {result['peak_loaded']:>12,}"
+                f" {result['loads']:>6} {result['evictions']:>10}"
+            )
+    same = results["streamed"]["pixels"] == results["whole"]["pixels"]
+    print(f"identical final frame: {same}")
+    crush_survived = crush_then_unload()
+    print(f"unloading a platform mid-crush is handled: {crush_survived}")
+    pygame.quit()
+    if not (same and crush_survived):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import warnings
+import pygame
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ASSETS_DIR = os.path.join(ROOT_DIR, "assets")
+CACHE_DIR = os.path.join(ROOT_DIR, ".cache", "assets")
+
+ATLAS_MAX_WIDTH = 4096
+ATLAS_VERSION = 1  # bump when the packing or cache layout changes
+
+
+def _sprite_name(path, assets_dir):
+    # "assets/Boosts/powerup.png" -> "Boosts/powerup"
+    relative = os.path.relpath(path, assets_dir)
+    return os.path.splitext(relative)[0].replace(os.sep, "/")
+
+
+def _trim(image):
+    """Return the part of image that differs from its border color
+
+    Sprites like the gwon frames are mostly flat background, so only the
+    content goes into the atlas and the border is filled back in on load.
+    """
+    fill = tuple(image.get_at((0, 0)))
+    alpha = fill[3]
+
+    # from_threshold only compares RGB, so also require the same alpha
+    background = pygame.mask.from_threshold(image, fill, (1, 1, 1, 1))
+    same_alpha = pygame.mask.Mask(image.get_size(), fill=True)
+    if alpha > 0:
+        same_alpha = pygame.mask.from_surface(image, alpha - 1)
+    same_alpha.erase(pygame.mask.from_surface(image, alpha), (0, 0))
+    same_alpha.invert()
+    background.erase(same_alpha, (0, 0))
+
+    background.invert()
+    content = background.get_bounding_rects()
+    if not content:
+        return pygame.Rect(0, 0, 1, 1), fill
+    return content[0].unionall(content[1:]), fill
+
+
+def _pack(sizes, max_width):
+    """Shelf-pack (width, height) sizes, tallest first, return positions and size"""
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i][1], reverse=True)
+    positions = [None] * len(sizes)
+    x = y = shelf_height = atlas_width = 0
+    for i in order:
+        width, height = sizes[i]
+        if x and x + width > max_width:
+            y += shelf_height
+            x = shelf_height = 0
+        positions[i] = (x, y)
+        x += width
+        shelf_height = max(shelf_height, height)
+        atlas_width = max(atlas_width, x)
+    return positions, (max(atlas_width, 1), max(y + shelf_height, 1))
+
+
+class AssetAtlas:
+    """Every PNG under assets/ packed into one surface with a manifest of sub-rects
+
+    The packed pixels are cached on disk as raw RGBA, keyed by the sources'
+    paths, sizes and mtimes, so warm starts skip PNG decoding entirely.
+    Nothing is read until the first sprite() call, and each sprite surface
+    is only built the first time it is asked for.
+    """
+
+    def __init__(self, assets_dir=ASSETS_DIR, cache_dir=CACHE_DIR):
+        self.assets_dir = assets_dir
+        self.cache_dir = cache_dir
+        self.surface = None
+        self.manifest = None
+        self.sprites = {}
+
+    def _sources(self):
+        sources = []
+        for folder, _, files in os.walk(self.assets_dir):
+            for filename in files:
+                if filename.lower().endswith(".png"):
+                    sources.append(os.path.join(folder, filename))
+        return sorted(sources)
+
+    def _cache_key(self, sources):
+        digest = hashlib.sha1(str(ATLAS_VERSION).encode())
+        for path in sources:
+            stat = os.stat(path)
+            relative = os.path.relpath(path, self.assets_dir)
+            digest.update(f"{relative}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()
+
+    def _cache_paths(self):
+        return (
+            os.path.join(self.cache_dir, "atlas.json"),
+            os.path.join(self.cache_dir, "atlas.rgba"),
+        )
+
+    def _read_cache(self, key):
+        manifest_path, pixels_path = self._cache_paths()
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("key") != key:
+                return False
+            with open(pixels_path, "rb") as f:
+                pixels = f.read()
+        except (OSError, ValueError):
+            return False
+
+        self.manifest = manifest
+        self.surface = pygame.image.frombytes(pixels, tuple(manifest["size"]), "RGBA")
+        return True
+
+    def _build(self, sources, key):
+        images = {}
+        for path in sources:
+            try:
+                images[_sprite_name(path, self.assets_dir)] = pygame.image.load(path)
+            except pygame.error as e:
+                warnings.warn(f"skipping unreadable asset {path}: {e}")
+
+        names = sorted(images)
+        trims = [_trim(images[name]) for name in names]
+        positions, size = _pack(
+            [rect.size for rect, _ in trims], max(ATLAS_MAX_WIDTH, 1)
+        )
+
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        sprites = {}
+        for name, (content, fill), position in zip(names, trims, positions):
+            image = images[name]
+            # MAX onto the zeroed atlas copies RGBA exactly instead of blending
+            self.surface.blit(image, position, content, pygame.BLEND_RGBA_MAX)
+            sprites[name] = {
+                "rect": [*position, *content.size],
+                "offset": list(content.topleft),
+                "source_size": list(image.get_size()),
+                "fill": list(fill),
+            }
+        self.manifest = {"key": key, "size": list(size), "sprites": sprites}
+
+        manifest_path, pixels_path = self._cache_paths()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(pixels_path, "wb") as f:
+            f.write(pygame.image.tobytes(self.surface, "RGBA"))
+        with open(manifest_path, "w") as f:
+            json.dump(self.manifest, f)
+
+    def load(self):
+        """Read the packed atlas from the cache, rebuilding it if sources changed"""
+        sources = self._sources()
+        key = self._cache_key(sources)
+        if not self._read_cache(key):
+            self._build(sources, key)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert_alpha()
+
+    def names(self):
+        if self.manifest is None:
+            self.load()
+        return sorted(self.manifest["sprites"])
+
+    def sprite(self, name):
+        """Return the sprite for an asset path like "Boosts/powerup"
+
+        Raises KeyError for unknown names.
+        """
+        sprite = self.sprites.get(name)
+        if sprite is not None:
+            return sprite
+
+        if self.manifest is None:
+            self.load()
+        entry = self.manifest["sprites"][name]
+        content = self.surface.subsurface(entry["rect"])
+        if entry["offset"] == [0, 0] and entry["source_size"] == entry["rect"][2:]:
+            sprite = content
+        else:
+            # Put the trimmed border back around the content
+            sprite = pygame.Surface(entry["source_size"], pygame.SRCALPHA)
+            sprite.fill(entry["fill"])
+            sprite.fill((0, 0, 0, 0), (entry["offset"], content.get_size()))
+            sprite.blit(content, entry["offset"], special_flags=pygame.BLEND_RGBA_MAX)
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert_alpha()
+
+        self.sprites[name] = sprite
+        return sprite
+
+
+# Shared atlas for the game, nothing is loaded until a sprite is used
+atlas = AssetAtlas()
@@ -0,0 +1,28 @@
+import pygame
+
+
+class Camera:
+    """The part of the world that is on screen, kept centred on a target
+
+    rect is in world coordinates and never leaves the world, so levels that
+    are only one screen big always have an offset of (0, 0).
+    """
+
+    def __init__(self, width, height, world_width, world_height):
+        self.rect = pygame.Rect(0, 0, width, height)
+        self.world_rect = pygame.Rect(0, 0, world_width, world_height)
+
+    @property
+    def offset(self):
+        """What to add to world coordinates to get screen coordinates"""
+        return (-self.rect.x, -self.rect.y)
+
+    def follow(self, pos):
+        self.rect.center = (int(pos.x), int(pos.y))
+        self.rect.clamp_ip(self.world_rect)
+
+    def to_screen(self, rect):
+        return rect.move(-self.rect.x, -self.rect.y)
+
+    def to_world(self, rect):
+        return rect.move(self.rect.x, self.rect.y)
@@ -19,3 +19,5 @@ RESPAWN_DELAY = 1.5  # seconds
 SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
 FPS = 60
+SIM_DT = 1 / FPS  # fixed simulation timestep in seconds
+MAX_FRAME_TIME = 0.25  # longest frame the simulation catches up on
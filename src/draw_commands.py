@@ -0,0 +1,153 @@
+import pygame
+from operator import itemgetter
+
+# Draw order, lowest first
+BACKGROUND_LAYER = 0
+PLATFORM_LAYER = 10
+FIRE_PIT_LAYER = 20
+BLACK_HOLE_LAYER = 30
+LIGHTNING_LAYER = 40
+PLAYER_LAYER = 50
+HUD_LAYER = 60
+
+FILL, RECT, CIRCLE, LINES, BLIT = range(5)
+
+# pygame-ce's fblits skips building the list of rects blits() returns
+HAS_FBLITS = hasattr(pygame.Surface, "fblits")
+
+_layer = itemgetter(0)
+
+
+class DrawCommands:
+    """A frame's drawing, recorded by the entities and then run in one go
+
+    Call begin() with the area that will be drawn on, let the entities emit
+    into the buffer, then run() it on the surface. Commands whose bounds miss
+    the area are culled as they are submitted. run() draws the layers lowest
+    first; within a layer the primitives keep the order they were submitted
+    in, as pygame has no call that draws many of them at once, and the blits
+    come after them grouped by source surface, one blit call per surface.
+
+    submitted and culled count this frame's commands, batches the blit calls
+    the last run() made.
+    """
+
+    def __init__(self):
+        self.commands = []
+        self.bounds = None
+        self.submitted = 0
+        self.culled = 0
+        self.batches = 0
+
+    def begin(self, bounds):
+        self.commands.clear()
+        self.bounds = pygame.Rect(bounds)
+        self.submitted = 0
+        self.culled = 0
+
+    def skip(self, left, top, right, bottom):
+        """Whether an area is out of bounds, so nothing needs emitting for it
+
+        Entities with many commands can ask before working out their
+        arguments; a skipped area counts as one submitted and culled command.
+        """
+        bounds = self.bounds
+        if (
+            right <= bounds.left
+            or left >= bounds.right
+            or bottom <= bounds.top
+            or top >= bounds.bottom
+        ):
+            self.submitted += 1
+            self.culled += 1
+            return True
+        return False
+
+    def _add(self, command, left, top, right, bottom):
+        if not self.skip(left, top, right, bottom):
+            self.submitted += 1
+            self.commands.append(command)
+
+    def fill(self, layer, color):
+        """Fill the whole surface, which is never culled"""
+        self.submitted += 1
+        self.commands.append((layer, FILL, color))
+
+    def rect(self, layer, color, rect, width=0):
+        self._add(
+            (layer, RECT, color, rect, width),
+            rect.left,
+            rect.top,
+            rect.right,
+            rect.bottom,
+        )
+
+    def circle(self, layer, color, center, radius, width=0):
+        x, y = center
+        self._add(
+            (layer, CIRCLE, color, center, radius, width),
+            x - radius,
+            y - radius,
+            x + radius + 1,
+            y + radius + 1,
+        )
+
+    def lines(self, layer, color, points, width=1):
+        """An open polyline, drawn like a pygame.draw.line per segment"""
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        self._add(
+            (layer, LINES, color, points, width),
+            min(xs) - width,
+            min(ys) - width,
+            max(xs) + width + 1,
+            max(ys) + width + 1,
+        )
+
+    def blit(self, layer, source, dest, area=None):
+        if area is None:
+            command = (layer, BLIT, source, dest)
+            width, height = source.get_size()
+        else:
+            command = (layer, BLIT, source, dest, area)
+            width, height = area.size
+        x, y = dest
+        self._add(command, x, y, x + width, y + height)
+
+    def run(self, surface):
+        commands = self.commands
+        commands.sort(key=_layer)  # stable, so submission order is kept
+        self.batches = 0
+        draw = pygame.draw
+        groups = {}  # (source, with areas) -> blits, run once the layer is done
+        layer = None
+        for command in commands:
+            if command[0] != layer:
+                self._blit_groups(surface, groups)
+                layer = command[0]
+            kind = command[1]
+            if kind == BLIT:
+                key = (command[2], len(command) == 5)
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = []
+                group.append(command[2:])
+            elif kind == RECT:
+                draw.rect(surface, command[2], command[3], command[4])
+            elif kind == CIRCLE:
+                draw.circle(surface, command[2], command[3], command[4], command[5])
+            elif kind == LINES:
+                draw.lines(surface, command[2], False, command[3], command[4])
+            else:
+                surface.fill(command[2])
+        self._blit_groups(surface, groups)
+        commands.clear()
+
+    def _blit_groups(self, surface, groups):
+        for (_, with_areas), blits in groups.items():
+            if HAS_FBLITS and not with_areas:
+                surface.fblits(blits)
+            else:
+                surface.blits(blits, doreturn=False)
+        self.batches += len(groups)
+        groups.clear()
@@ -1,7 +1,7 @@
 from .player import Player
 from .platform import Platform
 from .fire_pit import FirePit
-from .lightning import Lightning
+from .lightning import Lightning, LightningPool
 from .black_hole import BlackHole
 
-__all__ = ["Player", "Platform", "FirePit", "Lightning", "BlackHole"]
+__all__ = ["Player", "Platform", "FirePit", "Lightning", "LightningPool", "BlackHole"]
@@ -1,28 +1,192 @@
 import pygame
 import math
 import random
+from draw_commands import BLACK_HOLE_LAYER
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, platforms are then updated one by one
+    np = None
+
+# Below this many platforms the per-platform loop beats building arrays
+BATCH_THRESHOLD = 64
+
+# Crushed entities shrink in steps of 1 / SCALE_STEPS
+SCALE_STEPS = 32
+
+
+class _PlatformArrays:
+    """Struct-of-arrays copy of platform centers and widths for batched updates
+
+    The arrays are the black hole's working copy; moves are written back to
+    the platform rects, and rects changed elsewhere must be refreshed.
+    """
+
+    def __init__(self, platforms):
+        self.source = platforms
+        self.platforms = list(platforms)
+        self.slots = {platform: i for i, platform in enumerate(self.platforms)}
+        self.centerx = np.array([p.rect.centerx for p in platforms], dtype=np.int64)
+        self.centery = np.array([p.rect.centery for p in platforms], dtype=np.int64)
+        self.width = np.array([p.rect.width for p in platforms], dtype=np.int64)
+
+    def is_stale(self, platforms):
+        return platforms is not self.source or len(platforms) != len(self.platforms)
+
+    def refresh(self, platform):
+        i = self.slots.get(platform)
+        if i is not None:
+            self.centerx[i] = platform.rect.centerx
+            self.centery[i] = platform.rect.centery
+            self.width[i] = platform.rect.width
+
+
+class BatchedPlatformPull:
+    """Pulls the platforms of many black holes in one NumPy pass, for VecGameEnv
+
+    Every black hole's platform arrays become views into one set of arrays
+    covering all of them, so a step is a few array operations for all the
+    envs rather than a loop per env. The arrays are built again whenever a
+    black hole changed or one of its platform lists did. The maths is that of
+    BlackHole._apply_force_to_platforms_batched, so platforms move exactly as
+    they would for each black hole on its own.
+    """
+
+    def __init__(self):
+        self.black_holes = []
+        self.arrays = []  # each black hole's arrays, views into the ones here
+        self.platform_indexes = []
+        self.platforms = []  # every platform, black hole by black hole
+        self.indexes = []  # each platform's spatial index
+        self.owners = []  # each platform's position in black_holes
+        self.counts = None
+
+    def _is_stale(self, black_holes, platform_lists, platform_indexes):
+        arrays = [black_hole._platform_arrays for black_hole in black_holes]
+        if (
+            black_holes != self.black_holes
+            or arrays != self.arrays
+            or platform_indexes != self.platform_indexes
+        ):
+            return True
+        return any(a.is_stale(p) for a, p in zip(arrays, platform_lists))
+
+    def _build(self, black_holes, platform_lists, platform_indexes):
+        self.black_holes = list(black_holes)
+        self.platform_indexes = list(platform_indexes)
+        all_arrays = self.arrays = []
+        for black_hole, platforms in zip(black_holes, platform_lists):
+            arrays = black_hole._platform_arrays
+            if arrays is None or arrays.is_stale(platforms):
+                arrays = black_hole._platform_arrays = _PlatformArrays(platforms)
+            all_arrays.append(arrays)
+        self.counts = np.array([len(a.platforms) for a in all_arrays], dtype=np.int64)
+        self.platforms = [p for arrays in all_arrays for p in arrays.platforms]
+        self.indexes = []
+        self.owners = []
+        for owner, (arrays, index) in enumerate(zip(all_arrays, platform_indexes)):
+            self.indexes += [index] * len(arrays.platforms)
+            self.owners += [owner] * len(arrays.platforms)
+
+        self.centerx = np.concatenate([a.centerx for a in all_arrays])
+        self.centery = np.concatenate([a.centery for a in all_arrays])
+        self.width = np.concatenate([a.width for a in all_arrays])
+        start = 0
+        for arrays in all_arrays:
+            end = start + len(arrays.platforms)
+            arrays.centerx = self.centerx[start:end]
+            arrays.centery = self.centery[start:end]
+            arrays.width = self.width[start:end]
+            start = end
+
+    def pull(self, dt, black_holes, platform_lists, platform_indexes):
+        """Pull each list of platforms towards its black hole
+
+        Returns, for each black hole, the platforms that ended up inside it.
+        """
+        if not black_holes:
+            return []
+        if self._is_stale(black_holes, platform_lists, platform_indexes):
+            self._build(black_holes, platform_lists, platform_indexes)
+        counts = self.counts
+        pos_x = np.repeat([b.pos.x for b in black_holes], counts)
+        pos_y = np.repeat([b.pos.y for b in black_holes], counts)
+        force = np.repeat([b.attraction_force for b in black_holes], counts)
+        radius = np.repeat([b.radius for b in black_holes], counts)
+        centerx = self.centerx
+        centery = self.centery
+
+        direction_x = pos_x - centerx
+        direction_y = pos_y - centery
+        distance = np.maximum(np.sqrt(direction_x**2 + direction_y**2), 1)
+        direction_x /= distance
+        direction_y /= distance
+        force_magnitude = force * 0.3 * (1 / np.maximum(distance / 400, 0.5))
+
+        move_x = (direction_x * force_magnitude * dt).astype(np.int64)
+        move_y = (direction_y * force_magnitude * dt).astype(np.int64)
+        centerx += move_x
+        centery += move_y
+
+        platforms = self.platforms
+        indexes = self.indexes
+        for i in np.flatnonzero(move_x | move_y).tolist():
+            platform = platforms[i]
+            platform.rect.move_ip(int(move_x[i]), int(move_y[i]))
+            if indexes[i] is not None:
+                indexes[i].update(platform)
+
+        distance = np.sqrt((centerx - pos_x) ** 2 + (centery - pos_y) ** 2)
+        inside = [[] for _ in black_holes]
+        owners = self.owners
+        for i in np.flatnonzero(distance < radius - self.width / 2 / 2).tolist():
+            inside[owners[i]].append(platforms[i])
+        return inside
 
 
 class BlackHole:
-    def __init__(self, screen_width, screen_height):
+    def __init__(self, screen_width, screen_height, rng=None):
+        rng = rng or random.Random()
         self.radius = 30
         self.max_radius = 80
         self.pos = pygame.Vector2(
-            random.randint(screen_width // 4, screen_width * 3 // 4),
-            random.randint(100, 200),
+            rng.randint(screen_width // 4, screen_width * 3 // 4),
+            rng.randint(100, 200),
         )
         self.attraction_force = 600  # Increased initial force
         self.max_attraction = 1500  # Increased maximum force
         self.active = False
         self.pulse_speed = 5
-        self.current_pulse = 0
+        self.current_pulse = 0.0
         self.growing = True
-        self.crushing_entities = []  # List to store entities being crushed
+        self.crushing_entities = {}  # entity -> crushing progress
+        self._scaled_images = {}  # (image, scale step) -> scaled surface
+        self._platform_arrays = None
+
+    def platforms_changed(self, platforms=None):
+        """Call when platforms were swapped in or out of the list update() gets
 
-    def update(self, dt, player, platforms, fire_pit):
+        Given the new list, crushes of platforms no longer in it are dropped:
+        they are out of the spatial index, and come back at whatever size
+        they had reached.
+        """
+        self._platform_arrays = None
+        if platforms is None:
+            return
+        live = set(platforms)
+        for entity, entity_data in list(self.crushing_entities.items()):
+            if entity_data["type"] == "platform" and entity not in live:
+                del self.crushing_entities[entity]
+
+    def update(self, dt, player, platforms, fire_pit, platform_index=None):
         if not self.active:
             return
+        self.begin_update(dt, player)
+        inside = self._apply_force_to_platforms(dt, platforms, platform_index)
+        self.finish_update(dt, player, platforms, fire_pit, inside, platform_index)
 
+    def begin_update(self, dt, player):
+        """The part of update() before the platforms are pulled"""
         # Increase size and attraction force gradually
         if self.radius < self.max_radius:
             self.radius += 2 * dt
@@ -33,54 +197,30 @@ class BlackHole:
         # Apply force to player
         self._apply_force_to_player(dt, player)
 
-        # Apply force to platforms
-        for platform in platforms[:]:
-            self._apply_force_to_platform(dt, platform)
-            # Check if platform is inside black hole
-            if self._is_entity_inside(
-                platform.rect.centerx, platform.rect.centery, platform.rect.width / 2
-            ):
-                # Add to crushing entities if not already there
-                if platform not in self.crushing_entities:
-                    self.crushing_entities.append(
-                        {
-                            "entity": platform,
-                            "type": "platform",
-                            "scale": 1.0,
-                            "original_size": platform.rect.width,
-                        }
-                    )
+    def finish_update(
+        self, dt, player, platforms, fire_pit, inside, platform_index=None
+    ):
+        """The part of update() after the platforms were pulled
+
+        inside are the pulled platforms that ended up inside the black hole.
+        """
+        for platform in inside:
+            self._start_crushing(platform, "platform", platform.rect.width)
 
         # Apply force to fire pit
-        self._apply_force_to_fire_pit(dt, fire_pit)
+        self._apply_force_to_rect(dt, fire_pit.rect)
         # Check if fire pit is inside black hole
         if self._is_entity_inside(
             fire_pit.rect.centerx, fire_pit.rect.centery, fire_pit.rect.width / 2
         ):
-            if fire_pit not in [e["entity"] for e in self.crushing_entities]:
-                self.crushing_entities.append(
-                    {
-                        "entity": fire_pit,
-                        "type": "fire_pit",
-                        "scale": 1.0,
-                        "original_size": fire_pit.rect.width,
-                    }
-                )
+            self._start_crushing(fire_pit, "fire_pit", fire_pit.rect.width)
 
         # Check if player is inside black hole
         if self._is_entity_inside(player.pos.x, player.pos.y, player.size):
-            if player not in [e["entity"] for e in self.crushing_entities]:
-                self.crushing_entities.append(
-                    {
-                        "entity": player,
-                        "type": "player",
-                        "scale": 1.0,
-                        "original_size": player.size,
-                    }
-                )
+            self._start_crushing(player, "player", player.size)
 
         # Update crushing animation
-        self._update_crushing_animation(dt, platforms, fire_pit, player)
+        self._update_crushing_animation(dt, platforms, fire_pit, player, platform_index)
 
         # Animate pulsing effect
         if self.growing:
@@ -96,37 +236,76 @@ class BlackHole:
         distance = math.sqrt((x - self.pos.x) ** 2 + (y - self.pos.y) ** 2)
         return distance < self.radius - size / 2
 
-    def _update_crushing_animation(self, dt, platforms, fire_pit, player):
-        for i in range(len(self.crushing_entities) - 1, -1, -1):
-            entity_data = self.crushing_entities[i]
+    def _start_crushing(self, entity, entity_type, original_size):
+        # Add to crushing entities if not already there
+        if entity not in self.crushing_entities:
+            rect = getattr(entity, "rect", None)
+            self.crushing_entities[entity] = {
+                "type": entity_type,
+                "scale": 1.0,
+                "original_size": original_size,
+                "original_height": rect.height if rect is not None else original_size,
+            }
+
+    def _scaled_image(self, image, scale_step, size):
+        # Crushed sprites only ever take SCALE_STEPS sizes, so each is scaled once
+        key = (image, scale_step)
+        scaled = self._scaled_images.get(key)
+        if scaled is None:
+            scaled = pygame.transform.scale(image, size)
+            self._scaled_images[key] = scaled
+        return scaled
+
+    def _update_crushing_animation(
+        self, dt, platforms, fire_pit, player, platform_index=None
+    ):
+        for entity, entity_data in list(self.crushing_entities.items()):
             entity_data["scale"] -= 2.0 * dt  # Shrink effect
 
             if entity_data["scale"] <= 0.1:
                 # Remove entity if it's completely crushed
                 if entity_data["type"] == "platform":
-                    if entity_data["entity"] in platforms:
-                        platforms.remove(entity_data["entity"])
+                    if entity in platforms:
+                        platforms.remove(entity)
+                    if platform_index is not None:
+                        platform_index.remove(entity)
+                    # Rebuild the arrays even if the list regrows to this length
+                    self.platforms_changed()
                 elif entity_data["type"] == "fire_pit":
                     fire_pit.active = False
                 elif entity_data["type"] == "player":
                     player.size = 0  # Hide player
 
-                self.crushing_entities.pop(i)
-            else:
-                # Update visual scaling using pygame.transform.scale
-                new_width = int(entity_data["original_size"] * entity_data["scale"])
-                new_height = int(
-                    entity_data["entity"].rect.height * entity_data["scale"]
-                )
+                del self.crushing_entities[entity]
+                continue
 
-                entity_data["entity"].image = pygame.transform.scale(
-                    entity_data["entity"].original_image,
-                    (max(new_width, 1), max(new_height, 1)),
-                )
-                entity_data["entity"].rect = entity_data["entity"].image.get_rect(
-                    center=entity_data["entity"].rect.center
+            # Snap the scale to a fixed step so scaled sizes repeat
+            scale_step = max(round(entity_data["scale"] * SCALE_STEPS), 1)
+            scale = scale_step / SCALE_STEPS
+            new_width = max(int(entity_data["original_size"] * scale), 1)
+            new_height = max(int(entity_data["original_height"] * scale), 1)
+
+            if entity_data["type"] == "player":
+                entity.size = new_width
+                continue
+
+            original_image = getattr(entity, "original_image", None)
+            if original_image is not None:
+                entity.image = self._scaled_image(
+                    original_image, scale_step, (new_width, new_height)
                 )
 
+            # Shrink the rect in place around its center
+            center = entity.rect.center
+            entity.rect.size = (new_width, new_height)
+            entity.rect.center = center
+
+            if entity_data["type"] == "platform":
+                if platform_index is not None:
+                    platform_index.update(entity)
+                if self._platform_arrays is not None:
+                    self._platform_arrays.refresh(entity)
+
     def _apply_force_to_player(self, dt, player):
         direction = pygame.Vector2(self.pos.x - player.pos.x, self.pos.y - player.pos.y)
         distance = max(direction.length(), 1)  # Avoid division by zero
@@ -138,30 +317,63 @@ class BlackHole:
             player.vel.x += direction.x * force_magnitude * dt
             player.vel.y += direction.y * force_magnitude * dt
 
-    def _apply_force_to_platform(self, dt, platform):
-        platform_center_x = platform.rect.centerx
-        platform_center_y = platform.rect.centery
+    def _apply_force_to_platforms(self, dt, platforms, platform_index=None):
+        """Pull every platform towards the black hole, return the ones inside it"""
+        if np is not None and len(platforms) >= BATCH_THRESHOLD:
+            return self._apply_force_to_platforms_batched(dt, platforms, platform_index)
 
-        direction_x = self.pos.x - platform_center_x
-        direction_y = self.pos.y - platform_center_y
-        distance = max(math.sqrt(direction_x**2 + direction_y**2), 1)
+        inside = []
+        for platform in platforms:
+            self._apply_force_to_rect(dt, platform.rect)
+            if platform_index is not None:
+                platform_index.update(platform)
+            if self._is_entity_inside(
+                platform.rect.centerx, platform.rect.centery, platform.rect.width / 2
+            ):
+                inside.append(platform)
+        return inside
 
-        if distance > 0:
-            direction_x /= distance
-            direction_y /= distance
-            force_magnitude = (
-                self.attraction_force * 0.3 * (1 / max(distance / 400, 0.5))
-            )
+    def _apply_force_to_platforms_batched(self, dt, platforms, platform_index=None):
+        # Same maths as _apply_force_to_rect and _is_entity_inside, for all
+        # platforms at once
+        arrays = self._platform_arrays
+        if arrays is None or arrays.is_stale(platforms):
+            arrays = self._platform_arrays = _PlatformArrays(platforms)
+
+        direction_x = self.pos.x - arrays.centerx
+        direction_y = self.pos.y - arrays.centery
+        distance = np.maximum(np.sqrt(direction_x**2 + direction_y**2), 1)
+        direction_x /= distance
+        direction_y /= distance
+        force_magnitude = (
+            self.attraction_force * 0.3 * (1 / np.maximum(distance / 400, 0.5))
+        )
 
-            platform.rect.x += int(direction_x * force_magnitude * dt)
-            platform.rect.y += int(direction_y * force_magnitude * dt)
+        # astype truncates towards zero, like int()
+        move_x = (direction_x * force_magnitude * dt).astype(np.int64)
+        move_y = (direction_y * force_magnitude * dt).astype(np.int64)
+        arrays.centerx += move_x
+        arrays.centery += move_y
 
-    def _apply_force_to_fire_pit(self, dt, fire_pit):
-        fire_center_x = fire_pit.rect.centerx
-        fire_center_y = fire_pit.rect.centery
+        # Only platforms that moved a whole pixel need their rect touched
+        for i in np.flatnonzero(move_x | move_y).tolist():
+            platform = arrays.platforms[i]
+            platform.rect.move_ip(int(move_x[i]), int(move_y[i]))
+            if platform_index is not None:
+                platform_index.update(platform)
 
-        direction_x = self.pos.x - fire_center_x
-        direction_y = self.pos.y - fire_center_y
+        distance = np.sqrt(
+            (arrays.centerx - self.pos.x) ** 2 + (arrays.centery - self.pos.y) ** 2
+        )
+        inside = distance < self.radius - arrays.width / 2 / 2
+        return [arrays.platforms[i] for i in np.flatnonzero(inside).tolist()]
+
+    def _apply_force_to_rect(self, dt, rect):
+        center_x = rect.centerx
+        center_y = rect.centery
+
+        direction_x = self.pos.x - center_x
+        direction_y = self.pos.y - center_y
         distance = max(math.sqrt(direction_x**2 + direction_y**2), 1)
 
         if distance > 0:
@@ -171,31 +383,38 @@ class BlackHole:
                 self.attraction_force * 0.3 * (1 / max(distance / 400, 0.5))
             )
 
-            fire_pit.rect.x += int(direction_x * force_magnitude * dt)
-            fire_pit.rect.y += int(direction_y * force_magnitude * dt)
+            rect.x += int(direction_x * force_magnitude * dt)
+            rect.y += int(direction_y * force_magnitude * dt)
 
-    def draw(self, screen):
+    def draw(self, screen, offset=(0, 0)):
         if not self.active:
-            return
+            return None
+        center = (int(self.pos.x) + offset[0], int(self.pos.y) + offset[1])
 
         # Draw outer glow (pulsing)
         pulse_radius = self.radius + self.current_pulse
-        pygame.draw.circle(
-            screen,
-            (100, 0, 150, 128),
-            (int(self.pos.x), int(self.pos.y)),
-            int(pulse_radius * 1.5),
+        bounds = pygame.draw.circle(
+            screen, (100, 0, 150, 128), center, int(pulse_radius * 1.5)
         )
 
         # Draw main black hole
-        pygame.draw.circle(
-            screen, (20, 0, 30), (int(self.pos.x), int(self.pos.y)), int(self.radius)
-        )
+        pygame.draw.circle(screen, (20, 0, 30), center, int(self.radius))
 
         # Draw center accretion disk
-        pygame.draw.circle(
-            screen,
-            (150, 50, 200),
-            (int(self.pos.x), int(self.pos.y)),
-            int(self.radius * 0.4),
+        pygame.draw.circle(screen, (150, 50, 200), center, int(self.radius * 0.4))
+
+        return bounds
+
+    def emit(self, commands, offset=(0, 0)):
+        """Submit what draw() would draw to a DrawCommands buffer"""
+        if not self.active:
+            return
+        center = (int(self.pos.x) + offset[0], int(self.pos.y) + offset[1])
+        pulse_radius = self.radius + self.current_pulse
+        commands.circle(
+            BLACK_HOLE_LAYER, (100, 0, 150, 128), center, int(pulse_radius * 1.5)
+        )
+        commands.circle(BLACK_HOLE_LAYER, (20, 0, 30), center, int(self.radius))
+        commands.circle(
+            BLACK_HOLE_LAYER, (150, 50, 200), center, int(self.radius * 0.4)
         )
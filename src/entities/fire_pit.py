@@ -1,46 +1,175 @@
 import pygame
 from constants import ORANGE, YELLOW
+from draw_commands import FIRE_PIT_LAYER
+from sim_clock import WallClock
+
+SEGMENT_WIDTH = 10
+MAX_CACHED_STRIPS = 64
+
+
+class FlameAtlas:
+    """Pre-rendered flame columns, one per flame height, side by side in one surface
+
+    Column h sits at x = h * SEGMENT_WIDTH, bottom-aligned, and looks exactly like
+    the orange and yellow rects FirePit used to draw for a flame of height h.
+    The atlas is rebuilt twice as tall when a taller flame is asked for.
+    """
+
+    def __init__(self, max_height=64):
+        self._build(max_height)
+
+    def _build(self, max_height):
+        self.max_height = max_height
+        column_height = max_height + 15
+        self.surface = pygame.Surface((SEGMENT_WIDTH * (max_height + 1), column_height))
+        self.areas = []
+        for flame_height in range(max_height + 1):
+            area = pygame.Rect(
+                flame_height * SEGMENT_WIDTH,
+                column_height - flame_height - 15,
+                SEGMENT_WIDTH,
+                flame_height + 15,
+            )
+            # Main flame (orange)
+            self.surface.fill(ORANGE, area)
+            # Inner flame (yellow)
+            if flame_height > 5:
+                self.surface.fill(
+                    YELLOW, (area.x + 2, area.y + 5, SEGMENT_WIDTH - 4, flame_height)
+                )
+            self.areas.append(area)
+
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+
+    def area(self, flame_height):
+        if flame_height > self.max_height:
+            self._build(max(flame_height, self.max_height * 2))
+        return self.areas[flame_height]
+
+
+_flame_atlas = None
+
+
+def get_flame_atlas():
+    """Return the shared flame atlas, building it on first use"""
+    global _flame_atlas
+    if _flame_atlas is None:
+        _flame_atlas = FlameAtlas()
+    return _flame_atlas
 
 
 class FirePit:
-    def __init__(self, x, y, width, height):
+    def __init__(self, x, y, width, height, clock=None):
+        self.clock = clock or WallClock()
         self.rect = pygame.Rect(x, y, width, height)
         self.flame_heights = [0] * (width // 10)  # Store heights for each flame segment
         self.base_height = height
+        self.active = True  # cleared once the black hole has crushed the pit
+        self._flame_strips = {}  # flame height -> whole row of flames that tall
+
+    def reset(self, x, y, width, height):
+        """Put the pit back as if it had just been created there"""
+        if width // SEGMENT_WIDTH != len(self.flame_heights):
+            self._flame_strips.clear()
+        self.rect.update(x, y, width, height)
+        self.flame_heights = [0] * (width // 10)
+        self.base_height = height
+        self.active = True
 
     def update(self, dt):
-        # Animate flames
-        for i in range(len(self.flame_heights)):
+        # Animate flames, every segment gets the same flicker this frame
+        ticks = self.clock.ticks()
+        if ticks % 100 < 5:
+            # Reset occasionally for variety
+            self.flame_heights[:] = [ticks % 30] * len(self.flame_heights)
+        else:
             # Random flickering effect
-            self.flame_heights[i] = max(
-                0, self.flame_heights[i] + (pygame.time.get_ticks() % 5 - 2)
+            flicker = ticks % 5 - 2
+            self.flame_heights[:] = [max(0, h + flicker) for h in self.flame_heights]
+
+    def _flame_strip(self, flame_height):
+        # One surface with every segment at the same height, built from the atlas
+        strip = self._flame_strips.get(flame_height)
+        if strip is None:
+            if len(self._flame_strips) >= MAX_CACHED_STRIPS:
+                self._flame_strips.clear()
+            atlas = get_flame_atlas()
+            area = atlas.area(flame_height)
+            strip = pygame.Surface((len(self.flame_heights) * SEGMENT_WIDTH, area.height))
+            strip.blits(
+                [
+                    (atlas.surface, (i * SEGMENT_WIDTH, 0), area)
+                    for i in range(len(self.flame_heights))
+                ],
+                doreturn=False,
             )
-            # Reset occasionally for variety
-            if pygame.time.get_ticks() % 100 < 5:
-                self.flame_heights[i] = pygame.time.get_ticks() % 30
+            self._flame_strips[flame_height] = strip
+        return strip
 
-    def draw(self, screen):
-        # Draw fire base (coals)
-        pygame.draw.rect(screen, (150, 30, 30), self.rect)
+    def draw(self, screen, offset=(0, 0)):
+        bounds = self.draw_base(screen, offset)
+        flames = self.draw_flames(screen, offset)
+        return bounds if flames is None else bounds.union(flames)
 
-        # Draw flames
-        segment_width = 10
-        for i in range(len(self.flame_heights)):
-            flame_height = self.flame_heights[i]
-            x = self.rect.x + i * segment_width
+    def draw_base(self, screen, offset=(0, 0)):
+        # Draw fire base (coals), which only changes when the pit moves
+        return pygame.draw.rect(screen, (150, 30, 30), self.rect.move(offset))
 
-            # Main flame (orange)
-            flame_rect = pygame.Rect(
-                x, self.rect.y - flame_height - 15, segment_width, flame_height + 15
+    def draw_flames(self, screen, offset=(0, 0)):
+        heights = self.flame_heights
+        if not heights:
+            return None
+        rect = self.rect.move(offset)
+
+        # Draw flames: one blit when every segment is the same height (the
+        # usual case), otherwise one batched blit of atlas columns
+        tallest = max(heights)
+        x = rect.x
+        if heights.count(heights[0]) == len(heights):
+            screen.blit(self._flame_strip(tallest), (x, rect.y - tallest - 15))
+        else:
+            atlas = get_flame_atlas()
+            atlas.area(tallest)  # grow the atlas before taking its surface
+            screen.blits(
+                [
+                    (
+                        atlas.surface,
+                        (x + i * SEGMENT_WIDTH, rect.y - h - 15),
+                        atlas.areas[h],
+                    )
+                    for i, h in enumerate(heights)
+                ],
+                doreturn=False,
             )
-            pygame.draw.rect(screen, ORANGE, flame_rect)
 
-            # Inner flame (yellow)
-            if flame_height > 5:
-                inner_flame_rect = pygame.Rect(
-                    x + 2,
-                    self.rect.y - flame_height - 10,
-                    segment_width - 4,
-                    flame_height,
+        flames = pygame.Rect(
+            x, rect.y - tallest - 15, len(heights) * SEGMENT_WIDTH, tallest + 15
+        )
+        return flames.clip(screen.get_rect())
+
+    def emit(self, commands, offset=(0, 0)):
+        """Submit what draw() would draw to a DrawCommands buffer"""
+        rect = self.rect.move(offset)
+        commands.rect(FIRE_PIT_LAYER, (150, 30, 30), rect)
+        heights = self.flame_heights
+        if not heights:
+            return
+
+        # Blits run after the layer's rects, so the flames still go on the base
+        tallest = max(heights)
+        x = rect.x
+        if heights.count(heights[0]) == len(heights):
+            commands.blit(
+                FIRE_PIT_LAYER, self._flame_strip(tallest), (x, rect.y - tallest - 15)
+            )
+        else:
+            atlas = get_flame_atlas()
+            atlas.area(tallest)  # grow the atlas before taking its surface
+            for i, h in enumerate(heights):
+                commands.blit(
+                    FIRE_PIT_LAYER,
+                    atlas.surface,
+                    (x + i * SEGMENT_WIDTH, rect.y - h - 15),
+                    atlas.areas[h],
                 )
-                pygame.draw.rect(screen, YELLOW, inner_flame_rect)
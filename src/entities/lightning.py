@@ -1,125 +1,217 @@
 import pygame
 import math
-import time
 import random
+from array import array
 from constants import WHITE, LIGHT_BLUE
+from draw_commands import LIGHTNING_LAYER
+from sim_clock import WallClock
+
+
+BOLT_SEGMENTS = 10  # Number of zigzag segments
+WARNING_TIME = 2.0  # Seconds between a strike being called and it landing
 
 
 class Lightning:
-    def __init__(self, target_x, target_y):
-        self.target_x = target_x
-        self.target_y = target_y
-        self.strike_time = time.time() + 2.0  # Strike 2 seconds after creation
-        self.active = False
-        self.flash_duration = 0.2  # How long the flash stays visible
-        self.end_time = 0
-        self.segments = []
+    __slots__ = (
+        "clock",
+        "rng",
+        "target_x",
+        "target_y",
+        "strike_time",
+        "active",
+        "flash_duration",
+        "end_time",
+        "bolt",
+        "width",
+        "max_warning_size",
+        "hit_radius",
+    )
+
+    def __init__(self, target_x, target_y, clock=None, rng=None):
+        self.clock = clock or WallClock()
+        self.rng = rng or random.Random()
+        # Bolt points as x0, y0, x1, y1, ..., reused by every strike of this record
+        self.bolt = array("d", [0.0]) * (2 * (BOLT_SEGMENTS + 1))
         self.width = 5
-        self.warning_circle_size = 0
+        self.flash_duration = 0.2  # How long the flash stays visible
         self.max_warning_size = 50
         self.hit_radius = 60  # Radius for collision detection
+        self.reset(target_x, target_y)
+
+    def reset(self, target_x, target_y):
+        """Start a new strike at the target, so pooled records can be reused"""
+        self.target_x = target_x
+        self.target_y = target_y
+        self.strike_time = self.clock.time() + WARNING_TIME
+        self.active = False
+        self.end_time = 0.0
+
+    def warning_size(self, current_time):
+        """Radius of the warning circle, which grows as the strike approaches"""
+        progress = (current_time - (self.strike_time - WARNING_TIME)) / WARNING_TIME
+        return int(progress * self.max_warning_size)
+
+    def warning_color(self, current_time):
+        # Pulses between darker and brighter red
+        pulse = abs(math.sin(current_time * 10)) * 50
+        return (int(200 + pulse), 0, 0)
+
+    def flash_radius(self, current_time):
+        # Shrinks from 80 to nothing over the flash
+        return 80 * ((self.end_time - current_time) / self.flash_duration)
+
+    def strike(self, current_time):
+        """Land the strike: it flashes until end_time, when it is done"""
+        self.active = True
+        self.end_time = current_time + self.flash_duration
+
+        # Generate lightning bolt (zigzag pattern from top of screen to target)
+        bolt = self.bolt
+        start_x = self.target_x
+        start_y = 0
+        end_x = self.target_x
+        end_y = self.target_y
+
+        segments = BOLT_SEGMENTS
+        current_x = start_x
+        bolt[0] = start_x
+        bolt[1] = start_y
+
+        for i in range(segments):
+            next_y = start_y + (end_y - start_y) * (i + 1) / segments
+            # Random horizontal displacement, more pronounced in the middle
+            displacement = self.rng.randint(-40, 40)
+            if i == segments - 1:  # Last segment points exactly to target
+                next_x = end_x
+            else:
+                next_x = current_x + displacement
+
+            bolt[2 * i + 2] = next_x
+            bolt[2 * i + 3] = next_y
+            current_x = next_x
 
-    def update(self, current_time):
-        # Warning phase
-        if current_time < self.strike_time:
-            # Calculate warning circle size (grows as strike approaches)
-            progress = (current_time - (self.strike_time - 2.0)) / 2.0
-            self.warning_circle_size = int(progress * self.max_warning_size)
-        # Strike phase
-        elif not self.active and current_time >= self.strike_time:
-            self.active = True
-            self.end_time = current_time + self.flash_duration
-
-            # Generate lightning segments (zigzag pattern from top of screen to target)
-            self.segments = []
-            start_x = self.target_x
-            start_y = 0
-            end_x = self.target_x
-            end_y = self.target_y
-
-            segments = 10  # Number of zigzag segments
-            current_x = start_x
-            current_y = start_y
-
-            for i in range(segments):
-                next_y = start_y + (end_y - start_y) * (i + 1) / segments
-                # Random horizontal displacement, more pronounced in the middle
-                displacement = random.randint(-40, 40)
-                if i == segments - 1:  # Last segment points exactly to target
-                    next_x = end_x
-                else:
-                    next_x = current_x + displacement
-
-                self.segments.append((current_x, current_y, next_x, next_y))
-                current_x, current_y = next_x, next_y
-
-        # Check if strike has ended
-        if self.active and current_time > self.end_time:
-            return False  # Lightning is done
-
-        return True  # Lightning is still active
-
-    def draw(self, screen):
-        current_time = time.time()
+    def draw(self, screen, offset=(0, 0)):
+        current_time = self.clock.time()
+        bounds = None
+        offset_x, offset_y = offset
+        target = (int(self.target_x) + offset_x, int(self.target_y) + offset_y)
 
         # Draw warning circle before strike
         if not self.active and current_time < self.strike_time:
             # Warning circle (pulsing)
-            pulse = abs(math.sin(current_time * 10)) * 50
-            color_value = int(200 + pulse)
-            warning_color = (color_value, 0, 0)
-            pygame.draw.circle(
+            bounds = pygame.draw.circle(
                 screen,
-                warning_color,
-                (int(self.target_x), int(self.target_y)),
-                self.warning_circle_size,
+                self.warning_color(current_time),
+                target,
+                self.warning_size(current_time),
                 2,
             )
 
         # Draw actual lightning strike
         if self.active and current_time <= self.end_time:
+            bolt = self.bolt
+
             # Draw main bolt
-            for segment in self.segments:
-                pygame.draw.line(
+            for i in range(0, 2 * BOLT_SEGMENTS, 2):
+                line_rect = pygame.draw.line(
                     screen,
                     WHITE,
-                    (segment[0], segment[1]),
-                    (segment[2], segment[3]),
+                    (bolt[i] + offset_x, bolt[i + 1] + offset_y),
+                    (bolt[i + 2] + offset_x, bolt[i + 3] + offset_y),
                     self.width,
                 )
+                bounds = line_rect if bounds is None else bounds.union(line_rect)
 
             # Draw thinner inner bolt (for glow effect)
-            for segment in self.segments:
+            for i in range(0, 2 * BOLT_SEGMENTS, 2):
                 pygame.draw.line(
                     screen,
                     LIGHT_BLUE,
-                    (segment[0], segment[1]),
-                    (segment[2], segment[3]),
+                    (bolt[i] + offset_x, bolt[i + 1] + offset_y),
+                    (bolt[i + 2] + offset_x, bolt[i + 3] + offset_y),
                     self.width - 2,
                 )
 
             # Draw flash at impact point
-            flash_radius = 80 * ((self.end_time - current_time) / self.flash_duration)
-            pygame.draw.circle(
-                screen,
-                WHITE,
-                (int(self.target_x), int(self.target_y)),
-                int(flash_radius),
+            flash_radius = self.flash_radius(current_time)
+            flash_rect = pygame.draw.circle(screen, WHITE, target, int(flash_radius))
+            bounds = flash_rect if bounds is None else bounds.union(flash_rect)
+            pygame.draw.circle(screen, LIGHT_BLUE, target, int(flash_radius * 0.7))
+
+        return bounds
+
+    def emit(self, commands, offset=(0, 0)):
+        """Submit what draw() would draw to a DrawCommands buffer"""
+        current_time = self.clock.time()
+        offset_x, offset_y = offset
+        target = (int(self.target_x) + offset_x, int(self.target_y) + offset_y)
+
+        if not self.active and current_time < self.strike_time:
+            # Most strikes are warnings, skip the ones out of view before
+            # working out their colour and size
+            x, y = target
+            radius = self.max_warning_size
+            if commands.skip(x - radius, y - radius, x + radius + 1, y + radius + 1):
+                return
+            commands.circle(
+                LIGHTNING_LAYER,
+                self.warning_color(current_time),
+                target,
+                self.warning_size(current_time),
+                2,
             )
-            pygame.draw.circle(
-                screen,
-                LIGHT_BLUE,
-                (int(self.target_x), int(self.target_y)),
-                int(flash_radius * 0.7),
+
+        if self.active and current_time <= self.end_time:
+            # The bolt as one polyline per colour instead of a line per segment
+            bolt = self.bolt
+            points = [
+                (bolt[i] + offset_x, bolt[i + 1] + offset_y)
+                for i in range(0, len(bolt), 2)
+            ]
+            commands.lines(LIGHTNING_LAYER, WHITE, points, self.width)
+            commands.lines(LIGHTNING_LAYER, LIGHT_BLUE, points, self.width - 2)
+
+            flash_radius = self.flash_radius(current_time)
+            commands.circle(LIGHTNING_LAYER, WHITE, target, int(flash_radius))
+            commands.circle(
+                LIGHTNING_LAYER, LIGHT_BLUE, target, int(flash_radius * 0.7)
             )
 
     def check_player_hit(self, player_pos):
-        current_time = time.time()
+        current_time = self.clock.time()
         # Only check when lightning is actually striking
         if self.active and current_time <= self.end_time:
-            distance = math.sqrt(
-                (player_pos.x - self.target_x) ** 2
-                + (player_pos.y - self.target_y) ** 2
-            )
-            return distance < self.hit_radius
+            dx = player_pos.x - self.target_x
+            dy = player_pos.y - self.target_y
+            return dx * dx + dy * dy < self.hit_radius * self.hit_radius
         return False
+
+
+class LightningPool:
+    """Recycles Lightning records so a warm pool creates no new strikes
+
+    ``high_water`` is the most strikes that were ever live at once.
+    """
+
+    def __init__(self, clock=None, rng=None):
+        self.clock = clock or WallClock()
+        self.rng = rng or random.Random()
+        self.free = []
+        self.in_use = 0
+        self.high_water = 0
+
+    def acquire(self, target_x, target_y):
+        if self.free:
+            lightning = self.free.pop()
+            lightning.reset(target_x, target_y)
+        else:
+            lightning = Lightning(target_x, target_y, self.clock, self.rng)
+
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return lightning
+
+    def release(self, lightning):
+        self.in_use -= 1
+        self.free.append(lightning)
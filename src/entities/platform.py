@@ -1,5 +1,6 @@
 import pygame
 from constants import GREEN
+from draw_commands import PLATFORM_LAYER
 
 
 class Platform:
@@ -7,5 +8,8 @@ class Platform:
         self.rect = pygame.Rect(x, y, width, height)
         self.color = color
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, self.rect)
+    def draw(self, screen, offset=(0, 0)):
+        return pygame.draw.rect(screen, self.color, self.rect.move(offset))
+
+    def emit(self, commands, offset=(0, 0)):
+        commands.rect(PLATFORM_LAYER, self.color, self.rect.move(offset))
@@ -1,5 +1,13 @@
+import math
 import pygame
 from constants import PLAYER_SPEED, JUMP_POWER, GRAVITY, RED
+from draw_commands import PLAYER_LAYER
+
+# Most parts a fast step is split into; past that, moves are swept instead
+MAX_SUBSTEPS = 8
+
+# Below this many platforms scanning them all beats querying the spatial hash
+LINEAR_SCAN_THRESHOLD = 64
 
 
 class Player:
@@ -7,28 +15,58 @@ class Player:
         self.start_pos = pygame.Vector2(screen_width / 4, screen_height / 2)
         self.pos = self.start_pos.copy()
         self.vel = pygame.Vector2(0, 0)
-        self.size = 40
+        self.start_size = 40
+        self.size = self.start_size
         self.on_ground = False
         self.can_jump = False
 
-    def update(self, dt, keys, platforms, screen_width, screen_height):
+    def update(
+        self, dt, keys, platforms, world_width, world_height, platform_index=None
+    ):
         # Horizontal movement
         self.vel.x = 0
         if keys[pygame.K_a] and self.pos.x > self.size:
             self.vel.x = -PLAYER_SPEED
-        if keys[pygame.K_d] and self.pos.x < screen_width - self.size:
+        if keys[pygame.K_d] and self.pos.x < world_width - self.size:
             self.vel.x = PLAYER_SPEED
 
+        # Split fast steps so no part moves the player further than its own
+        # half size, which the overlap tests below can be trusted with
+        distance = max(abs(self.vel.x), abs(self.vel.y + GRAVITY * dt)) * dt
+        substeps = min(max(math.ceil(distance / max(self.size, 1)), 1), MAX_SUBSTEPS)
+        dt /= substeps
+        for _ in range(substeps):
+            self._move(dt, platforms, world_width, world_height, platform_index)
+
+    def _move(self, dt, platforms, world_width, world_height, platform_index):
         # Apply gravity
         self.vel.y += GRAVITY * dt
 
         # Move player horizontally
+        start_rect = self.get_rect()
         self.pos.x += self.vel.x * dt
 
+        # Past the substep limit a move can still jump over a platform, so stop
+        # at the first one swept through on the way
+        if abs(self.vel.x * dt) > self.size:
+            swept = start_rect.union(self.get_rect())
+            if self.vel.x > 0:
+                hit = self._first_hit(
+                    swept, platforms, platform_index, "left", start_rect.right, 1
+                )
+                if hit is not None:
+                    self.pos.x = hit.rect.left - self.size
+            else:
+                hit = self._first_hit(
+                    swept, platforms, platform_index, "right", start_rect.left, -1
+                )
+                if hit is not None:
+                    self.pos.x = hit.rect.right + self.size
+
         # Check horizontal collisions
         player_rect = self.get_rect()
 
-        for platform in platforms:
+        for platform in self._nearby_platforms(player_rect, platforms, platform_index):
             if player_rect.colliderect(platform.rect):
                 if self.vel.x > 0:  # Moving right
                     self.pos.x = platform.rect.left - self.size
@@ -36,14 +74,34 @@ class Player:
                     self.pos.x = platform.rect.right + self.size
 
         # Move player vertically
+        start_rect = self.get_rect()
         self.pos.y += self.vel.y * dt
+        self.on_ground = False
+
+        if abs(self.vel.y * dt) > self.size:
+            swept = start_rect.union(self.get_rect())
+            if self.vel.y > 0:
+                hit = self._first_hit(
+                    swept, platforms, platform_index, "top", start_rect.bottom, 1
+                )
+                if hit is not None:
+                    self.pos.y = hit.rect.top - self.size
+                    self.vel.y = 0
+                    self.on_ground = True
+                    self.can_jump = True
+            else:
+                hit = self._first_hit(
+                    swept, platforms, platform_index, "bottom", start_rect.top, -1
+                )
+                if hit is not None:
+                    self.pos.y = hit.rect.bottom + self.size
+                    self.vel.y = 0
 
         # Update player rectangle after vertical movement
         player_rect = self.get_rect()
 
         # Check vertical collisions and handle landing on platforms
-        self.on_ground = False
-        for platform in platforms:
+        for platform in self._nearby_platforms(player_rect, platforms, platform_index):
             if player_rect.colliderect(platform.rect):
                 if self.vel.y > 0:  # Falling
                     self.pos.y = platform.rect.top - self.size
@@ -54,20 +112,46 @@ class Player:
                     self.pos.y = platform.rect.bottom + self.size
                     self.vel.y = 0
 
-        # Screen boundaries check
+        # World boundaries check
         if self.pos.x < self.size:
             self.pos.x = self.size
-        if self.pos.x > screen_width - self.size:
-            self.pos.x = screen_width - self.size
+        if self.pos.x > world_width - self.size:
+            self.pos.x = world_width - self.size
         if self.pos.y < self.size:
             self.pos.y = self.size
             self.vel.y = 0
-        if self.pos.y > screen_height - self.size:
-            self.pos.y = screen_height - self.size
+        if self.pos.y > world_height - self.size:
+            self.pos.y = world_height - self.size
             self.vel.y = 0
             self.on_ground = True
             self.can_jump = True
 
+    def _first_hit(self, swept, platforms, platform_index, face, edge, direction):
+        """The platform whose face the player's leading edge reaches first
+
+        Only platforms entirely ahead of edge, the leading edge before the move,
+        count: ones the player already overlaps are left to the overlap tests.
+        direction is 1 when moving towards larger coordinates, -1 otherwise.
+        """
+        hit = None
+        nearest = None
+        for platform in self._nearby_platforms(swept, platforms, platform_index):
+            position = getattr(platform.rect, face)
+            if (position - edge) * direction < 0:
+                continue
+            if not swept.colliderect(platform.rect):
+                continue
+            if nearest is None or (position - nearest) * direction < 0:
+                hit = platform
+                nearest = position
+        return hit
+
+    def _nearby_platforms(self, player_rect, platforms, platform_index):
+        # With a spatial index only the platforms in the player's cells are tested
+        if platform_index is None or len(platforms) < LINEAR_SCAN_THRESHOLD:
+            return platforms
+        return platform_index.query(player_rect)
+
     def jump(self):
         if self.can_jump:
             self.vel.y = JUMP_POWER
@@ -76,11 +160,17 @@ class Player:
     def reset(self):
         self.pos = self.start_pos.copy()
         self.vel = pygame.Vector2(0, 0)
+        self.size = self.start_size  # Undo any black hole crushing
 
     def get_rect(self):
         return pygame.Rect(
             self.pos.x - self.size, self.pos.y - self.size, self.size * 2, self.size * 2
         )
 
-    def draw(self, screen):
-        pygame.draw.circle(screen, RED, (int(self.pos.x), int(self.pos.y)), self.size)
+    def draw(self, screen, offset=(0, 0)):
+        center = (int(self.pos.x) + offset[0], int(self.pos.y) + offset[1])
+        return pygame.draw.circle(screen, RED, center, self.size)
+
+    def emit(self, commands, offset=(0, 0)):
+        center = (int(self.pos.x) + offset[0], int(self.pos.y) + offset[1])
+        commands.circle(PLAYER_LAYER, RED, center, self.size)
@@ -0,0 +1,80 @@
+import os
+
+# stdout is kept for JSON results, so pygame must not print its banner there
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+from functools import partial
+from constants import FPS, SIM_DT
+from headless import random_actions
+from inputs import keys_from_mask
+from session import GameSession
+from utils import use_dummy_video
+
+DEFAULT_MAX_STEPS = FPS * 60 * 5  # five minutes of game time
+
+
+def run_episode(seed, max_steps=DEFAULT_MAX_STEPS, dt=SIM_DT):
+    """Play one headless episode with the random bot until the first death"""
+    session = GameSession(seed=seed)
+    actions = random_actions(random.Random(seed))
+    death_cause = None
+    steps = 0
+    while steps < max_steps and death_cause is None:
+        death_cause = session.step(dt, keys_from_mask(next(actions)))
+        steps += 1
+
+    return {
+        "seed": seed,
+        "steps": steps,
+        "survival_time": session.clock.time(),
+        "movement_counter": session.game_state.movement_counter,
+        "death_cause": death_cause,
+    }
+
+
+def run_episodes(seeds, workers=None, chunk_size=1, max_steps=DEFAULT_MAX_STEPS):
+    """Run one episode per seed on a process pool
+
+    Results are yielded as soon as each chunk of episodes finishes, in
+    completion order rather than seed order.
+    """
+    episode = partial(run_episode, max_steps=max_steps)
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(episode, seeds, chunksize=chunk_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless episodes in parallel")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: cores)"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=1, help="episodes handed to a worker at once"
+    )
+    parser.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS)
+    args = parser.parse_args()
+
+    use_dummy_video()
+    seeds = range(args.seed, args.seed + args.episodes)
+    start = time.perf_counter()
+    for result in run_episodes(seeds, args.workers, args.chunk_size, args.max_steps):
+        print(json.dumps(result), flush=True)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{args.episodes} episodes in {elapsed:.2f}s"
+        f" ({args.episodes / elapsed:.1f} episodes/s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
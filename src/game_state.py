@@ -1,14 +1,24 @@
 import random
-import time
 import pygame
 from constants import RESPAWN_DELAY
-from entities import Lightning
+from entities import LightningPool
+from scheduler import Scheduler, after
+from sim_clock import WallClock
+
+# Causes of death, matching the checks made every step
+DEATH_FIRE = "fire"
+DEATH_LIGHTNING = "lightning"
+DEATH_BLACK_HOLE = "black_hole"
+DEATH_OFF_SCREEN = "off_screen"
 
 
 class GameState:
-    def __init__(self):
+    def __init__(self, clock=None, rng=None):
+        self.clock = clock or WallClock()
+        self.rng = rng or random.Random()
         self.game_over = False
-        self.respawn_timer = 0
+        self.respawn_timer = 0.0
+        self.death_cause = None
         self.movement_counter = 0
         self.last_key_state = {
             pygame.K_a: False,
@@ -16,10 +26,15 @@ class GameState:
             pygame.K_SPACE: False,
         }
         self.lightning_strikes = []
-        self.start_time = time.time()
+        self.striking = []  # strikes flashing right now, the only ones that hit
+        self.lightning_pool = LightningPool(self.clock, self.rng)
+        # Strikes are only woken when they land and when they are done
+        self.timers = Scheduler()
+        self.lightning_timers = {}  # strike -> timer for its next transition
+        self.start_time = self.clock.time()
 
     def get_elapsed_time(self):
-        return time.time() - self.start_time
+        return self.clock.time() - self.start_time
 
     def check_movement_keys(self, keys, player_pos):
         # Check each movement key
@@ -27,10 +42,12 @@ class GameState:
             # If key is pressed now but wasn't pressed last frame
             if keys[key] and not self.last_key_state[key]:
                 # 1/8 chance to increment counter
-                if random.randint(1, 8) == 1:
+                if self.rng.randint(1, 8) == 1:
                     self.movement_counter += 1
                     # Create a lightning strike at player's current position
-                    self.lightning_strikes.append(Lightning(player_pos.x, player_pos.y))
+                    self.add_lightning(
+                        self.lightning_pool.acquire(player_pos.x, player_pos.y)
+                    )
 
         # Update last key state
         self.last_key_state[pygame.K_a] = keys[pygame.K_a]
@@ -42,31 +59,79 @@ class GameState:
         return player_rect.colliderect(fire_pit.rect)
 
     def check_lightning_collisions(self, player_pos):
-        for lightning in self.lightning_strikes[:]:
-            if lightning.check_player_hit(player_pos):
-                return True
+        # Strikes still warning cannot hit, so only the flashing ones are tested
+        current_time = self.clock.time()
+        x, y = player_pos
+        for lightning in self.striking:
+            if current_time <= lightning.end_time:
+                dx = x - lightning.target_x
+                dy = y - lightning.target_y
+                radius = lightning.hit_radius
+                if dx * dx + dy * dy < radius * radius:
+                    return True
         return False
 
     def check_black_hole_collision(self, player, black_hole):
         # Check if player is being crushed by black hole
-        if player in [e["entity"] for e in black_hole.crushing_entities]:
+        if player in black_hole.crushing_entities:
             return True
         # Check if player is completely inside black hole
         distance = (player.pos - black_hole.pos).length()
         return distance < black_hole.radius - player.size
 
+    def add_lightning(self, lightning):
+        """Add a live strike and schedule its next transition"""
+        self.lightning_strikes.append(lightning)
+        if lightning.active:
+            self.striking.append(lightning)
+            timer = self.timers.schedule(
+                after(lightning.end_time), self._end_lightning, lightning
+            )
+        else:
+            timer = self.timers.schedule(
+                lightning.strike_time, self._land_lightning, lightning
+            )
+        self.lightning_timers[lightning] = timer
+
+    def _land_lightning(self, current_time, lightning):
+        lightning.strike(current_time)
+        self.striking.append(lightning)
+        self.lightning_timers[lightning] = self.timers.schedule(
+            after(lightning.end_time), self._end_lightning, lightning
+        )
+
+    def _end_lightning(self, current_time, lightning):
+        # Every strike warns and flashes for as long, so they end in the order
+        # they were called and these removals find them at the front
+        self.striking.remove(lightning)
+        self.lightning_strikes.remove(lightning)
+        del self.lightning_timers[lightning]
+        self.lightning_pool.release(lightning)
+
     def update_lightnings(self, current_time):
-        for i in range(len(self.lightning_strikes) - 1, -1, -1):
-            if not self.lightning_strikes[i].update(current_time):
-                self.lightning_strikes.pop(i)
+        # Land and end the strikes whose time has come, leave the rest alone
+        self.timers.run_due(current_time)
+
+    def clear_lightnings(self):
+        for lightning in self.lightning_strikes:
+            self.timers.cancel(self.lightning_timers[lightning])
+            self.lightning_pool.release(lightning)
+        self.lightning_strikes.clear()
+        self.striking.clear()
+        self.lightning_timers.clear()
 
-    def handle_death(self):
+    def handle_death(self, cause=None):
+        # Keep the first cause if several checks fail on the same frame
+        if not self.game_over:
+            self.death_cause = cause
         self.game_over = True
-        self.respawn_timer = time.time() + RESPAWN_DELAY
+        self.respawn_timer = self.clock.time() + RESPAWN_DELAY
 
     def check_respawn(self, player):
+        # Not a timer: respawning clears the strikes, so it has to come before
+        # any of theirs that fall due in the same step
         if self.game_over:
-            current_time = time.time()
+            current_time = self.clock.time()
             if current_time > self.respawn_timer:
                 self.restart_game(player)
                 return True
@@ -75,5 +140,6 @@ class GameState:
     def restart_game(self, player):
         player.reset()
         self.game_over = False
-        self.lightning_strikes = []
-        self.start_time = time.time()  # Reset the start time for black hole
+        self.death_cause = None
+        self.clear_lightnings()
+        self.start_time = self.clock.time()  # Reset the start time for black hole
@@ -0,0 +1,47 @@
+import argparse
+import random
+import time
+from constants import SIM_DT
+from inputs import keys_from_mask, KEY_LEFT, KEY_RIGHT, KEY_JUMP
+from session import GameSession
+from utils import use_dummy_video
+
+
+def random_actions(rng, hold_steps=15):
+    """Yield key masks for a bot that mashes A, D and SPACE at random"""
+    while True:
+        mask = 0
+        if rng.random() < 0.5:
+            mask |= rng.choice((KEY_LEFT, KEY_RIGHT))
+        if rng.random() < 0.3:
+            mask |= KEY_JUMP
+        for _ in range(rng.randint(1, hold_steps)):
+            yield mask
+
+
+def run_headless(steps, dt=SIM_DT, seed=None):
+    """Step a session without drawing or frame limiting, return steps per second"""
+    session = GameSession(seed=seed)
+    actions = random_actions(random.Random(seed))
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        session.step(dt, keys_from_mask(next(actions)))
+    elapsed = time.perf_counter() - start
+
+    return steps / elapsed if elapsed > 0 else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game simulation headless")
+    parser.add_argument("--steps", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    use_dummy_video()
+    steps_per_second = run_headless(args.steps, seed=args.seed)
+    print(f"{args.steps} steps at {steps_per_second:,.0f} steps/s")
+
+
+if __name__ == "__main__":
+    main()
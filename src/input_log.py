@@ -0,0 +1,145 @@
+import argparse
+import struct
+import time
+from constants import SIM_DT
+from inputs import keys_from_mask
+from level_format import Level
+from session import GameSession
+from utils import use_dummy_video
+
+# File layout, all little-endian: the header and the level path, then one run
+# record per stretch of steps with the same keys, appended as play goes on,
+# and finally an end marker run followed by the step count and state hash
+MAGIC = b"DUPR"
+LOG_VERSION = 2  # bump when a record layout or what state_hash covers changes
+HEADER = struct.Struct("<4sHqH")  # magic, version, seed, level path length
+RUN = struct.Struct("<BH")  # key mask, steps held
+FOOTER = struct.Struct("<Q16s")  # steps, state hash
+END_MASK = 0xFF
+MAX_RUN = 0xFFFF
+
+
+class InputRecorder:
+    """Appends the key mask of every simulation step to an input log
+
+    Steps with the same mask are run-length encoded, so a run of idle frames
+    costs three bytes however long it is. Call close() with the session at the
+    end to write the step count and its state hash for replays to check.
+    """
+
+    def __init__(self, path, seed, level_path=None):
+        level = (level_path or "").encode()
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, LOG_VERSION, seed, len(level)) + level)
+        self.mask = None
+        self.count = 0
+        self.steps = 0
+
+    def _write_run(self):
+        if self.count:
+            self.file.write(RUN.pack(self.mask, self.count))
+
+    def record(self, mask):
+        if mask != self.mask or self.count == MAX_RUN:
+            self._write_run()
+            self.mask = mask
+            self.count = 0
+        self.count += 1
+        self.steps += 1
+
+    def close(self, session=None):
+        self._write_run()
+        self.count = 0
+        if session is not None:
+            self.file.write(RUN.pack(END_MASK, 0))
+            digest = bytes.fromhex(session.state_hash())
+            self.file.write(FOOTER.pack(self.steps, digest))
+        self.file.close()
+
+
+class InputLog:
+    """An input log read back: seed, level path, runs and the recorded result
+
+    steps and state_hash are None when the recording was cut off before
+    close(), in which case the runs written so far are still replayable.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError("input log is too short for its header")
+        magic, version, self.seed, level_length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"not an input log (magic {magic!r})")
+        if version != LOG_VERSION:
+            raise ValueError(f"unsupported input log version {version}")
+        offset = HEADER.size
+        self.level_path = data[offset : offset + level_length].decode() or None
+        offset += level_length
+
+        self.runs = []
+        self.steps = self.state_hash = None
+        while offset + RUN.size <= len(data):
+            mask, count = RUN.unpack_from(data, offset)
+            offset += RUN.size
+            if mask == END_MASK:
+                if offset + FOOTER.size <= len(data):
+                    self.steps, digest = FOOTER.unpack_from(data, offset)
+                    self.state_hash = digest.hex()
+                break
+            self.runs.append((mask, count))
+
+    def masks(self):
+        for mask, count in self.runs:
+            for _ in range(count):
+                yield mask
+
+
+def replay(log, dt=SIM_DT):
+    """Step a fresh session through the log's inputs, return the session"""
+    level = Level.open(log.level_path) if log.level_path else None
+    session = GameSession(seed=log.seed, level=level)
+    # One key state per distinct mask, the session only reads them
+    key_states = {}
+    step = session.step
+    for mask, count in log.runs:
+        keys = key_states.get(mask)
+        if keys is None:
+            keys = key_states[mask] = keys_from_mask(mask)
+        for _ in range(count):
+            step(dt, keys)
+    return session
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay an input log headless and check it ends the same way"
+    )
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    use_dummy_video()
+    log = InputLog(args.path)
+    steps = sum(count for _, count in log.runs)
+    start = time.perf_counter()
+    session = replay(log)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{args.path}: seed {log.seed}, {steps} steps"
+        f" ({steps * SIM_DT:.0f}s of play) in {len(log.runs)} runs,"
+        f" replayed in {elapsed:.2f}s"
+    )
+    state_hash = session.state_hash()
+    if log.state_hash is None:
+        print(f"no recorded end state (cut off?), replay ended at {state_hash}")
+    elif log.steps != steps or log.state_hash != state_hash:
+        print(f"DIVERGED: recorded {log.state_hash}, replay ended at {state_hash}")
+        raise SystemExit(1)
+    else:
+        print(f"matches the recording ({state_hash})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import pygame
+
+# Bitmask of the keys the simulation reads each step
+KEY_LEFT = 1  # A
+KEY_RIGHT = 2  # D
+KEY_JUMP = 4  # SPACE
+KEY_RESTART = 8  # R
+
+KEY_BITS = (
+    (pygame.K_a, KEY_LEFT),
+    (pygame.K_d, KEY_RIGHT),
+    (pygame.K_SPACE, KEY_JUMP),
+    (pygame.K_r, KEY_RESTART),
+)
+
+
+def keys_from_mask(mask):
+    """Return a key state that can be indexed like pygame.key.get_pressed()"""
+    return {key: bool(mask & bit) for key, bit in KEY_BITS}
+
+
+def mask_from_keys(keys):
+    """Return the bitmask of the simulation keys held in a get_pressed() state"""
+    mask = 0
+    for key, bit in KEY_BITS:
+        if keys[key]:
+            mask |= bit
+    return mask
@@ -0,0 +1,274 @@
+import argparse
+import mmap
+import random
+import struct
+import sys
+from functools import lru_cache
+from operator import add
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+
+# File layout, all little-endian: the header, then every platform record, every
+# fire pit, every spawn point and finally the black hole parameters
+MAGIC = b"DUPL"
+LEVEL_VERSION = 1  # bump when a record layout changes
+HEADER = struct.Struct("<4sHHIIII")  # magic, version, reserved, record counts
+PLATFORM = struct.Struct("<iiiii")  # x, y, width, height, 0xRRGGBB color
+FIRE_PIT = struct.Struct("<iiii")  # x, y, width, height
+SPAWN = struct.Struct("<ii")  # x, y
+BLACK_HOLE = struct.Struct("<dddd")  # radius, max radius, force, max force
+
+# Integer records are read straight out of the mapping as native ints, which
+# only matches the file on little-endian machines
+_CAST_INTS = sys.byteorder == "little" and struct.calcsize("i") == 4
+
+
+def _color_to_int(color):
+    r, g, b = color[:3]
+    return r << 16 | g << 8 | b
+
+
+def _int_to_color(value):
+    return (value >> 16 & 0xFF, value >> 8 & 0xFF, value & 0xFF)
+
+
+def encode_level(platforms, fire_pits, spawns, black_hole_params=None):
+    """Pack level records into the binary level format, return the bytes
+
+    platforms are (x, y, width, height, color) tuples, fire_pits are rects
+    (the game has one fire pit, so Level only opens files with at most one),
+    spawns are (x, y) points and black_hole_params is (radius, max_radius,
+    attraction_force, max_attraction) or None for the engine defaults.
+    """
+    black_holes = [] if black_hole_params is None else [black_hole_params]
+    parts = [
+        HEADER.pack(
+            MAGIC,
+            LEVEL_VERSION,
+            0,
+            len(platforms),
+            len(fire_pits),
+            len(spawns),
+            len(black_holes),
+        )
+    ]
+    for x, y, width, height, color in platforms:
+        parts.append(PLATFORM.pack(x, y, width, height, _color_to_int(color)))
+    for x, y, width, height in fire_pits:
+        parts.append(FIRE_PIT.pack(x, y, width, height))
+    for x, y in spawns:
+        parts.append(SPAWN.pack(int(x), int(y)))
+    for params in black_holes:
+        parts.append(BLACK_HOLE.pack(*params))
+    return b"".join(parts)
+
+
+def encode_builtin_level(width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+    """Convert the level defined in utils and the entity defaults to level bytes"""
+    from entities import BlackHole, Player
+    from utils import create_game_platforms, create_fire_pit
+
+    platforms = [(*p.rect, p.color) for p in create_game_platforms()]
+    spawn = Player(width, height).start_pos
+    black_hole = BlackHole(width, height, random.Random(0))
+    return encode_level(
+        platforms,
+        [tuple(create_fire_pit().rect)],
+        [(spawn.x, spawn.y)],
+        (
+            black_hole.radius,
+            black_hole.max_radius,
+            black_hole.attraction_force,
+            black_hole.max_attraction,
+        ),
+    )
+
+
+class Level:
+    """Read-only view of a level in the binary level format
+
+    The records stay in the buffer (a file mapping for Level.open) and are
+    never copied out; sessions build their entities from them once and then
+    reset those entities from the records on every respawn. A Level holds no
+    game state, so any number of sessions can share one.
+
+    The live platforms are Platform objects around pygame Rects, which cannot
+    be backed by the mapping, so building them costs what calling the
+    constructors does. The file saves the respawns, which reset the built
+    platforms in place, and streaming, which only builds the chunks in use.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        view = memoryview(buffer)
+        if len(view) < HEADER.size:
+            raise ValueError("level file is too short for its header")
+        magic, version, _, platforms, fire_pits, spawns, black_holes = (
+            HEADER.unpack_from(view)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"not a level file (magic {magic!r})")
+        if version != LEVEL_VERSION:
+            raise ValueError(f"unsupported level version {version}")
+        if fire_pits > 1:
+            raise ValueError(f"level has {fire_pits} fire pits, the game has one")
+
+        size = (
+            HEADER.size
+            + PLATFORM.size * platforms
+            + FIRE_PIT.size * fire_pits
+            + SPAWN.size * spawns
+            + BLACK_HOLE.size * black_holes
+        )
+        if len(view) < size:
+            raise ValueError("level file is truncated")
+
+        offset = HEADER.size
+        self.platform_count = platforms
+        self._platforms = self._section(view, offset, PLATFORM, platforms)
+        offset += PLATFORM.size * platforms
+        self.fire_pit_count = fire_pits
+        self._fire_pits = self._section(view, offset, FIRE_PIT, fire_pits)
+        offset += FIRE_PIT.size * fire_pits
+        self.spawns = [
+            SPAWN.unpack_from(view, offset + SPAWN.size * i) for i in range(spawns)
+        ]
+        offset += SPAWN.size * spawns
+        self.black_hole_params = None
+        if black_holes:
+            self.black_hole_params = BLACK_HOLE.unpack_from(view, offset)
+        self._file = None
+
+    @staticmethod
+    def _section(view, offset, record, count):
+        # A flat sequence of ints, record.size // 4 per record
+        section = view[offset : offset + record.size * count]
+        if _CAST_INTS:
+            return section.cast("i")
+        return [value for values in record.iter_unpack(section) for value in values]
+
+    @classmethod
+    def open(cls, path):
+        """Map a level file read-only"""
+        f = open(path, "rb")
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            f.close()
+            raise
+        level = cls(mapping)
+        level._file = f
+        return level
+
+    def close(self):
+        # Views into the mapping have to go before it can be closed
+        self._platforms = self._fire_pits = None
+        if self._file is not None:
+            self.buffer.close()
+            self._file.close()
+            self._file = None
+
+    def _platform_columns(self):
+        # Strided views over the records, no data is copied
+        records = self._platforms
+        return [records[field::5] for field in range(5)]
+
+    def bounds(self):
+        """Return the right and bottom edges of everything in the level"""
+        xs, ys, widths, heights, _ = self._platform_columns()
+        right = max(map(add, xs, widths), default=0)
+        bottom = max(map(add, ys, heights), default=0)
+        if self.fire_pit_count:
+            x, y, width, height = self.fire_pit_rect()
+            right = max(right, x + width)
+            bottom = max(bottom, y + height)
+        return right, bottom
+
+    def widest_platform(self):
+        return max(self._platforms[2::5], default=0)
+
+    def platform_chunks(self, chunk_width):
+        """Group platform record numbers by the chunk their left edge is in"""
+        chunks = {}
+        for i, x in enumerate(self._platforms[0::5]):
+            chunk = chunks.get(x // chunk_width)
+            if chunk is None:
+                chunks[x // chunk_width] = [i]
+            else:
+                chunk.append(i)
+        return chunks
+
+    def build_platforms(self, indices=None):
+        """Create one Platform per platform record, or per record in indices"""
+        from entities import Platform
+
+        if indices is None:
+            columns = self._platform_columns()
+            rows = zip(*columns)
+            used_colors = set(columns[4])
+        else:
+            records = self._platforms
+            rows = [records[i * 5 : i * 5 + 5] for i in indices]
+            used_colors = {row[4] for row in rows}
+
+        # Levels use a handful of colors, decode each once
+        colors = {color: _int_to_color(color) for color in used_colors}
+        return [
+            Platform(x, y, width, height, colors[color])
+            for x, y, width, height, color in rows
+        ]
+
+    def reset_platforms(self, platforms, indices=None):
+        """Move and resize platforms from build_platforms back to their records"""
+        if indices is None:
+            xs, ys, widths, heights, _ = self._platform_columns()
+            rows = zip(platforms, xs, ys, widths, heights)
+        else:
+            records = self._platforms
+            rows = (
+                (platform, *records[i * 5 : i * 5 + 4])
+                for platform, i in zip(platforms, indices)
+            )
+        for platform, x, y, width, height in rows:
+            platform.rect.update(x, y, width, height)
+
+    def fire_pit_rect(self):
+        # The engine always has a fire pit; a level without one gets an empty one
+        if not self.fire_pit_count:
+            return (0, 0, 0, 0)
+        return tuple(self._fire_pits[:4])
+
+    def spawn_point(self, index=0):
+        return self.spawns[index] if index < len(self.spawns) else None
+
+
+@lru_cache(maxsize=None)
+def builtin_level(width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+    """The level from utils, converted once and shared by every session"""
+    return Level(encode_builtin_level(width, height))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write the built-in level as a level file, or describe one"
+    )
+    parser.add_argument("path")
+    parser.add_argument(
+        "--info", action="store_true", help="print what an existing file holds"
+    )
+    args = parser.parse_args()
+
+    if not args.info:
+        with open(args.path, "wb") as f:
+            f.write(encode_builtin_level())
+
+    level = Level.open(args.path)
+    print(
+        f"{args.path}: {level.platform_count} platforms,"
+        f" {level.fire_pit_count} fire pits, {len(level.spawns)} spawn points,"
+        f" black hole {level.black_hole_params or 'defaults'}"
+    )
+    level.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,93 @@
-import pygame
+import argparse
+import random
 import time
-from constants import PURPLE, WHITE, SCREEN_WIDTH, SCREEN_HEIGHT, FPS
-from entities import Player, Lightning, BlackHole
-from game_state import GameState
-from utils import (
-    init_pygame,
-    create_game_platforms,
-    create_fire_pit,
-    render_text,
-    render_game_over,
-    render_counter,
-)
-
-
-def main():
+import pygame
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, SIM_DT, MAX_FRAME_TIME
+from input_log import InputRecorder
+from inputs import keys_from_mask, mask_from_keys
+from level_format import Level
+from profiler import FrameProfiler
+from renderer import Renderer, DirtyRectRenderer, LayeredRenderer, CommandRenderer
+from session import GameSession
+from sim_thread import SimulationThread, InterpolatedView
+from utils import init_pygame, get_font
+
+
+def main(
+    seed=None,
+    dirty_rects=False,
+    max_frames=None,
+    profile=False,
+    trace_path=None,
+    level_path=None,
+    record_path=None,
+    threaded=False,
+    fps=FPS,
+    layered=False,
+    commands=False,
+):
     # Initialize pygame
     screen, clock = init_pygame(SCREEN_WIDTH, SCREEN_HEIGHT)
     pygame.display.set_caption("Normal Day in Coventry")
 
-    # Create game objects
-    player = Player(SCREEN_WIDTH, SCREEN_HEIGHT)
-    platforms = create_game_platforms()
-    fire_pit = create_fire_pit()
-    black_hole = BlackHole(SCREEN_WIDTH, SCREEN_HEIGHT)
-    game_state = GameState()
+    # Per-phase timings, F3 toggles the overlay
+    profiler = FrameProfiler(enabled=profile or trace_path is not None)
+
+    # Record every step's keys so the game can be replayed with input_log.py
+    recorder = None
+    if record_path is not None:
+        if seed is None:
+            seed = random.randrange(2**31)
+        recorder = InputRecorder(record_path, seed, level_path)
+
+    # Create game objects, from a level file if one was given
+    level = Level.open(level_path) if level_path else None
+    session = GameSession(
+        SCREEN_WIDTH,
+        SCREEN_HEIGHT,
+        seed,
+        None if threaded else profiler,  # the profiler times the draw thread
+        level,
+    )
+
+    # Step the simulation on its own thread and draw between its last states
+    simulation = view = None
+    if threaded:
+        simulation = SimulationThread(session, recorder=recorder)
+        view = InterpolatedView(session)
+        simulation.start()
 
     # Main game font
-    game_font = pygame.font.SysFont(None, 48)
-    counter_font = pygame.font.SysFont(None, 36)
+    game_font = get_font(48)
+    counter_font = get_font(36)
+    overlay_font = get_font(24)
+
+    # Repaint everything each frame, only what changed, or blit a cached layer
+    # of the static scenery and draw the rest over it; or repaint everything
+    # from a culled and batched buffer of draw commands
+    renderer_class = Renderer
+    if dirty_rects:
+        renderer_class = DirtyRectRenderer
+    elif layered:
+        renderer_class = LayeredRenderer
+    elif commands:
+        renderer_class = CommandRenderer
+    renderer = renderer_class(screen, game_font, counter_font)
 
     # Game loop
     running = True
-    dt = 0
+    accumulator = 0
+    frames = 0
 
     while running:
+        profiler.start_frame()
+
         # Poll for events
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-            if event.type == pygame.KEYDOWN:
-                if (
-                    event.key == pygame.K_SPACE
-                    and player.can_jump
-                    and not game_state.game_over
-                ):
-                    player.jump()
-                if event.key == pygame.K_r:  # Restart with R key
-                    game_state.restart_game(player)
-                    platforms = create_game_platforms()  # Reset platforms
-                    fire_pit = create_fire_pit()  # Reset fire pit
-                    black_hole = BlackHole(
-                        SCREEN_WIDTH, SCREEN_HEIGHT
-                    )  # New black hole
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle_overlay()
 
         # Get pressed keys
         keys = pygame.key.get_pressed()
@@ -60,86 +96,106 @@ def main():
         if keys[pygame.K_q]:
             running = False
 
-        # Check for movement counter increment
-        if not game_state.game_over:
-            game_state.check_movement_keys(keys, player.pos)
+        # The simulation only sees the keys an input log can hold
+        mask = mask_from_keys(keys)
+        step_keys = keys_from_mask(mask)
+        profiler.mark("events")
 
-        # Handle game over and respawn
-        if game_state.game_over:
-            if game_state.check_respawn(player):
-                platforms = create_game_platforms()  # Reset platforms
-                fire_pit = create_fire_pit()  # Reset fire pit
-                black_hole = BlackHole(SCREEN_WIDTH, SCREEN_HEIGHT)  # New black hole
+        if simulation is not None:
+            # The simulation thread picks the keys up on its next step
+            simulation.mask = mask
+            drawn = view.update(simulation.frames, time.perf_counter())
         else:
-            # Update black hole
-            black_hole.update(dt, player, platforms, fire_pit)
-
-            # Update player
-            player.update(dt, keys, platforms, SCREEN_WIDTH, SCREEN_HEIGHT)
-
-            # Check collisions
-            if game_state.check_fire_collision(player, fire_pit):
-                game_state.handle_death()
-
-            if game_state.check_lightning_collisions(player.pos):
-                game_state.handle_death()
-
-            # Check black hole collision
-            if game_state.check_black_hole_collision(player, black_hole):
-                game_state.handle_death()
-
-            # Check if player goes off the screen (sucked by black hole)
-            if (
-                player.pos.y < -player.size * 2
-                or player.pos.y > SCREEN_HEIGHT + player.size * 2
-                or player.pos.x < -player.size * 2
-                or player.pos.x > SCREEN_WIDTH + player.size * 2
-            ):
-                game_state.handle_death()
-
-        # Update fire animation
-        fire_pit.update(dt)
-
-        # Update lightning strikes
-        current_time = time.time()
-        game_state.update_lightnings(current_time)
-
-        # Fill the screen with background color
-        screen.fill(PURPLE)
-
-        # Draw platforms
-        for platform in platforms:
-            platform.draw(screen)
-
-        # Draw fire pit
-        fire_pit.draw(screen)
-
-        # Draw black hole
-        black_hole.draw(screen)
-
-        # Draw lightning strikes
-        for lightning in game_state.lightning_strikes:
-            lightning.draw(screen)
-
-        # Draw player (unless game over)
-        if not game_state.game_over:
-            player.draw(screen)
-
-        # Show game over message
-        if game_state.game_over:
-            render_game_over(screen, game_font, SCREEN_WIDTH, SCREEN_HEIGHT)
-
-        # Draw movement counter in top right
-        render_counter(screen, counter_font, game_state.movement_counter, SCREEN_WIDTH)
-
-        # Flip the display to put work on screen
-        pygame.display.flip()
+            # Run as many fixed simulation steps as real time has covered
+            # (jump on SPACE, restart with R)
+            while accumulator >= SIM_DT:
+                session.step(SIM_DT, step_keys)
+                if recorder is not None:
+                    recorder.record(mask)
+                accumulator -= SIM_DT
+            drawn = session
+
+        # Draw the frame
+        renderer.draw(drawn)
+        profiler.mark("draw")
+        overlay_rect = profiler.draw_overlay(screen, overlay_font)
+        if overlay_rect:
+            renderer.add_dirty(overlay_rect)
+        renderer.present()
+        profiler.mark("present")
+
+        # Stop after a fixed number of frames (used by the startup benchmark)
+        frames += 1
+        if max_frames is not None and frames >= max_frames:
+            running = False
 
         # Limit FPS
-        dt = clock.tick(FPS) / 1000
-
+        accumulator += min(clock.tick(fps) / 1000, MAX_FRAME_TIME)
+        profiler.mark("tick")
+
+    if simulation is not None:
+        simulation.stop()
+    if trace_path is not None:
+        profiler.write_chrome_trace(trace_path)
+    if recorder is not None:
+        recorder.close(session)
     pygame.quit()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Normal Day in Coventry")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--dirty-rects",
+        action="store_true",
+        help="only repaint the parts of the screen that changed",
+    )
+    parser.add_argument(
+        "--layered",
+        action="store_true",
+        help="cache the background and platforms, redraw them only where they move",
+    )
+    parser.add_argument(
+        "--commands",
+        action="store_true",
+        help="draw through a buffer of culled and batched draw commands",
+    )
+    parser.add_argument(
+        "--frames", type=int, default=None, help="quit after this many frames"
+    )
+    parser.add_argument(
+        "--profile", action="store_true", help="record per-phase frame timings"
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        help="write a Chrome trace of the last frames on exit",
+    )
+    parser.add_argument(
+        "--level", metavar="PATH", help="play a level file instead of the built-in one"
+    )
+    parser.add_argument(
+        "--record", metavar="PATH", help="write every step's keys to an input log"
+    )
+    parser.add_argument(
+        "--threaded",
+        action="store_true",
+        help="simulate on its own thread and interpolate what is drawn",
+    )
+    parser.add_argument(
+        "--fps", type=int, default=FPS, help="frame rate cap for drawing"
+    )
+    args = parser.parse_args()
+    main(
+        seed=args.seed,
+        dirty_rects=args.dirty_rects,
+        max_frames=args.frames,
+        profile=args.profile,
+        trace_path=args.trace,
+        level_path=args.level,
+        record_path=args.record,
+        threaded=args.threaded,
+        fps=args.fps,
+        layered=args.layered,
+        commands=args.commands,
+    )
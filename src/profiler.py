@@ -0,0 +1,132 @@
+import json
+import time
+from array import array
+import pygame
+from constants import BLACK, WHITE
+
+# How often the overlay's percentiles are recomputed, in frames
+OVERLAY_REFRESH_FRAMES = 30
+
+
+class PhaseTimings:
+    """Ring buffer of (start, duration) pairs in nanoseconds for one phase"""
+
+    def __init__(self, capacity):
+        self.starts = array("q", bytes(8 * capacity))
+        self.durations = array("q", bytes(8 * capacity))
+        self.capacity = capacity
+        self.count = 0  # total recorded, the ring holds the last `capacity`
+
+    def record(self, start, duration):
+        i = self.count % self.capacity
+        self.starts[i] = start
+        self.durations[i] = duration
+        self.count += 1
+
+    def samples(self):
+        """Return the (start, duration) pairs held, oldest first"""
+        n = min(self.count, self.capacity)
+        first = self.count - n
+        return [
+            (self.starts[j % self.capacity], self.durations[j % self.capacity])
+            for j in range(first, self.count)
+        ]
+
+    def percentile(self, fraction):
+        durations = sorted(self.durations[: min(self.count, self.capacity)])
+        if not durations:
+            return 0
+        return durations[min(int(fraction * len(durations)), len(durations) - 1)]
+
+
+class FrameProfiler:
+    """Per-phase timings of the game loop, kept in rolling ring buffers
+
+    Call start_frame() at the top of the loop and mark(phase) at the end of
+    each phase; the time since the previous mark is charged to that phase.
+    While disabled both are a single attribute check, so the calls can stay in
+    the loop permanently.
+    """
+
+    def __init__(self, enabled=False, capacity=600):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.phases = {}  # phase name -> PhaseTimings, in first-seen order
+        self.last_mark = 0
+        self.overlay_visible = False
+        self.overlay_lines = []
+        self.frames = 0
+
+    def start_frame(self):
+        if not self.enabled:
+            return
+        self.frames += 1
+        self.last_mark = time.perf_counter_ns()
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        timings = self.phases.get(phase)
+        if timings is None:
+            timings = self.phases[phase] = PhaseTimings(self.capacity)
+        timings.record(self.last_mark, now - self.last_mark)
+        self.last_mark = now
+
+    def toggle_overlay(self):
+        # Showing the overlay needs timings, so it turns recording on too
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible:
+            self.enabled = True
+            self.overlay_lines = []
+
+    def summary(self):
+        """Return [(phase, p50_ms, p99_ms)] over the samples held"""
+        return [
+            (phase, t.percentile(0.5) / 1e6, t.percentile(0.99) / 1e6)
+            for phase, t in self.phases.items()
+        ]
+
+    def draw_overlay(self, screen, font):
+        """Draw p50/p99 per phase in the top left, return the area covered"""
+        if not self.overlay_visible:
+            return None
+
+        if not self.overlay_lines or self.frames % OVERLAY_REFRESH_FRAMES == 0:
+            self.overlay_lines = [
+                font.render(f"{phase}: p50 {p50:.2f} ms, p99 {p99:.2f} ms", True, WHITE)
+                for phase, p50, p99 in self.summary()
+            ]
+        if not self.overlay_lines:
+            return None
+
+        line_height = font.get_linesize()
+        width = max(line.get_width() for line in self.overlay_lines) + 20
+        bounds = pygame.Rect(10, 10, width, line_height * len(self.overlay_lines) + 20)
+        screen.fill(BLACK, bounds)
+        for i, line in enumerate(self.overlay_lines):
+            screen.blit(line, (bounds.x + 10, bounds.y + 10 + i * line_height))
+        return bounds
+
+    def chrome_trace(self):
+        """Return the held samples as a Chrome trace-event document"""
+        events = []
+        for phase, timings in self.phases.items():
+            for start, duration in timings.samples():
+                events.append(
+                    {
+                        "name": phase,
+                        "ph": "X",
+                        "ts": start / 1000,
+                        "dur": duration / 1000,
+                        "pid": 1,
+                        "tid": 1,
+                    }
+                )
+        events.sort(key=lambda event: event["ts"])
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path):
+        """Write the trace for chrome://tracing or Perfetto"""
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
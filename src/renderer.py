@@ -0,0 +1,396 @@
+import pygame
+from constants import PURPLE
+from draw_commands import DrawCommands, BACKGROUND_LAYER, HUD_LAYER
+from utils import render_game_over, render_counter, game_over_texts, counter_text
+
+# Past this many areas to repaint in a frame (the black hole dragging a crowd
+# of platforms), the layered renderer paints their bounding box once instead
+# and the dirty-rect renderer repaints the whole screen
+MAX_REPAINT_AREAS = 32
+
+# Dirty areas covering more of the screen than this are repainted in full
+MAX_DIRTY_FRACTION = 0.5
+
+# Once this much of its layer changed in a frame, the layered renderer draws
+# the scenery straight to the screen for DIRECT_FRAMES frames (two seconds)
+# before painting the layer afresh and trying it again
+MAX_LAYER_CHANGE_FRACTION = 0.25
+DIRECT_FRAMES = 120
+
+
+def merge_rects(rects, bounds):
+    """Clip rects to bounds and union the ones that overlap until none do"""
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if not rect:
+            continue
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class Renderer:
+    """Draws a session by repainting the whole screen and flipping it
+
+    Call draw() then present(); anything drawn on top in between (like the
+    profiler overlay) should be reported with add_dirty(). static_draw_calls
+    counts the fills, blits and draws the last frame spent on the background,
+    the platforms and the fire pit's base.
+    """
+
+    def __init__(self, screen, game_font, counter_font):
+        self.screen = screen
+        self.game_font = game_font
+        self.counter_font = counter_font
+        self.static_draw_calls = 0
+
+    def draw_platforms(self, platforms, offset=(0, 0), surface=None):
+        surface = surface or self.screen
+        for platform in platforms:
+            platform.draw(surface, offset)
+        self.static_draw_calls += len(platforms)
+
+    def visible_platforms(self, session):
+        camera = session.camera
+        if camera.rect.contains(camera.world_rect):
+            return session.platforms  # one-screen level, nothing to cull
+        return session.platform_index.query(camera.rect)
+
+    def draw_dynamic(self, session):
+        """Draw everything except the platforms, return the areas drawn"""
+        screen = self.screen
+        game_state = session.game_state
+        width, height = screen.get_size()
+        offset = session.camera.offset
+
+        rects = [
+            self._draw_fire_pit(session.fire_pit, offset),
+            session.black_hole.draw(screen, offset),
+        ]
+        for lightning in game_state.lightning_strikes:
+            rects.append(lightning.draw(screen, offset))
+
+        # Draw player (unless game over) or the game over message
+        if not game_state.game_over:
+            rects.append(session.player.draw(screen, offset))
+        else:
+            rects.append(render_game_over(screen, self.game_font, width, height))
+
+        # Draw movement counter in top right
+        counter = game_state.movement_counter
+        rects.append(render_counter(screen, self.counter_font, counter, width))
+        return [rect for rect in rects if rect]
+
+    def _draw_fire_pit(self, fire_pit, offset):
+        self.static_draw_calls += 1  # the base
+        return fire_pit.draw(self.screen, offset)
+
+    def draw(self, session):
+        self.static_draw_calls = 1
+        self.screen.fill(PURPLE)
+        self.draw_platforms(self.visible_platforms(session), session.camera.offset)
+        self.draw_dynamic(session)
+
+    def add_dirty(self, rect):
+        pass  # the whole screen is repainted anyway
+
+    def present(self):
+        pygame.display.flip()
+
+
+class DirtyRectRenderer(Renderer):
+    """Repaints only the parts of the screen that changed since the last frame
+
+    Platforms are only repainted where something moved over them or where a
+    platform itself moved; the small dynamic entities are redrawn every frame
+    and only the touched rects are pushed with pygame.display.update.
+    Overlapping areas are merged first. Frames where the camera scrolled, or
+    whose areas are too many or cover too much of the screen, are repainted
+    in full and flipped.
+    """
+
+    def __init__(self, screen, game_font, counter_font):
+        super().__init__(screen, game_font, counter_font)
+        self.platforms = None  # the platform list the screen was built from
+        self.camera_pos = None  # where the camera was when it was built
+        self.platform_rects = {}  # platform -> rect it was last drawn at
+        self.dynamic_rects = []  # areas the dynamic entities covered last frame
+        self.updated_rects = None  # areas to push this frame, None for all
+
+    def _repaint_static(self, session, rect):
+        # rect is on screen, the platforms are queried in world coordinates
+        screen = self.screen
+        camera = session.camera
+        screen.fill(PURPLE, rect)
+        self.static_draw_calls += 1
+        screen.set_clip(rect)
+        self.draw_platforms(
+            session.platform_index.query(camera.to_world(rect)), camera.offset
+        )
+        screen.set_clip(None)
+
+    def _moved_platform_rects(self, platforms):
+        # Old and new bounds of every platform that moved, grew, shrank or vanished
+        rects = self.platform_rects
+        moved = []
+        if len(rects) != len(platforms):
+            remaining = set(platforms)
+            for platform in [p for p in rects if p not in remaining]:
+                moved.append(rects.pop(platform))
+
+        for platform in platforms:
+            old_rect = rects.get(platform)
+            if old_rect is None or old_rect != platform.rect:
+                if old_rect is not None:
+                    moved.append(old_rect)
+                rects[platform] = platform.rect.copy()
+                moved.append(rects[platform])
+        return moved
+
+    def _repaint_all(self, session):
+        camera = session.camera
+        self.screen.fill(PURPLE)
+        self.static_draw_calls += 1
+        self.draw_platforms(self.visible_platforms(session), camera.offset)
+        self.dynamic_rects = self.draw_dynamic(session)
+        self.updated_rects = None
+
+    def draw(self, session):
+        camera = session.camera
+        self.static_draw_calls = 0
+        if (
+            session.platforms is not self.platforms
+            or camera.rect.topleft != self.camera_pos
+        ):
+            # New level or the view scrolled, build the whole screen once
+            self.platforms = session.platforms
+            self.camera_pos = camera.rect.topleft
+            self.platform_rects = {p: p.rect.copy() for p in session.platforms}
+            self._repaint_all(session)
+            return
+
+        moved = self._moved_platform_rects(session.platforms)
+        dirty = self.dynamic_rects + [camera.to_screen(rect) for rect in moved]
+
+        # Past a few times the limit there is no point merging them first
+        full = len(dirty) > 4 * MAX_REPAINT_AREAS
+        if not full:
+            screen_rect = self.screen.get_rect()
+            dirty = merge_rects(dirty, screen_rect)
+            dirty_area = sum(rect.width * rect.height for rect in dirty)
+            screen_area = screen_rect.width * screen_rect.height
+            full = (
+                len(dirty) > MAX_REPAINT_AREAS
+                or dirty_area > screen_area * MAX_DIRTY_FRACTION
+            )
+        if full:
+            # Repainting area by area would cost more than the whole screen
+            self._repaint_all(session)
+            return
+
+        for rect in dirty:
+            self._repaint_static(session, rect)
+
+        self.dynamic_rects = self.draw_dynamic(session)
+        self.updated_rects = dirty + self.dynamic_rects
+
+    def add_dirty(self, rect):
+        # Erased next frame like any other dynamic area
+        self.dynamic_rects.append(rect)
+        if self.updated_rects is not None:
+            self.updated_rects.append(rect)
+
+    def present(self):
+        if self.updated_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.updated_rects)
+
+
+class LayeredRenderer(Renderer):
+    """Blits a cached layer of everything static, then draws the rest on top
+
+    The background, the platforms and the fire pit's base are painted into a
+    screen-sized layer that is kept between frames. Only the areas where a
+    platform or the pit moved, appeared or vanished are painted again; when
+    the camera scrolls the layer is shifted and only the uncovered strips are
+    painted. Each frame is then one blit of the layer and the dynamic
+    entities over it.
+
+    When the areas to paint cover much of the view (the black hole dragging
+    the platforms), painting them into the layer and then blitting it would
+    draw the scenery twice. The scenery is then drawn straight to the screen
+    for DIRECT_FRAMES frames, without tracking what moved, and the layer is
+    painted afresh after that.
+    """
+
+    def __init__(self, screen, game_font, counter_font):
+        super().__init__(screen, game_font, counter_font)
+        self.layer = screen.copy()
+        self.direct_frames = 0  # frames left to skip the layer for
+        self.platforms = None  # the platform list the layer was built from
+        self.camera_pos = None  # where the camera was when it was painted
+        self.platform_rects = {}  # platform in view -> rect it was painted at
+        self.fire_pit_rect = None
+        self.repainted_areas = 0  # layer areas painted again last frame
+
+    def _paint(self, session, rect):
+        # rect is on the layer, the platforms are queried in world coordinates
+        layer = self.layer
+        camera = session.camera
+        layer.fill(PURPLE, rect)
+        layer.set_clip(rect)
+        self.draw_platforms(
+            session.platform_index.query(camera.to_world(rect)),
+            camera.offset,
+            layer,
+        )
+        session.fire_pit.draw_base(layer, camera.offset)
+        layer.set_clip(None)
+        self.static_draw_calls += 2
+        self.repainted_areas += 1
+
+    def _scrolled_areas(self, camera):
+        # Shift what is still in view and return the strips the shift uncovered
+        dx = camera.rect.x - self.camera_pos[0]
+        dy = camera.rect.y - self.camera_pos[1]
+        self.camera_pos = camera.rect.topleft
+        if not (dx or dy):
+            return []
+        width, height = self.layer.get_size()
+        if abs(dx) >= width or abs(dy) >= height:
+            return [self.layer.get_rect()]
+        self.layer.scroll(-dx, -dy)
+        areas = []
+        if dx:
+            left = width - dx if dx > 0 else 0
+            areas.append(pygame.Rect(left, 0, abs(dx), height))
+        if dy:
+            top = height - dy if dy > 0 else 0
+            areas.append(pygame.Rect(0, top, width, abs(dy)))
+        return areas
+
+    def _moved_areas(self, session):
+        # Old and new world rects of everything static that changed in view
+        painted = self.platform_rects
+        moved = []
+        current = {}
+        for platform in self.visible_platforms(session):
+            rect = painted.pop(platform, None)
+            if rect is None or rect != platform.rect:
+                if rect is not None:
+                    moved.append(rect)
+                rect = platform.rect.copy()
+                moved.append(rect)
+            current[platform] = rect
+        moved.extend(painted.values())  # crushed or gone out of view
+        self.platform_rects = current
+
+        fire_pit_rect = session.fire_pit.rect
+        if fire_pit_rect != self.fire_pit_rect:
+            moved += [self.fire_pit_rect, fire_pit_rect.copy()]
+            self.fire_pit_rect = fire_pit_rect.copy()
+        return moved
+
+    def _changed_areas(self, session):
+        # Areas of the layer to paint again, merged
+        camera = session.camera
+        areas = self._scrolled_areas(camera)
+        areas += [camera.to_screen(r) for r in self._moved_areas(session) if r]
+        bounds = self.layer.get_rect()
+        if len(areas) > MAX_REPAINT_AREAS:
+            return [areas[0].unionall(areas).clip(bounds)]
+        return merge_rects(areas, bounds)
+
+    def _draw_direct(self, session):
+        screen = self.screen
+        offset = session.camera.offset
+        screen.fill(PURPLE)
+        self.draw_platforms(self.visible_platforms(session), offset)
+        session.fire_pit.draw_base(screen, offset)
+        self.static_draw_calls += 2
+
+    def draw(self, session):
+        camera = session.camera
+        self.static_draw_calls = 0
+        self.repainted_areas = 0
+        if self.direct_frames:
+            pass  # the layer is stale, painted afresh once these frames end
+        elif session.platforms is not self.platforms:
+            # New level, paint the whole layer once
+            self.platforms = session.platforms
+            self.camera_pos = camera.rect.topleft
+            self.platform_rects = {
+                p: p.rect.copy() for p in self.visible_platforms(session)
+            }
+            self.fire_pit_rect = session.fire_pit.rect.copy()
+            self._paint(session, self.layer.get_rect())
+        else:
+            areas = self._changed_areas(session)
+            width, height = self.layer.get_size()
+            if sum(a.width * a.height for a in areas) > (
+                width * height * MAX_LAYER_CHANGE_FRACTION
+            ):
+                self.direct_frames = DIRECT_FRAMES
+            else:
+                for area in areas:
+                    self._paint(session, area)
+
+        if self.direct_frames:
+            self.direct_frames -= 1
+            if not self.direct_frames:
+                self.platforms = None
+            self._draw_direct(session)
+        else:
+            self.screen.blit(self.layer, (0, 0))
+            self.static_draw_calls += 1
+        self.draw_dynamic(session)
+
+    def _draw_fire_pit(self, fire_pit, offset):
+        return fire_pit.draw_flames(self.screen, offset)
+
+
+class CommandRenderer(Renderer):
+    """Repaints the whole screen from a buffer of draw commands
+
+    The entities emit commands instead of drawing, so everything off screen
+    is culled before it is drawn and sprites sharing a surface go out in one
+    blit call. commands holds the buffer, with the last frame's submitted,
+    culled and batches counts.
+    """
+
+    def __init__(self, screen, game_font, counter_font):
+        super().__init__(screen, game_font, counter_font)
+        self.commands = DrawCommands()
+
+    def draw(self, session):
+        screen = self.screen
+        commands = self.commands
+        game_state = session.game_state
+        width, height = screen.get_size()
+        offset = session.camera.offset
+
+        commands.begin(screen.get_clip())
+        commands.fill(BACKGROUND_LAYER, PURPLE)
+        platforms = self.visible_platforms(session)
+        for platform in platforms:
+            platform.emit(commands, offset)
+        session.fire_pit.emit(commands, offset)
+        session.black_hole.emit(commands, offset)
+        for lightning in game_state.lightning_strikes:
+            lightning.emit(commands, offset)
+
+        if not game_state.game_over:
+            session.player.emit(commands, offset)
+        else:
+            for text, position in game_over_texts(self.game_font, width, height):
+                commands.blit(HUD_LAYER, text, position)
+        counter = game_state.movement_counter
+        commands.blit(HUD_LAYER, *counter_text(self.counter_font, counter, width))
+
+        commands.run(screen)
+        self.static_draw_calls = len(platforms) + 2  # with the fill and pit base
@@ -0,0 +1,84 @@
+import heapq
+import math
+
+# Cancelled timers stay in the heap until popped; past this share of it they
+# are swept out in one go so a burst of cancellations cannot bloat it
+MAX_CANCELLED_FRACTION = 0.5
+
+
+def after(when):
+    """The earliest time that is strictly later than when
+
+    Timers run once the time has reached them, so a timer for "once the time
+    is past when" is scheduled at after(when).
+    """
+    return math.nextafter(when, math.inf)
+
+
+class Timer:
+    __slots__ = ("when", "callback", "args")
+
+    def __init__(self, when, callback, args):
+        self.when = when
+        self.callback = callback
+        self.args = args
+
+
+class Scheduler:
+    """Runs callbacks at simulation times instead of polling every step
+
+    Timers are kept in a heap ordered by time; timers for the same time run
+    in the order they were scheduled. run_due(now) runs every timer whose
+    time has come, each called as callback(now, *args), so callbacks see the
+    step's time rather than the time they asked for.
+    """
+
+    def __init__(self):
+        self.heap = []  # (when, sequence number, timer)
+        self.scheduled = 0
+        self.cancelled = 0
+
+    def __len__(self):
+        return len(self.heap) - self.cancelled
+
+    def schedule(self, when, callback, *args):
+        timer = Timer(when, callback, args)
+        heapq.heappush(self.heap, (when, self.scheduled, timer))
+        self.scheduled += 1
+        return timer
+
+    def cancel(self, timer):
+        if timer.callback is None:
+            return
+        timer.callback = None
+        self.cancelled += 1
+        if self.cancelled > len(self.heap) * MAX_CANCELLED_FRACTION:
+            self.heap = [entry for entry in self.heap if entry[2].callback]
+            heapq.heapify(self.heap)
+            self.cancelled = 0
+
+    def clear(self):
+        for _, _, timer in self.heap:
+            timer.callback = None
+        self.heap.clear()
+        self.cancelled = 0
+
+    def next_time(self):
+        """Time of the next live timer, None if there is none"""
+        heap = self.heap
+        while heap and heap[0][2].callback is None:
+            heapq.heappop(heap)
+            self.cancelled -= 1
+        return heap[0][0] if heap else None
+
+    def run_due(self, now):
+        """Run every timer due by now, including ones scheduled meanwhile"""
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            timer = heapq.heappop(heap)[2]
+            callback = timer.callback
+            if callback is None:
+                self.cancelled -= 1
+                continue
+            timer.callback = None
+            callback(now, *timer.args)
@@ -0,0 +1,294 @@
+import os
+
+# stdout is kept for the address, so pygame must not print its banner there
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import asyncio
+import json
+import time
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIM_DT
+from inputs import keys_from_mask
+from level_format import Level
+from profiler import PhaseTimings
+from session import GameSession
+from utils import use_dummy_video
+
+DEFAULT_PORT = 8765
+
+# Clients that stop reading get no updates until their backlog drains; their
+# next update then carries everything that changed in the meantime
+MAX_PENDING_BYTES = 64 * 1024
+
+# Ticks more than this far behind schedule are dropped instead of caught up
+MAX_TICK_LAG = 0.25
+
+STATS_CAPACITY = 600  # ticks kept for the latency percentiles
+
+
+def _rounded(*values):
+    return [round(value, 1) for value in values]
+
+
+class SessionStream:
+    """Turns a session into JSON-ready updates holding only what changed
+
+    Every update is relative to what the client was last sent, so updates can
+    be skipped for a slow client without losing anything. The first update is
+    the full state. Flame flicker is cosmetic and left to clients to animate.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.sent = {}  # field -> value last sent
+        self.sent_platforms = {}  # level record -> rect last sent
+        self.sent_strikes = {}  # strike -> [id, strike time, active]
+        self.next_strike_id = 0
+
+    def _fields(self):
+        session = self.session
+        player = session.player
+        black_hole = session.black_hole
+        game_state = session.game_state
+        record_numbers = session.world.record_numbers
+        crushing = []
+        for entity, data in black_hole.crushing_entities.items():
+            kind = data["type"]
+            crushing.append(
+                [kind, record_numbers.get(entity)] if kind == "platform" else [kind]
+            )
+        return {
+            "player": [*_rounded(player.pos.x, player.pos.y), player.size],
+            "black_hole": [
+                *_rounded(black_hole.pos.x, black_hole.pos.y, black_hole.radius),
+                black_hole.active,
+            ],
+            "fire_pit": list(session.fire_pit.rect),
+            "counter": game_state.movement_counter,
+            "game_over": game_state.game_over,
+            "death_cause": game_state.death_cause,
+            "crushing": crushing,
+        }
+
+    def _platform_changes(self, update):
+        record_numbers = self.session.world.record_numbers
+        sent = self.sent_platforms
+        current = {record_numbers[p]: tuple(p.rect) for p in self.session.platforms}
+        changed = []
+        for record, rect in current.items():
+            if sent.get(record) != rect:
+                changed.append([record, *rect])
+        gone = [record for record in sent if record not in current]
+        if changed:
+            update["platforms"] = changed
+        if gone:
+            update["platforms_gone"] = gone
+        self.sent_platforms = current
+
+    def _lightning_changes(self, update):
+        sent = self.sent_strikes
+        strikes = self.session.game_state.lightning_strikes
+        new = []
+        struck = []
+        current = {}
+        for strike in strikes:
+            state = sent.get(strike)
+            # Pooled strikes are reused, a new strike time means a new strike
+            if state is None or state[1] != strike.strike_time:
+                state = [self.next_strike_id, strike.strike_time, False]
+                self.next_strike_id += 1
+                x, y = _rounded(strike.target_x, strike.target_y)
+                new.append([state[0], x, y, round(strike.strike_time, 3)])
+            if strike.active and not state[2]:
+                state[2] = True
+                struck.append([state[0], *[round(v) for v in strike.bolt]])
+            current[strike] = state
+        current_ids = {state[0] for state in current.values()}
+        gone = [state[0] for state in sent.values() if state[0] not in current_ids]
+        if new:
+            update["lightning_new"] = new
+        if struck:
+            update["lightning_struck"] = struck
+        if gone:
+            update["lightning_gone"] = gone
+        self.sent_strikes = current
+
+    def update(self):
+        """Return the changes since the last update, {} if there are none"""
+        update = {}
+        sent = self.sent
+        for field, value in self._fields().items():
+            if field not in sent or sent[field] != value:
+                update[field] = sent[field] = value
+        self._platform_changes(update)
+        self._lightning_changes(update)
+        return update
+
+
+class Client:
+    def __init__(self, number, session, writer):
+        self.number = number
+        self.session = session
+        self.stream = SessionStream(session)
+        self.writer = writer
+        self.keys = keys_from_mask(0)
+
+
+class GameServer:
+    """Steps every connected client's session on one shared fixed tick
+
+    Clients send JSON lines: {"keys": mask} sets the keys held (inputs.KEY_*
+    bits) until the next one, and {"type": "stats"} asks for tick timings
+    ("reset": true also clears them). The server answers with JSON lines: a
+    hello, then one update per tick with only the fields that changed.
+    """
+
+    def __init__(self, seed=0, level=None, dt=SIM_DT):
+        self.seed = seed
+        self.level = level
+        self.dt = dt
+        self.clients = {}  # writer -> Client
+        self.connections = 0
+        self.tick_count = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.tick_timings = PhaseTimings(STATS_CAPACITY)
+        self.late_ticks = 0
+        self.skipped_updates = 0
+
+    def stats(self):
+        timings = self.tick_timings
+        return {
+            "type": "stats",
+            "sessions": len(self.clients),
+            "ticks": self.tick_count,
+            "tick_p50_ms": timings.percentile(0.5) / 1e6,
+            "tick_p99_ms": timings.percentile(0.99) / 1e6,
+            "late_ticks": self.late_ticks,
+            "skipped_updates": self.skipped_updates,
+        }
+
+    @staticmethod
+    def _send(writer, message):
+        writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+    async def handle_client(self, reader, writer):
+        number = self.connections
+        self.connections += 1
+        session = GameSession(
+            SCREEN_WIDTH, SCREEN_HEIGHT, self.seed + number, level=self.level
+        )
+        client = self.clients[writer] = Client(number, session, writer)
+        self._send(
+            writer,
+            {
+                "type": "hello",
+                "session": number,
+                "dt": self.dt,
+                "world": [session.world_width, session.world_height],
+            },
+        )
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than the stream limit: what was buffered of it is
+                    # gone, and the rest comes in as a line of its own
+                    continue
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    message = None
+                # Ignore garbage rather than drop the player
+                if not isinstance(message, dict):
+                    continue
+                if "keys" in message:
+                    mask = message["keys"]
+                    if type(mask) is int:  # not a bool or a string of digits
+                        client.keys = keys_from_mask(mask)
+                elif message.get("type") == "stats":
+                    self._send(writer, self.stats())
+                    if message.get("reset"):
+                        self.reset_stats()
+        except ConnectionError:
+            pass
+        finally:
+            del self.clients[writer]
+            writer.close()
+
+    def tick(self):
+        dt = self.dt
+        for client in list(self.clients.values()):
+            client.session.step(dt, client.keys)
+            writer = client.writer
+            if writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > MAX_PENDING_BYTES:
+                self.skipped_updates += 1
+                continue
+            update = client.stream.update()
+            if update:
+                update["tick"] = self.tick_count
+                self._send(writer, update)
+        self.tick_count += 1
+
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += self.dt
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.late_ticks += 1
+                if delay < -MAX_TICK_LAG:
+                    next_tick = loop.time()
+                await asyncio.sleep(0)  # let clients be served between ticks
+
+            start = time.perf_counter_ns()
+            self.tick()
+            self.tick_timings.record(start, time.perf_counter_ns() - start)
+
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT, unix_path=None, **kwargs):
+    server = GameServer(**kwargs)
+    if unix_path is not None:
+        listener = await asyncio.start_unix_server(server.handle_client, unix_path)
+    else:
+        listener = await asyncio.start_server(server.handle_client, host, port)
+    for sock in listener.sockets:
+        print(f"listening on {sock.getsockname()}", flush=True)
+    async with listener:
+        await server.run_ticks()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many game sessions at once")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help="0 picks a free port"
+    )
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket")
+    parser.add_argument(
+        "--seed", type=int, default=0, help="seed of the first session"
+    )
+    parser.add_argument("--level", metavar="PATH", help="level file to host")
+    args = parser.parse_args()
+
+    use_dummy_video()
+    level = Level.open(args.level) if args.level else None
+    try:
+        asyncio.run(
+            serve(args.host, args.port, args.unix, seed=args.seed, level=level)
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+import hashlib
+import random
+import pygame
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from camera import Camera
+from entities import Player, BlackHole, FirePit
+from game_state import (
+    GameState,
+    DEATH_FIRE,
+    DEATH_LIGHTNING,
+    DEATH_BLACK_HOLE,
+    DEATH_OFF_SCREEN,
+)
+from level_format import builtin_level
+from profiler import FrameProfiler
+from sim_clock import SimClock
+from world import ChunkedWorld
+
+# The black hole keeps the world chunks this far either side of it live
+BLACK_HOLE_REACH = SCREEN_WIDTH // 2
+
+OBSERVATION_FIELDS = (
+    "player_x",
+    "player_y",
+    "player_vel_x",
+    "player_vel_y",
+    "on_ground",
+    "black_hole_x",
+    "black_hole_y",
+    "black_hole_radius",
+    "black_hole_active",
+    "lightning_strikes",
+    "movement_counter",
+    "game_over",
+)
+
+
+class GameSession:
+    """A single game: the player, the level and the game state, without any drawing
+
+    All timing comes from the session's simulation clock and all randomness from
+    its seeded RNG, so the same seed and inputs always replay the same game.
+
+    The level is a level_format.Level (the built-in one by default) and may be
+    many screens wide. width and height are the size of the view: the camera
+    follows the player and only the world chunks near it and the black hole
+    are simulated. Respawns reset the entities from the level's records.
+    """
+
+    def __init__(
+        self,
+        width=SCREEN_WIDTH,
+        height=SCREEN_HEIGHT,
+        seed=None,
+        profiler=None,
+        level=None,
+    ):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.level = level or builtin_level(width, height)
+        right, bottom = self.level.bounds()
+        self.world_width = max(width, right)
+        self.world_height = max(height, bottom)
+        self.camera = Camera(width, height, self.world_width, self.world_height)
+        self.world = ChunkedWorld(self.level)
+        self.clock = SimClock()
+        self.rng = random.Random(seed)
+        self.profiler = profiler or FrameProfiler()  # disabled unless given one
+        self.player = Player(width, height)
+        spawn = self.level.spawn_point()
+        if spawn is not None:
+            self.player.start_pos.update(spawn)
+            self.player.reset()
+        self.game_state = GameState(self.clock, self.rng)
+        self.jump_held = False
+        self.restart_held = False
+        self.fire_pit = FirePit(*self.level.fire_pit_rect(), self.clock)
+        self.reset_level()
+
+    def reset_level(self):
+        # Crushing shrinks platforms in place and drops them from the list, so
+        # put every one back the way the level file has it
+        self.world.reset()
+        self.platforms = self.world.platforms
+        self.platform_index = self.world.index
+        self.fire_pit.reset(*self.level.fire_pit_rect())
+        self.black_hole = BlackHole(self.width, self.height, self.rng)
+        params = self.level.black_hole_params
+        if params is not None:
+            black_hole = self.black_hole
+            (
+                black_hole.radius,
+                black_hole.max_radius,
+                black_hole.attraction_force,
+                black_hole.max_attraction,
+            ) = params
+        self.update_view()
+
+    def update_view(self):
+        """Move the camera to the player and stream in the chunks it needs"""
+        self.camera.follow(self.player.pos)
+        areas = [self.camera.rect]
+        black_hole = self.black_hole
+        if black_hole.active:
+            areas.append(
+                pygame.Rect(
+                    int(black_hole.pos.x) - BLACK_HOLE_REACH,
+                    0,
+                    2 * BLACK_HOLE_REACH,
+                    self.world_height,
+                )
+            )
+        if self.world.update(areas):
+            black_hole.platforms_changed(self.platforms)
+
+    def restart(self):
+        self.game_state.restart_game(self.player)
+        self.reset_level()
+
+    def step(self, dt, keys):
+        """Advance the game by dt seconds using the given key state
+
+        Returns the cause of death if the player died during this step.
+        """
+        simulating = self.begin_step(dt, keys)
+        if simulating:
+            self.black_hole.update(
+                dt, self.player, self.platforms, self.fire_pit, self.platform_index
+            )
+            self.profiler.mark("black_hole")
+        return self.finish_step(dt, keys, simulating)
+
+    def begin_step(self, dt, keys):
+        """The part of step() before the black hole is updated
+
+        Returns whether the world is simulated this step, that is whether the
+        black hole is to be updated and then finish_step() called with True.
+        """
+        self.clock.advance(dt)
+        player = self.player
+        game_state = self.game_state
+        profiler = self.profiler
+
+        # Jump and restart only trigger on the frame the key goes down
+        jump_pressed = keys[pygame.K_SPACE] and not self.jump_held
+        restart_pressed = keys[pygame.K_r] and not self.restart_held
+        self.jump_held = keys[pygame.K_SPACE]
+        self.restart_held = keys[pygame.K_r]
+
+        if jump_pressed and player.can_jump and not game_state.game_over:
+            player.jump()
+        if restart_pressed:
+            self.restart()
+
+        # Check for movement counter increment
+        if not game_state.game_over:
+            game_state.check_movement_keys(keys, player.pos)
+        profiler.mark("input")
+
+        # Handle game over and respawn
+        if game_state.game_over:
+            if game_state.check_respawn(player):
+                self.reset_level()
+            return False
+        return True
+
+    def finish_step(self, dt, keys, simulating):
+        """The part of step() after the black hole was updated"""
+        player = self.player
+        game_state = self.game_state
+        profiler = self.profiler
+        death_cause = None
+        if simulating:
+            # Update player
+            player.update(
+                dt,
+                keys,
+                self.platforms,
+                self.world_width,
+                self.world_height,
+                self.platform_index,
+            )
+            profiler.mark("player")
+
+            # Check collisions
+            if game_state.check_fire_collision(player, self.fire_pit):
+                game_state.handle_death(DEATH_FIRE)
+
+            if game_state.check_lightning_collisions(player.pos):
+                game_state.handle_death(DEATH_LIGHTNING)
+
+            # Check black hole collision
+            if game_state.check_black_hole_collision(player, self.black_hole):
+                game_state.handle_death(DEATH_BLACK_HOLE)
+
+            # Check if player leaves the world (sucked by black hole)
+            if (
+                player.pos.y < -player.size * 2
+                or player.pos.y > self.world_height + player.size * 2
+                or player.pos.x < -player.size * 2
+                or player.pos.x > self.world_width + player.size * 2
+            ):
+                game_state.handle_death(DEATH_OFF_SCREEN)
+
+            if game_state.game_over:
+                death_cause = game_state.death_cause
+            profiler.mark("collisions")
+
+        # Update fire animation
+        self.fire_pit.update(dt)
+        profiler.mark("fire_pit")
+
+        # Update lightning strikes
+        game_state.update_lightnings(self.clock.time())
+        profiler.mark("lightning")
+
+        # Follow the player and swap world chunks in and out
+        self.update_view()
+        profiler.mark("streaming")
+
+        return death_cause
+
+    def observation(self):
+        """Return the numbers a bot sees, one flat tuple (see OBSERVATION_FIELDS)"""
+        player = self.player
+        black_hole = self.black_hole
+        game_state = self.game_state
+        return (
+            player.pos.x,
+            player.pos.y,
+            player.vel.x,
+            player.vel.y,
+            float(player.on_ground),
+            black_hole.pos.x,
+            black_hole.pos.y,
+            black_hole.radius,
+            float(black_hole.active),
+            float(len(game_state.lightning_strikes)),
+            float(game_state.movement_counter),
+            float(game_state.game_over),
+        )
+
+    def state_hash(self):
+        """Return a hex digest of everything the next steps depend on
+
+        Two sessions with the same hash behave the same from here on, so
+        replays compare it to catch any divergence. That takes the loaded
+        chunks out of play too, as they come back into it as they were left.
+        """
+        world = self.world
+        player = self.player
+        game_state = self.game_state
+        black_hole = self.black_hole
+        fire_pit = self.fire_pit
+        state = (
+            self.clock.now,
+            self.rng.getstate(),
+            self.jump_held,
+            self.restart_held,
+            tuple(player.pos),
+            tuple(player.vel),
+            player.size,
+            player.on_ground,
+            player.can_jump,
+            game_state.game_over,
+            game_state.death_cause,
+            game_state.respawn_timer,
+            game_state.movement_counter,
+            game_state.start_time,
+            tuple(game_state.last_key_state.values()),
+            # A pooled strike keeps its last bolt until it strikes again
+            [
+                (s.target_x, s.target_y, s.strike_time, s.active)
+                + (tuple(s.bolt) if s.active else ())
+                for s in game_state.lightning_strikes
+            ],
+            [tuple(p.rect) for p in self.platforms],
+            world.active,
+            # Rects and crushes out of play, in the use order that decides
+            # which chunks are evicted
+            world.loaded_states(),
+            tuple(fire_pit.rect),
+            fire_pit.flame_heights,
+            tuple(black_hole.pos),
+            black_hole.radius,
+            black_hole.attraction_force,
+            black_hole.active,
+            black_hole.current_pulse,
+            black_hole.growing,
+            [
+                (type(entity).__name__, tuple(data.values()))
+                for entity, data in black_hole.crushing_entities.items()
+            ],
+        )
+        return hashlib.blake2b(repr(state).encode(), digest_size=16).hexdigest()
@@ -0,0 +1,33 @@
+import time
+import pygame
+
+
+class SimClock:
+    """Simulation time that only moves when the game is stepped"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def advance(self, dt):
+        self.now += dt
+
+    def time(self):
+        """Seconds of simulated time, the counterpart of time.time()"""
+        return self.now
+
+    def ticks(self):
+        """Milliseconds of simulated time, the counterpart of pygame.time.get_ticks()"""
+        return int(self.now * 1000)
+
+
+class WallClock:
+    """Real time, used by entities created without a simulation clock"""
+
+    def advance(self, dt):
+        pass
+
+    def time(self):
+        return time.time()
+
+    def ticks(self):
+        return pygame.time.get_ticks()
@@ -0,0 +1,175 @@
+import threading
+import time
+from constants import SIM_DT, MAX_FRAME_TIME
+from inputs import keys_from_mask
+from profiler import PhaseTimings
+from session import GameSession
+from snapshot import Snapshot, capture, restore
+
+STEP_TIMINGS_CAPACITY = 600
+
+# A player that moves further than this in one step was respawned or
+# restarted, so the view snaps to it instead of sliding across the screen
+TELEPORT_DISTANCE = 200
+
+
+class SimFrame:
+    """The session's state after one step, as published to the render loop
+
+    Frames are never changed once published, so the render loop can read
+    one while the simulation thread steps on. state is a bytes copy of a
+    snapshot buffer, which snapshot.restore() reads like a Snapshot; time is
+    the perf_counter() time the step was scheduled for.
+    """
+
+    __slots__ = (
+        "step",
+        "time",
+        "buffer",
+        "rng_state",
+        "loaded",
+        "player_pos",
+        "black_hole_pos",
+        "black_hole_radius",
+        "game_over",
+    )
+
+    def __init__(self, step, time, snapshot, session):
+        self.step = step
+        self.time = time
+        self.buffer = bytes(memoryview(snapshot.buffer)[: snapshot.size])
+        self.rng_state = snapshot.rng_state
+        self.loaded = snapshot.loaded
+        self.player_pos = tuple(session.player.pos)
+        self.black_hole_pos = tuple(session.black_hole.pos)
+        self.black_hole_radius = session.black_hole.radius
+        self.game_over = session.game_state.game_over
+
+
+class SimulationThread:
+    """Steps a session at a fixed rate on its own thread, whatever drawing does
+
+    Every step gets the same dt and steps are paced by the wall clock, not
+    by frames; when the thread falls more than MAX_FRAME_TIME behind it skips
+    ahead instead of bursting through the backlog. After each step a new
+    SimFrame is published and ``frames`` becomes (previous, latest), swapped
+    in one assignment so readers never see a half-made pair.
+
+    The keys held are read from ``mask`` (inputs.KEY_* bits) unless an
+    input_source is given, which is called with the step number instead.
+    """
+
+    def __init__(
+        self,
+        session,
+        dt=SIM_DT,
+        recorder=None,
+        input_source=None,
+        max_steps=None,
+    ):
+        self.session = session
+        self.dt = dt
+        self.recorder = recorder
+        self.input_source = input_source
+        self.max_steps = max_steps
+        self.mask = 0
+        self.frames = (None, None)
+        self.steps = 0
+        self.skipped_time = 0.0  # seconds dropped after falling behind
+        self.step_timings = PhaseTimings(STEP_TIMINGS_CAPACITY)
+        self._snapshot = Snapshot()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="simulation", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        session = self.session
+        dt = self.dt
+        key_states = {}  # mask -> key state, the session only reads them
+        next_step = time.perf_counter()
+        while not self._stopping.is_set():
+            if self.max_steps is not None and self.steps >= self.max_steps:
+                break
+            now = time.perf_counter()
+            if now < next_step:
+                self._stopping.wait(next_step - now)
+                continue
+            if now - next_step > MAX_FRAME_TIME:
+                self.skipped_time += now - next_step
+                next_step = now
+
+            if self.input_source is not None:
+                mask = self.input_source(self.steps)
+            else:
+                mask = self.mask
+            keys = key_states.get(mask)
+            if keys is None:
+                keys = key_states[mask] = keys_from_mask(mask)
+
+            start = time.perf_counter_ns()
+            session.step(dt, keys)
+            if self.recorder is not None:
+                self.recorder.record(mask)
+            capture(session, self._snapshot)
+            frame = SimFrame(self.steps, next_step, self._snapshot, session)
+            self.frames = (self.frames[1], frame)
+            self.step_timings.record(start, time.perf_counter_ns() - start)
+            self.steps += 1
+            next_step += dt
+
+
+def _lerp(a, b, alpha):
+    return a + (b - a) * alpha
+
+
+class InterpolatedView:
+    """A session of its own for the render loop, set between the last two frames
+
+    update() restores the latest published frame into it and then moves the
+    player, black hole and camera back by the part of a step that has not
+    elapsed yet, so motion stays smooth at any refresh rate. What is drawn
+    lags the simulation by at most one step; the simulation itself is never
+    touched.
+    """
+
+    def __init__(self, session, dt=SIM_DT):
+        self.dt = dt
+        self.session = GameSession(session.width, session.height, level=session.level)
+        self.step = -1
+
+    def update(self, frames, now):
+        """Return the view's session as it was at now, one step ago"""
+        previous, current = frames
+        session = self.session
+        if current is None:
+            return session
+        if current.step != self.step:
+            restore(session, current)
+            self.step = current.step
+        if previous is None or previous.game_over != current.game_over:
+            return session
+
+        (x0, y0), (x1, y1) = previous.player_pos, current.player_pos
+        if abs(x1 - x0) + abs(y1 - y0) > TELEPORT_DISTANCE:
+            return session
+        alpha = min(max((now - current.time) / self.dt, 0.0), 1.0)
+        session.player.pos.update(_lerp(x0, x1, alpha), _lerp(y0, y1, alpha))
+        (x0, y0), (x1, y1) = previous.black_hole_pos, current.black_hole_pos
+        black_hole = session.black_hole
+        black_hole.pos.update(_lerp(x0, x1, alpha), _lerp(y0, y1, alpha))
+        black_hole.radius = _lerp(
+            previous.black_hole_radius, current.black_hole_radius, alpha
+        )
+        session.camera.follow(session.player.pos)
+        return session
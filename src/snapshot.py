@@ -0,0 +1,326 @@
+import struct
+from array import array
+from entities.lightning import BOLT_SEGMENTS
+from game_state import DEATH_FIRE, DEATH_LIGHTNING, DEATH_BLACK_HOLE, DEATH_OFF_SCREEN
+
+DEFAULT_CAPACITY = 600  # ten seconds of steps
+
+DEATH_CAUSES = (None, DEATH_FIRE, DEATH_LIGHTNING, DEATH_BLACK_HOLE, DEATH_OFF_SCREEN)
+CRUSHED_KINDS = ("platform", "fire_pit", "player")
+
+# Everything with a fixed size, then the counts of the variable sections that
+# follow it in this order: flame heights, active chunks, platforms (record and
+# rect), lightning strikes and crushing entities
+FIXED = struct.Struct(
+    "<d??"  # clock, jump held, restart held
+    "ddddi??"  # player pos, vel, size, on ground, can jump
+    "?dbid???"  # game over, respawn timer, death cause, counter, start, last keys
+    "dddddd?d?"  # black hole pos, radius, max radius, force, max force, active,
+    # pulse, growing
+    "iiiii?"  # fire pit rect, base height, active
+    "IIIII"  # section counts
+)
+STRIKE = struct.Struct(
+    f"<dddd?{2 * (BOLT_SEGMENTS + 1)}d"
+)  # target, strike time, end time, active, bolt
+CRUSHING = struct.Struct("<bidii")  # kind, platform record, scale, sizes
+
+_int_arrays = {}  # count -> Struct of that many ints
+
+
+def _ints(count):
+    packer = _int_arrays.get(count)
+    if packer is None:
+        packer = _int_arrays[count] = struct.Struct(f"<{count}i")
+    return packer
+
+
+class Snapshot:
+    """One packed copy of a session's state, reused as the ring goes round
+
+    The chunks out of play are kept as the world's inactive states, which
+    never change once made, so capturing them copies nothing.
+    """
+
+    __slots__ = ("buffer", "size", "rng_state", "loaded", "step")
+
+    def __init__(self):
+        self.buffer = bytearray(1024)
+        self.size = 0
+        self.rng_state = None
+        self.loaded = None
+        self.step = -1
+
+
+def capture(session, snapshot):
+    """Pack everything the next steps depend on into snapshot"""
+    player = session.player
+    game_state = session.game_state
+    black_hole = session.black_hole
+    fire_pit = session.fire_pit
+    world = session.world
+    record_numbers = world.record_numbers
+    keys = game_state.last_key_state
+    last_a, last_d, last_space = keys.values()
+    platforms = session.platforms
+    strikes = game_state.lightning_strikes
+    flames = fire_pit.flame_heights
+    crushing = black_hole.crushing_entities
+
+    size = (
+        FIXED.size
+        + 4 * (len(flames) + len(world.active) + 5 * len(platforms))
+        + STRIKE.size * len(strikes)
+        + CRUSHING.size * len(crushing)
+    )
+    buffer = snapshot.buffer
+    if len(buffer) < size:
+        buffer = snapshot.buffer = bytearray(size * 2)
+
+    rect = fire_pit.rect
+    FIXED.pack_into(
+        buffer,
+        0,
+        session.clock.now,
+        session.jump_held,
+        session.restart_held,
+        player.pos.x,
+        player.pos.y,
+        player.vel.x,
+        player.vel.y,
+        player.size,
+        player.on_ground,
+        player.can_jump,
+        game_state.game_over,
+        game_state.respawn_timer,
+        DEATH_CAUSES.index(game_state.death_cause),
+        game_state.movement_counter,
+        game_state.start_time,
+        last_a,
+        last_d,
+        last_space,
+        black_hole.pos.x,
+        black_hole.pos.y,
+        black_hole.radius,
+        black_hole.max_radius,
+        black_hole.attraction_force,
+        black_hole.max_attraction,
+        black_hole.active,
+        black_hole.current_pulse,
+        black_hole.growing,
+        rect.x,
+        rect.y,
+        rect.width,
+        rect.height,
+        fire_pit.base_height,
+        fire_pit.active,
+        len(flames),
+        len(world.active),
+        len(platforms),
+        len(strikes),
+        len(crushing),
+    )
+    offset = FIXED.size
+
+    ints = [*flames, *world.active]
+    ints += map(record_numbers.__getitem__, platforms)
+    for platform in platforms:
+        ints += platform.rect
+    _ints(len(ints)).pack_into(buffer, offset, *ints)
+    offset += 4 * len(ints)
+
+    for strike in strikes:
+        STRIKE.pack_into(
+            buffer,
+            offset,
+            strike.target_x,
+            strike.target_y,
+            strike.strike_time,
+            strike.end_time,
+            strike.active,
+            *strike.bolt,
+        )
+        offset += STRIKE.size
+
+    for entity, data in crushing.items():
+        kind = data["type"]
+        CRUSHING.pack_into(
+            buffer,
+            offset,
+            CRUSHED_KINDS.index(kind),
+            record_numbers[entity] if kind == "platform" else -1,
+            data["scale"],
+            data["original_size"],
+            data["original_height"],
+        )
+        offset += CRUSHING.size
+
+    snapshot.size = offset
+    snapshot.rng_state = session.rng.getstate()
+    snapshot.loaded = world.loaded_states()
+
+
+def restore(session, snapshot):
+    """Put session back in the state snapshot was captured in"""
+    buffer = snapshot.buffer
+    player = session.player
+    game_state = session.game_state
+    black_hole = session.black_hole
+    fire_pit = session.fire_pit
+    world = session.world
+    (
+        session.clock.now,
+        session.jump_held,
+        session.restart_held,
+        pos_x,
+        pos_y,
+        vel_x,
+        vel_y,
+        player.size,
+        player.on_ground,
+        player.can_jump,
+        game_state.game_over,
+        game_state.respawn_timer,
+        death_cause,
+        game_state.movement_counter,
+        game_state.start_time,
+        last_a,
+        last_d,
+        last_space,
+        hole_x,
+        hole_y,
+        black_hole.radius,
+        black_hole.max_radius,
+        black_hole.attraction_force,
+        black_hole.max_attraction,
+        black_hole.active,
+        black_hole.current_pulse,
+        black_hole.growing,
+        pit_x,
+        pit_y,
+        pit_width,
+        pit_height,
+        fire_pit.base_height,
+        fire_pit.active,
+        flame_count,
+        chunk_count,
+        platform_count,
+        strike_count,
+        crushing_count,
+    ) = FIXED.unpack_from(buffer)
+    offset = FIXED.size
+
+    player.pos.update(pos_x, pos_y)
+    player.vel.update(vel_x, vel_y)
+    game_state.death_cause = DEATH_CAUSES[death_cause]
+    keys = game_state.last_key_state
+    for key, value in zip(keys, (last_a, last_d, last_space)):
+        keys[key] = value
+    black_hole.pos.update(hole_x, hole_y)
+    fire_pit.rect.update(pit_x, pit_y, pit_width, pit_height)
+
+    count = flame_count + chunk_count + 5 * platform_count
+    ints = _ints(count).unpack_from(buffer, offset)
+    offset += 4 * count
+    fire_pit.flame_heights[:] = ints[:flame_count]
+    active = ints[flame_count : flame_count + chunk_count]
+    records_start = flame_count + chunk_count
+    records = ints[records_start : records_start + platform_count]
+    rects = ints[records_start + platform_count :]
+
+    platforms = session.platforms
+    record_numbers = world.record_numbers
+    loaded = snapshot.loaded
+    if (
+        list(active) == world.active
+        and world.loaded_states() == loaded
+        and len(platforms) == platform_count
+        and all(record_numbers[p] == r for p, r in zip(platforms, records))
+    ):
+        # Same platforms live as when captured, only their rects can differ
+        index = session.platform_index
+        for i, platform in enumerate(platforms):
+            j = i * 4
+            rect = platform.rect
+            if (rect.x, rect.y, rect.width, rect.height) != rects[j : j + 4]:
+                rect.update(rects[j], rects[j + 1], rects[j + 2], rects[j + 3])
+                index.update(platform)
+    else:
+        world.restore(active, records, rects, loaded)
+        session.platform_index = world.index
+    black_hole.platforms_changed()
+
+    # Strikes go back to the pool and come out again with the captured times,
+    # which also schedules their next transitions again
+    game_state.clear_lightnings()
+    pool = game_state.lightning_pool
+    for _ in range(strike_count):
+        values = STRIKE.unpack_from(buffer, offset)
+        offset += STRIKE.size
+        strike = pool.acquire(values[0], values[1])
+        (
+            strike.target_x,
+            strike.target_y,
+            strike.strike_time,
+            strike.end_time,
+            strike.active,
+        ) = values[:5]
+        strike.bolt[:] = array("d", values[5:])
+        game_state.add_lightning(strike)
+
+    by_record = {record_numbers[p]: p for p in world.platforms}
+    crushing = black_hole.crushing_entities
+    crushing.clear()
+    for _ in range(crushing_count):
+        kind, record, scale, original_size, original_height = CRUSHING.unpack_from(
+            buffer, offset
+        )
+        offset += CRUSHING.size
+        kind = CRUSHED_KINDS[kind]
+        if kind == "platform":
+            entity = by_record[record]
+        elif kind == "fire_pit":
+            entity = fire_pit
+        else:
+            entity = player
+        crushing[entity] = {
+            "type": kind,
+            "scale": scale,
+            "original_size": original_size,
+            "original_height": original_height,
+        }
+
+    session.rng.setstate(snapshot.rng_state)
+    session.camera.follow(player.pos)
+
+
+class SnapshotRing:
+    """The last capacity snapshots of a session, in preallocated buffers
+
+    capture() after every step keeps a rolling history; rewind(steps) puts the
+    session back that many captures and forgets the ones after it, so play
+    (or a rollback's re-simulation) carries on capturing from there.
+    """
+
+    def __init__(self, session, capacity=DEFAULT_CAPACITY):
+        self.session = session
+        self.slots = [Snapshot() for _ in range(capacity)]
+        self.capacity = capacity
+        self.count = 0  # captures taken, the ring holds the last `capacity`
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def capture(self):
+        snapshot = self.slots[self.count % self.capacity]
+        capture(self.session, snapshot)
+        snapshot.step = self.count
+        self.count += 1
+        return snapshot.step
+
+    def rewind(self, steps=0):
+        """Restore the capture taken steps captures before the latest one"""
+        if not 0 <= steps < len(self):
+            raise IndexError(f"only {len(self)} snapshots are held")
+        self.count -= steps
+        restore(self.session, self.slots[(self.count - 1) % self.capacity])
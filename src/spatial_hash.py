@@ -0,0 +1,96 @@
+# Cell size in pixels, a little bigger than the player (80px) so a query
+# usually touches between one and four cells
+DEFAULT_CELL_SIZE = 128
+
+
+class SpatialHash:
+    """Uniform grid of objects with a ``rect`` for broadphase collision queries
+
+    Queries return candidates in the order the objects were inserted, so code
+    that used to walk a list front to back resolves collisions the same way.
+    Call ``update`` after moving an object's rect; the grid is only touched when
+    the rect crosses into different cells.
+    """
+
+    def __init__(self, objects=(), cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}  # object -> [insertion order, cell range]
+        self.next_order = 0
+        for obj in objects:
+            self.insert(obj)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, obj):
+        return obj in self.entries
+
+    def _cell_range(self, rect):
+        # Empty rects still sit in the cell of their corner
+        size = self.cell_size
+        x, y, width, height = rect
+        right = x + width - 1 if width > 0 else x
+        bottom = y + height - 1 if height > 0 else y
+        return x // size, y // size, right // size, bottom // size
+
+    def _add_to_cells(self, obj, cell_range):
+        left, top, right, bottom = cell_range
+        cells = self.cells
+        for cx in range(left, right + 1):
+            for cy in range(top, bottom + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cells[(cx, cy)] = {obj}
+                else:
+                    cell.add(obj)
+
+    def _remove_from_cells(self, obj, cell_range):
+        left, top, right, bottom = cell_range
+        cells = self.cells
+        for cx in range(left, right + 1):
+            for cy in range(top, bottom + 1):
+                cell = cells[(cx, cy)]
+                cell.discard(obj)
+                if not cell:
+                    del cells[(cx, cy)]
+
+    def insert(self, obj, order=None):
+        """Add obj, queried as if inserted at position order if one is given"""
+        if order is None:
+            order = self.next_order
+        self.next_order = max(self.next_order, order) + 1
+        cell_range = self._cell_range(obj.rect)
+        self.entries[obj] = [order, cell_range]
+        self._add_to_cells(obj, cell_range)
+
+    def remove(self, obj):
+        entry = self.entries.pop(obj, None)
+        if entry is not None:
+            self._remove_from_cells(obj, entry[1])
+
+    def update(self, obj):
+        """Re-index obj after its rect moved or was replaced"""
+        entry = self.entries[obj]
+        cell_range = self._cell_range(obj.rect)
+        if cell_range != entry[1]:
+            self._remove_from_cells(obj, entry[1])
+            self._add_to_cells(obj, cell_range)
+            entry[1] = cell_range
+
+    def query(self, rect):
+        """Return the objects whose rect collides with rect, in insertion order"""
+        left, top, right, bottom = self._cell_range(rect)
+        cells = self.cells
+        found = set()
+        for cx in range(left, right + 1):
+            for cy in range(top, bottom + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+
+        hits = [obj for obj in found if rect.colliderect(obj.rect)]
+        if len(hits) > 1:
+            entries = self.entries
+            hits.sort(key=lambda obj: entries[obj][0])
+        return hits
@@ -1,14 +1,45 @@
+import os
 import pygame
+from collections import OrderedDict
 
 
 def init_pygame(width, height):
-    """Initialize pygame and return the screen and clock objects"""
-    pygame.init()
+    """Initialize pygame and return the screen and clock objects
+
+    Only the display (which brings events and keys with it) and font modules
+    are started; pygame.init() would also open the mixer, joysticks and the
+    rest. The clock starts the timer itself on its first tick.
+    """
+    pygame.display.init()
+    pygame.font.init()
     screen = pygame.display.set_mode((width, height))
     clock = pygame.time.Clock()
     return screen, clock
 
 
+def use_dummy_video():
+    """Make SDL use its dummy video driver, for programs that never open a window
+
+    Entry points that only simulate call it from main() rather than on import,
+    so importing them (as main.py does input_log) leaves the game's window alone.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+_fonts = {}
+
+
+def get_font(size):
+    """Return pygame's bundled default font at the given size, loaded once
+
+    This is the font SysFont(None, size) ends up with, minus the system font scan.
+    """
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
+
 def create_game_platforms():
     """Create and return the list of platforms for the game"""
     from entities import Platform
@@ -25,42 +56,97 @@ def create_game_platforms():
     return platforms
 
 
-def create_fire_pit():
+def create_fire_pit(clock=None):
     """Create and return the fire pit object"""
     from entities import FirePit
 
-    return FirePit(400, 650, 250, 70)
+    return FirePit(400, 650, 250, 70, clock)
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces
+
+    Keyed by (font, text, color, antialias); hits and misses are counted so the
+    steady-state hit rate can be checked.
+    """
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared by all the render_* helpers
+text_cache = TextCache()
 
 
 def render_text(screen, text, font, color, position):
     """Render text on the screen at the given position"""
-    text_surface = font.render(text, True, color)
-    screen.blit(text_surface, position)
+    text_surface = text_cache.render(font, text, color)
+    return screen.blit(text_surface, position)
 
 
-def render_game_over(screen, game_font, width, height):
-    """Render the game over text"""
+def game_over_texts(game_font, width, height):
+    """The game over lines as (surface, position) pairs"""
     from constants import RED, WHITE
 
-    game_over_text = game_font.render("Ow ow ow fire...", True, RED)
-    respawn_text = game_font.render("Respawning...", True, WHITE)
+    game_over_text = text_cache.render(game_font, "Ow ow ow fire...", RED)
+    respawn_text = text_cache.render(game_font, "Respawning...", WHITE)
+    return [
+        (
+            game_over_text,
+            (width // 2 - game_over_text.get_width() // 2, height // 2 - 50),
+        ),
+        (respawn_text, (width // 2 - respawn_text.get_width() // 2, height // 2 + 10)),
+    ]
 
-    screen.blit(
-        game_over_text,
-        (width // 2 - game_over_text.get_width() // 2, height // 2 - 50),
-    )
-    screen.blit(
-        respawn_text,
-        (width // 2 - respawn_text.get_width() // 2, height // 2 + 10),
+
+def render_game_over(screen, game_font, width, height):
+    """Render the game over text, return the area it covers"""
+    (game_over_text, game_over_pos), (respawn_text, respawn_pos) = game_over_texts(
+        game_font, width, height
     )
+    game_over_rect = screen.blit(game_over_text, game_over_pos)
+    respawn_rect = screen.blit(respawn_text, respawn_pos)
+    return game_over_rect.union(respawn_rect)
 
 
-def render_counter(screen, counter_font, counter, width):
-    """Render the movement counter"""
+def counter_text(counter_font, counter, width):
+    """The movement counter as a (surface, position) pair"""
     from constants import WHITE
 
-    counter_text = counter_font.render(f"Moves: {counter}", True, WHITE)
-    screen.blit(counter_text, (width - counter_text.get_width() - 20, 20))
+    text = text_cache.render(counter_font, f"Moves: {counter}", WHITE)
+    return text, (width - text.get_width() - 20, 20)
+
+
+def render_counter(screen, counter_font, counter, width):
+    """Render the movement counter, return the area it covers"""
+    return screen.blit(*counter_text(counter_font, counter, width))
 
 
 def render_black_hole_warning(screen, font, elapsed_time, width, height):
@@ -68,7 +154,9 @@ def render_black_hole_warning(screen, font, elapsed_time, width, height):
     from constants import RED
 
     seconds_left = int(30 - elapsed_time)
-    warning_text = font.render(f"WARNING: Black Hole in {seconds_left}s!", True, RED)
+    warning_text = text_cache.render(
+        font, f"WARNING: Black Hole in {seconds_left}s!", RED
+    )
 
     # Make it pulse for emphasis
     if seconds_left % 2 == 0:
@@ -0,0 +1,115 @@
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SIM_DT
+from entities import black_hole
+from inputs import keys_from_mask
+from session import GameSession, OBSERVATION_FIELDS
+
+
+class VecGameEnv:
+    """N independent game sessions advanced together by one step() call
+
+    Each env is a full GameSession, so every rule is the one the windowed game
+    runs. Actions are key masks from inputs.py, one per env. With autoreset a
+    session that dies is restarted straight away instead of waiting out the
+    respawn delay, and the step that killed it reports done.
+
+    With NumPy installed, the black holes' pull on the platforms, the one
+    part of a step that touches every platform, runs for all the envs in one
+    pass over arrays covering them all (see BatchedPlatformPull). The rest of
+    the step, the player, collisions and lightning, is still each session's
+    own code run in a loop: each env's platforms are crushed and streamed
+    differently, and rewriting those rules for arrays would give them a second
+    copy to keep in step.
+    """
+
+    observation_fields = OBSERVATION_FIELDS
+
+    def __init__(
+        self,
+        num_envs,
+        seed=None,
+        dt=SIM_DT,
+        autoreset=True,
+        width=SCREEN_WIDTH,
+        height=SCREEN_HEIGHT,
+    ):
+        self.num_envs = num_envs
+        self.dt = dt
+        self.autoreset = autoreset
+        self.sessions = [
+            GameSession(width, height, None if seed is None else seed + i)
+            for i in range(num_envs)
+        ]
+        self.dones = [False] * num_envs
+        self.death_causes = [None] * num_envs
+        self.pull = None if black_hole.np is None else black_hole.BatchedPlatformPull()
+
+    def reset(self):
+        """Restart every env and return their observations"""
+        for session in self.sessions:
+            session.restart()
+        self.dones = [False] * self.num_envs
+        self.death_causes = [None] * self.num_envs
+        return self.observations()
+
+    def observations(self):
+        return [session.observation() for session in self.sessions]
+
+    def step(self, actions):
+        """Advance every env by one step
+
+        Returns (observations, dones, death_causes), one entry per env.
+        Observations are taken before any autoreset, so they show the death.
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(f"expected {self.num_envs} actions, got {len(actions)}")
+
+        dt = self.dt
+        sessions = self.sessions
+        keys = [keys_from_mask(action) for action in actions]
+        if self.pull is None:
+            deaths = [session.step(dt, k) for session, k in zip(sessions, keys)]
+        else:
+            deaths = self._step_batched(dt, keys)
+
+        observations = []
+        dones = self.dones
+        death_causes = self.death_causes
+        for i, (session, death_cause) in enumerate(zip(sessions, deaths)):
+            observations.append(session.observation())
+            dones[i] = death_cause is not None
+            death_causes[i] = death_cause
+            if death_cause is not None and self.autoreset:
+                session.restart()
+
+        return observations, list(dones), list(death_causes)
+
+    def _step_batched(self, dt, keys):
+        # GameSession.step, with the black holes pulling for all envs at once
+        sessions = self.sessions
+        simulating = [session.begin_step(dt, k) for session, k in zip(sessions, keys)]
+        pulling = [
+            session
+            for session, simulated in zip(sessions, simulating)
+            if simulated and session.black_hole.active
+        ]
+        for session in pulling:
+            session.black_hole.begin_update(dt, session.player)
+        insides = self.pull.pull(
+            dt,
+            [session.black_hole for session in pulling],
+            [session.platforms for session in pulling],
+            [session.platform_index for session in pulling],
+        )
+        for session, inside in zip(pulling, insides):
+            session.black_hole.finish_update(
+                dt,
+                session.player,
+                session.platforms,
+                session.fire_pit,
+                inside,
+                session.platform_index,
+            )
+        return [
+            session.finish_step(dt, k, simulated)
+            for session, k, simulated in zip(sessions, keys, simulating)
+        ]
@@ -0,0 +1,227 @@
+from collections import OrderedDict
+from constants import SCREEN_WIDTH
+from spatial_hash import SpatialHash
+
+# Chunks are vertical strips of the level this many pixels wide
+DEFAULT_CHUNK_WIDTH = SCREEN_WIDTH // 2
+
+# Most platforms kept built at once; inactive chunks past this are dropped
+DEFAULT_MAX_LOADED_PLATFORMS = 20_000
+
+# Chunks beyond the active ones that are built ahead of time, one per update
+PREFETCH_CHUNKS = 2
+
+
+class ChunkedWorld:
+    """The level's platforms, split into chunks that are only live near the view
+
+    Platforms belong to the chunk their left edge starts in. update() makes the
+    chunks overlapping the given world rects active: their platforms are in
+    ``platforms`` and ``index`` and so get simulated and drawn. Chunks are
+    built from the level records when first needed, kept in least recently
+    used order while inactive, and dropped once the loaded ones hold more than
+    max_loaded_platforms. A dropped chunk comes back as the level file has it.
+
+    Platforms only move or get crushed while their chunk is active, so a
+    chunk leaving play records what it holds in inactive_states: a tuple with
+    each platform's rect, or None for a crushed one. Loaded chunks built
+    ahead of time, or reset, have None there, as they hold the level records.
+    """
+
+    def __init__(
+        self,
+        level,
+        chunk_width=DEFAULT_CHUNK_WIDTH,
+        max_loaded_platforms=DEFAULT_MAX_LOADED_PLATFORMS,
+    ):
+        self.level = level
+        self.chunk_width = chunk_width
+        self.max_loaded_platforms = max_loaded_platforms
+        self.chunk_records = level.platform_chunks(chunk_width)
+        # A platform can reach this far right of the chunk it belongs to
+        self.reach = level.widest_platform()
+        self.loaded = OrderedDict()  # chunk -> its platforms, oldest use first
+        self.record_numbers = {}  # loaded platform -> its record in the level
+        self.loaded_platforms = 0
+        self.crushed = set()  # platforms taken out of the level until a reset
+        self.inactive_states = {}  # loaded chunk out of play -> what it holds
+        self.loads = 0
+        self.evictions = 0
+        self.reset()
+
+    def reset(self):
+        """Put every loaded platform back as the level has it and deactivate all"""
+        level = self.level
+        for chunk, platforms in self.loaded.items():
+            level.reset_platforms(platforms, self.chunk_records[chunk])
+        self.crushed.clear()
+        self.inactive_states = dict.fromkeys(self.loaded)
+        self.active = []
+        # New objects, so anything holding the old ones sees a new level
+        self.platforms = []
+        self.index = SpatialHash()
+
+    def _wanted(self, rects, margin=0):
+        width = self.chunk_width
+        wanted = set()
+        for rect in rects:
+            first = (rect.left - self.reach) // width - margin
+            last = (rect.right - 1) // width + margin
+            wanted.update(range(first, last + 1))
+        return sorted(wanted.intersection(self.chunk_records))
+
+    def _load(self, chunk):
+        platforms = self.loaded.get(chunk)
+        if platforms is None:
+            records = self.chunk_records[chunk]
+            platforms = self.level.build_platforms(records)
+            self.record_numbers.update(zip(platforms, records))
+            self.loaded[chunk] = platforms
+            self.loaded_platforms += len(platforms)
+            self.inactive_states[chunk] = None
+            self.loads += 1
+        else:
+            self.loaded.move_to_end(chunk)
+        return platforms
+
+    def _evict(self, active):
+        for chunk in list(self.loaded):
+            if self.loaded_platforms <= self.max_loaded_platforms:
+                break
+            if chunk in active:
+                continue
+            self._drop(chunk)
+            self.evictions += 1
+
+    def _drop(self, chunk):
+        platforms = self.loaded.pop(chunk)
+        self.loaded_platforms -= len(platforms)
+        self.crushed.difference_update(platforms)
+        del self.inactive_states[chunk]
+        for platform in platforms:
+            del self.record_numbers[platform]
+
+    def loaded_states(self):
+        """Every loaded chunk with its inactive state, least recently used first
+
+        Active chunks are paired with None; what they hold is the live list.
+        """
+        states = self.inactive_states
+        return [(chunk, states.get(chunk)) for chunk in self.loaded]
+
+    def update(self, rects):
+        """Activate the chunks overlapping the world rects, return True on changes"""
+        wanted = self._wanted(rects)
+        changed = wanted != self.active
+        if changed:
+            index = self.index
+            wanted_set = set(wanted)
+            leaving = [chunk for chunk in self.active if chunk not in wanted_set]
+            if leaving:
+                gone = set()
+                for chunk in leaving:
+                    self.loaded.move_to_end(chunk)
+                    state = []
+                    for platform in self.loaded[chunk]:
+                        if platform in index:
+                            index.remove(platform)
+                            state.append(tuple(platform.rect))
+                        else:
+                            self.crushed.add(platform)  # the black hole got it
+                            state.append(None)
+                        gone.add(platform)
+                    self.inactive_states[chunk] = tuple(state)
+                self.platforms[:] = [p for p in self.platforms if p not in gone]
+
+            # Platforms stay in level order, whichever chunk came in first, so
+            # collisions resolve the same however the level is chunked
+            record_numbers = self.record_numbers
+            active_set = set(self.active)
+            for chunk in wanted:
+                if chunk in active_set:
+                    continue
+                platforms = self._load(chunk)
+                del self.inactive_states[chunk]
+                for platform in platforms:
+                    if platform not in self.crushed:
+                        index.insert(platform, record_numbers[platform])
+                        self.platforms.append(platform)
+            self.platforms.sort(key=record_numbers.__getitem__)
+            self.active = wanted
+
+        # Build one of the chunks just out of view ahead of time
+        for chunk in self._wanted(rects, PREFETCH_CHUNKS):
+            if chunk not in self.loaded:
+                self._load(chunk)
+                break
+
+        self._evict(set(wanted))
+        return changed
+
+    def restore(self, active, records, rects, loaded):
+        """Put the chunks back as they were when loaded_states() gave loaded
+
+        active are the chunks to have live, records the level records of the
+        platforms still in them (in level order) and rects their x, y, width
+        and height, flattened. The platform list is changed in place. The
+        other chunks in loaded get their inactive states back, chunks loaded
+        since are dropped and the use order is put back, as it decides what
+        is evicted next.
+        """
+        live = set(records)
+        by_record = {}
+        for chunk in active:
+            chunk_records = self.chunk_records[chunk]
+            platforms = self._load(chunk)
+            self.inactive_states.pop(chunk, None)
+            for platform, record in zip(platforms, chunk_records):
+                by_record[record] = platform
+                if record in live:
+                    self.crushed.discard(platform)
+                else:
+                    self.crushed.add(platform)
+
+        # Patch the index rather than rebuild it: only platforms that left,
+        # came back or moved are touched
+        platforms = [by_record[record] for record in records]
+        index = self.index
+        live_set = set(platforms)
+        for platform in [p for p in index.entries if p not in live_set]:
+            index.remove(platform)
+        for i, (platform, record) in enumerate(zip(platforms, records)):
+            j = i * 4
+            rect = platform.rect
+            if platform not in index:
+                rect.update(rects[j], rects[j + 1], rects[j + 2], rects[j + 3])
+                index.insert(platform, record)
+            elif (rect.x, rect.y, rect.width, rect.height) != rects[j : j + 4]:
+                rect.update(rects[j], rects[j + 1], rects[j + 2], rects[j + 3])
+                index.update(platform)
+
+        self.platforms[:] = platforms
+        self.active = list(active)
+
+        active = set(active)
+        states = self.inactive_states
+        for chunk, state in loaded:
+            if chunk in active:
+                continue
+            platforms = self._load(chunk)
+            if chunk in states and states[chunk] is state:
+                continue  # it has not been in play since
+            if state is None:
+                self.level.reset_platforms(platforms, self.chunk_records[chunk])
+                self.crushed.difference_update(platforms)
+            else:
+                for platform, rect in zip(platforms, state):
+                    if rect is None:
+                        self.crushed.add(platform)
+                    else:
+                        platform.rect.update(rect)
+                        self.crushed.discard(platform)
+            states[chunk] = state
+        kept = {chunk for chunk, _ in loaded}
+        for chunk in [chunk for chunk in self.loaded if chunk not in kept]:
+            self._drop(chunk)
+        for chunk, _ in loaded:
+            self.loaded.move_to_end(chunk)